@@ -0,0 +1,22 @@
+"""
+ASGI config for DIRT project.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dirt_project.settings')
+# Read by settings before they load: no persistent database connections.
+os.environ.setdefault('DJANGO_ASGI', '1')
+
+from . import startup  # noqa: E402
+
+startup.before_setup()
+django_application = get_asgi_application()
+
+from .disconnects import DisconnectWatcher  # noqa: E402
+
+# Lets streaming views (the live event feed) stop when their client leaves.
+application = DisconnectWatcher(django_application)
+startup.after_setup()
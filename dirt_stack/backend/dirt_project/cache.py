@@ -0,0 +1,40 @@
+"""
+Cache backends.
+
+Django's FileBasedCache.add() checks for the key and then writes it, so two
+processes (or threads) can both "win". Single-flight locks in events.cache
+rely on add() being exclusive; this backend publishes the new file with
+os.link(), which fails atomically if the key already exists.
+"""
+
+import os
+import tempfile
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache as BaseFileBasedCache
+
+
+class FileBasedCache(BaseFileBasedCache):
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version):
+            return False
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            try:
+                os.link(tmp_path, fname)
+            except FileExistsError:
+                # Either another writer won, or the file is an expired entry
+                # that has_key() raced with; only the latter may be replaced.
+                if self.has_key(key, version):
+                    return False
+                os.replace(tmp_path, fname)
+                tmp_path = None
+            return True
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
@@ -0,0 +1,103 @@
+"""
+Conditional GET (ETag / Last-Modified) for Inertia views.
+
+Django's ``condition()`` decorator only wraps sync views and derives one
+ETag per URL, but an Inertia URL has several representations: the HTML
+page, the JSON page object and one JSON body per partial reload. The ETag
+here combines the view's data stamp with everything that selects the
+representation, and responses vary on the Inertia headers.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from inertia.settings import settings
+
+from .vite import asset_version
+
+INERTIA_VARY = ('X-Inertia', 'X-Inertia-Partial-Component', 'X-Inertia-Partial-Data')
+
+
+def representation(request):
+    """What, besides the view's data, decides the body returned for this request."""
+    parts = [request.get_full_path(), str(settings.INERTIA_VERSION)]
+    if 'X-Inertia' in request.headers:
+        parts += [
+            'json',
+            request.headers.get('X-Inertia-Partial-Component', ''),
+            request.headers.get('X-Inertia-Partial-Data', ''),
+        ]
+    else:
+        parts += ['html', asset_version(), str(settings.INERTIA_SSR_ENABLED)]
+    return parts
+
+
+def make_etag(request, stamp):
+    digest = hashlib.blake2b(
+        '\n'.join([stamp, *representation(request)]).encode(), digest_size=12,
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, validators):
+    """``(etag, last_modified, response)``; response is a 304/412 when the client is current."""
+    if validators is None:
+        return None, None, None
+    stamp, last_modified = validators
+    etag = make_etag(request, stamp)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return etag, last_modified, response
+
+
+def finish(request, response, etag, last_modified):
+    if response.status_code in (200, 304):
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if last_modified and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, INERTIA_VARY)
+    # Browsers store the page but revalidate it on every visit, so repeat
+    # visits cost a 304 instead of a full render.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(validators_func):
+    """
+    Answer If-None-Match / If-Modified-Since without running the view.
+
+    ``validators_func(request, *args, **kwargs)`` returns ``(stamp,
+    last_modified)`` - a string that changes whenever the view's data does
+    and a Unix timestamp or None - or None to skip validation for this
+    request. It must be a coroutine function when the view is one.
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_inner(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await func(request, *args, **kwargs)
+                validators = await validators_func(request, *args, **kwargs)
+                etag, last_modified, response = not_modified(request, validators)
+                if response is None:
+                    response = await func(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+
+            return async_inner
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return func(request, *args, **kwargs)
+            validators = validators_func(request, *args, **kwargs)
+            etag, last_modified, response = not_modified(request, validators)
+            if response is None:
+                response = func(request, *args, **kwargs)
+            return finish(request, response, etag, last_modified)
+
+        return inner
+
+    return decorator
@@ -0,0 +1,35 @@
+"""
+Per-connection database setup.
+
+SQLite settings such as the journal mode and page cache are per connection
+(or per file) rather than part of DATABASES, so they are applied from the
+``connection_created`` signal whenever Django opens a connection.
+"""
+
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def describe(connection):
+    """Summary of the active database profile, for benchmarks and diagnostics."""
+    info = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for name in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                info[name] = cursor.fetchone()[0]
+    return info
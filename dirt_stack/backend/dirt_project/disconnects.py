@@ -0,0 +1,51 @@
+"""
+Client disconnects for long-lived streaming responses under ASGI.
+
+Django 4.2 stops reading the ASGI receive channel once it has the request
+body, so a streaming view never learns that its client went away; servers
+drop writes to a closed connection silently, and the stream carries on
+until it ends by itself. DisconnectWatcher keeps reading the channel after
+the body and sets an asyncio.Event in the scope when the client leaves.
+"""
+
+import asyncio
+
+
+SCOPE_KEY = 'dirt.disconnected'
+
+
+class DisconnectWatcher:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        disconnected = scope[SCOPE_KEY] = asyncio.Event()
+        watcher = None
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def receive_body():
+            nonlocal watcher
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body') and watcher is None:
+                # Django reads nothing more; listen for the disconnect instead.
+                watcher = asyncio.create_task(watch())
+            return message
+
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+
+def disconnected_event(request):
+    """The request's disconnect Event, or None outside DisconnectWatcher."""
+    return getattr(request, 'scope', {}).get(SCOPE_KEY)
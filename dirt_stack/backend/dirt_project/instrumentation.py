@@ -0,0 +1,209 @@
+"""
+Per-request performance accounting.
+
+The current request's RequestStats lives in a context variable, which
+asgiref copies into sync_to_async threads, so queries issued by the async
+ORM and renders done in worker threads are attributed to the right
+request. MetricsMiddleware opens and closes the accounting; everything
+else only adds to it.
+"""
+
+import contextvars
+import ipaddress
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = metrics.histogram(
+    'http_request_duration_seconds',
+    'Time from the first middleware to the response, per view.',
+    labelnames=('view', 'method', 'status'),
+)
+REQUEST_QUERIES = metrics.histogram(
+    'http_request_db_queries',
+    'Database queries executed per request.',
+    labelnames=('view',),
+    buckets=metrics.COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = metrics.histogram(
+    'http_request_db_seconds',
+    'Time spent executing database queries per request.',
+    labelnames=('view',),
+)
+REQUEST_RENDER_TIME = metrics.histogram(
+    'http_request_render_seconds',
+    'Time spent building the Inertia response (template, JSON or SSR) per request.',
+    labelnames=('view',),
+)
+RESPONSE_SIZE = metrics.histogram(
+    'http_response_size_bytes',
+    'Response body size, for non-streaming responses.',
+    labelnames=('view',),
+    buckets=metrics.SIZE_BUCKETS,
+)
+REPEATED_QUERIES = metrics.counter(
+    'http_repeated_queries_total',
+    'Requests that ran the same SQL statement N_PLUS_ONE_THRESHOLD or more times.',
+    labelnames=('view',),
+)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        # Named phases for Server-Timing, e.g. {'serialize': 0.001, 'render': 0.004, 'ssr': 0.02}.
+        self.timings = {}
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def repeated_statements(self, threshold):
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request's ``name`` phase."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_timing(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+        # Parameters are still placeholders here, so an N+1 loop shows up
+        # as one statement executed many times.
+        stats.statements[sql] += 1
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """connection_created receiver: count every query on the new connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def server_timing(stats, total):
+    entries = [f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"']
+    entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in stats.timings.items()]
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+def finish_request(request, response, stats):
+    """Record the request's metrics and annotate the response."""
+    total = time.perf_counter() - stats.started
+    view = view_name(request)
+
+    REQUEST_LATENCY.observe(total, view=view, method=request.method,
+                            status=f'{response.status_code // 100}xx')
+    REQUEST_QUERIES.observe(stats.queries, view=view)
+    REQUEST_DB_TIME.observe(stats.db_time, view=view)
+    render_time = sum(stats.timings.get(phase, 0.0) for phase in ('serialize', 'render', 'ssr'))
+    if render_time:
+        REQUEST_RENDER_TIME.observe(render_time, view=view)
+    if not response.streaming:
+        RESPONSE_SIZE.observe(len(response.content), view=view)
+
+    threshold = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5)
+    repeated = stats.repeated_statements(threshold)
+    if repeated:
+        REPEATED_QUERIES.inc(view=view)
+        sql, count = repeated[0]
+        logger.warning(
+            'Possible N+1 in %s (%s): %d queries, one statement ran %d times: %s',
+            view, request.path, stats.queries, count, sql,
+        )
+
+    if getattr(settings, 'SERVER_TIMING', True):
+        response['Server-Timing'] = server_timing(stats, total)
+    return response
+
+
+def share_metrics():
+    """Start writing this process's metrics for the others to merge, if configured."""
+    if settings.METRICS_MULTIPROCESS_DIR:
+        metrics.start_snapshot_writer(settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_WRITE_SECONDS)
+
+
+def client_address(request):
+    header = settings.METRICS_CLIENT_IP_HEADER
+    if header:
+        # The trusted proxy appends the address it saw last.
+        return request.META.get(header, '').split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_allowed(request):
+    if settings.METRICS_TOKEN:
+        return constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {settings.METRICS_TOKEN}')
+    try:
+        address = ipaddress.ip_address(client_address(request))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Answers requests bearing METRICS_TOKEN when
+    one is set, otherwise clients in METRICS_ALLOWED_NETWORKS. Reports every
+    worker sharing METRICS_MULTIPROCESS_DIR, or this process alone.
+    """
+    if not client_allowed(request):
+        return HttpResponseForbidden()
+    snap = None
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if directory:
+        # Written first: the next scrape may be answered by another worker,
+        # which reads this process's values from the file, and counters
+        # must not go back to older ones.
+        own = metrics.write_snapshot(directory)
+        snap = metrics.merge([own, *metrics.read_snapshots(directory)])
+    return HttpResponse(metrics.exposition(snap), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,150 @@
+"""
+A small closed-loop load generator for the benchmark commands.
+
+``concurrency`` workers each issue requests back to back until ``total``
+requests have been sent, so the reported throughput is what the server
+sustains at that concurrency. Workers either talk HTTP to a running server
+over one keep-alive connection each, or call the application in-process
+through any other sender (e.g. Django's test client).
+"""
+
+import http.client
+import itertools
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# MetricsMiddleware reports the request's query count in Server-Timing,
+# and the time spent encoding the page as JSON as its 'serialize' phase.
+SERVER_TIMING_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+SERVER_TIMING_SERIALIZE_RE = re.compile(r'\bserialize;dur=([\d.]+)')
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed, queries=(), sizes=(), serialize_ms=()):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else None,
+    }
+    if queries:
+        summary['queries_mean'] = sum(queries) / len(queries)
+        summary['queries_max'] = max(queries)
+    if sizes:
+        summary['payload_bytes'] = round(sum(sizes) / len(sizes))
+    if serialize_ms:
+        summary['serialize_ms'] = round(sum(serialize_ms) / len(serialize_ms), 3)
+    return summary
+
+
+def query_count(server_timing):
+    match = SERVER_TIMING_QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+def serialize_time(server_timing):
+    match = SERVER_TIMING_SERIALIZE_RE.search(server_timing or '')
+    return float(match.group(1)) if match else None
+
+
+def closed_loop(make_sender, total=200, concurrency=10, expect=None):
+    """
+    Send ``total`` requests from ``concurrency`` threads.
+
+    ``make_sender()`` is called once in each thread and returns
+    ``(send, close)``; ``send()`` performs one request and returns
+    ``(status, server_timing_header, body_size)``. A status outside
+    ``expect`` (by default, any status >= 400) or an exception from send()
+    is an error.
+    """
+    tickets = itertools.count()
+    latencies, queries, sizes, serialize_ms, lock = [], [], [], [], threading.Lock()
+    errors = [0]
+
+    def worker():
+        send, close = make_sender()
+        try:
+            while next(tickets) < total:
+                started = time.perf_counter()
+                try:
+                    status, server_timing, size = send()
+                    ok = status in expect if expect else status < 400
+                except (OSError, http.client.HTTPException):
+                    status, server_timing, size, ok = None, None, None, False
+                duration = time.perf_counter() - started
+                count = query_count(server_timing)
+                encoding = serialize_time(server_timing)
+                with lock:
+                    if ok:
+                        latencies.append(duration)
+                        if count is not None:
+                            queries.append(count)
+                        if size is not None:
+                            sizes.append(size)
+                        if encoding is not None:
+                            serialize_ms.append(encoding)
+                    else:
+                        errors[0] += 1
+        finally:
+            close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started, queries, sizes, serialize_ms)
+
+
+def http_sender(url, method='GET', headers=None, body=None, timeout=30.0):
+    """A make_sender() for closed_loop() that requests ``url`` over keep-alive HTTP."""
+    parts = urlsplit(url)
+    connection_class = (
+        http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    )
+    target = parts.path or '/'
+    if parts.query:
+        target = f'{target}?{parts.query}'
+    headers = dict(headers or {})
+
+    def make_sender():
+        connection = connection_class(parts.netloc, timeout=timeout)
+
+        def send():
+            try:
+                connection.request(method, target, body=body() if callable(body) else body,
+                                   headers=headers)
+                response = connection.getresponse()
+                body_size = len(response.read())
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                raise
+            return response.status, response.getheader('Server-Timing'), body_size
+
+        return send, connection.close
+
+    return make_sender
+
+
+def run_load(url, total=200, concurrency=10, headers=None, timeout=30.0):
+    """
+    Drive ``url`` with ``total`` GET requests from ``concurrency`` workers.
+
+    Returns the summary from summarize(); latencies are in seconds.
+    """
+    return closed_loop(http_sender(url, headers=headers, timeout=timeout), total, concurrency)
@@ -0,0 +1,163 @@
+"""
+Media file serving with HTTP validators, byte ranges and proxy offload.
+
+Django's ``static()`` helper only works with DEBUG on and never answers
+conditional or Range requests. This view is used for MEDIA_URL in every
+environment; when a front proxy is configured it only authorises the
+request and hands the transfer back via X-Accel-Redirect / X-Sendfile.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Content-addressed names embed a long hex digest; their bytes never change.
+HASHED_NAME_RE = re.compile(r'[0-9a-f]{32,}')
+
+
+def cache_control(path, immutable_pattern=None):
+    pattern = immutable_pattern or getattr(settings, 'MEDIA_IMMUTABLE_PATTERN', HASHED_NAME_RE)
+    if re.search(pattern, os.path.basename(path)):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={getattr(settings, "MEDIA_CACHE_MAX_AGE", 3600)}'
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header into ``(start, end)`` inclusive.
+
+    Returns None when the header should be ignored (absent, multi-range or
+    malformed, in which case the full body is sent) and raises ValueError
+    for a well-formed range that cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    """A Range is only honoured if If-Range (when present) still matches."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and int(mtime) <= modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload(response, path, fullpath):
+    """Let the front proxy stream the file if MEDIA_SENDFILE is configured."""
+    mode = getattr(settings, 'MEDIA_SENDFILE', None)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + path
+        return True
+    if mode == 'x-sendfile':
+        response['X-Sendfile'] = fullpath
+        return True
+    return False
+
+
+@require_safe
+def serve(request, path, document_root=None, immutable_pattern=None):
+    document_root = document_root or settings.MEDIA_ROOT
+    try:
+        fullpath = safe_join(document_root, path)
+        st = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404('"%s" does not exist' % path)
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('"%s" does not exist' % path)
+
+    etag = quote_etag(f'{st.st_mtime_ns:x}-{st.st_size:x}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Cache-Control': cache_control(path, immutable_pattern),
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if response is not None:
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    response = HttpResponse(content_type=content_type)
+    if offload(response, path, fullpath):
+        # The proxy applies its own Range handling to the offloaded file.
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    try:
+        byte_range = None
+        if if_range_matches(request, etag, st.st_mtime):
+            byte_range = parse_range(request.headers.get('Range'), st.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{st.st_size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = st.st_size
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, length), status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+        response['Content-Length'] = length
+    else:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -0,0 +1,291 @@
+"""
+In-process metrics primitives (counters and histograms) shared by the
+project's instrumentation, and their Prometheus text exposition.
+
+Each process keeps its own values. When several processes serve the same
+app, each one writes a snapshot of them to a shared directory (see
+start_snapshot_writer) and the process answering a scrape merges them,
+so totals don't depend on which worker was asked.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+
+# Latency buckets in seconds, from sub-millisecond to multi-second requests.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_writer_pid = None
+_writer_lock = threading.Lock()
+# Metrics of exited processes, kept by retire_snapshot().
+RETIRED_FILE = 'retired.json'
+
+logger = logging.getLogger(__name__)
+
+
+def _get_or_register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f'Metric {name!r} is already registered as a {metric.kind}')
+        return metric
+
+
+def counter(name, help='', labelnames=()):
+    """Return the process-wide counter called ``name``, creating it once."""
+    return _get_or_register(Counter, name, help, labelnames)
+
+
+def histogram(name, help='', labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Return the process-wide histogram called ``name``, creating it once."""
+    return _get_or_register(Histogram, name, help, labelnames, buckets)
+
+
+def registry():
+    with _registry_lock:
+        return dict(_registry)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help='', labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {
+                    'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0,
+                }
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        """``{label_values: {'buckets': [(le, cumulative)], 'sum', 'count'}}``"""
+        with self._lock:
+            snapshot = {key: dict(series, counts=list(series['counts']))
+                        for key, series in self._values.items()}
+        result = {}
+        for key, series in snapshot.items():
+            cumulative, buckets = 0, []
+            for le, count in zip(self.buckets + (float('inf'),), series['counts']):
+                cumulative += count
+                buckets.append((le, cumulative))
+            result[key] = {'buckets': buckets, 'sum': series['sum'], 'count': series['count']}
+        return result
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile from bucket boundaries (upper bound of the bucket)."""
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        series = self.samples().get(key)
+        if not series or not series['count']:
+            return None
+        target = q * series['count']
+        for le, cumulative in series['buckets']:
+            if cumulative >= target:
+                return le
+        return float('inf')
+
+
+def _format_value(value):
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def snapshot():
+    """Every registered metric's samples, as data that JSON and merge() accept."""
+    result = {}
+    for name, metric in registry().items():
+        entry = {'kind': metric.kind, 'help': metric.help, 'labelnames': list(metric.labelnames)}
+        entry['samples'] = [[list(key), value] for key, value in metric.samples().items()]
+        result[name] = entry
+    return result
+
+
+def merge(snapshots):
+    """Add up snapshots from several processes, series by series."""
+    merged = {}
+    for snap in snapshots:
+        for name, entry in snap.items():
+            target = merged.setdefault(name, dict(entry, samples={}))
+            for key, value in entry['samples']:
+                key = tuple(key)
+                current = target['samples'].get(key)
+                if current is None:
+                    target['samples'][key] = value
+                elif entry['kind'] == 'counter':
+                    target['samples'][key] = current + value
+                else:
+                    target['samples'][key] = {
+                        'buckets': [(le, a + b) for (le, a), (_, b) in zip(current['buckets'], value['buckets'])],
+                        'sum': current['sum'] + value['sum'],
+                        'count': current['count'] + value['count'],
+                    }
+    for entry in merged.values():
+        entry['samples'] = [[list(key), value] for key, value in entry['samples'].items()]
+    return merged
+
+
+def write_snapshot(directory):
+    """Replace this process's snapshot file in ``directory``; returns the snapshot."""
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    # One writer at a time, so an older snapshot never replaces a newer one.
+    with _writer_lock:
+        snap = snapshot()
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(snap, f)
+        os.replace(f'{path}.tmp', path)
+    return snap
+
+
+def read_snapshots(directory):
+    """
+    The snapshots other processes wrote to ``directory``, with the retired
+    ones (see retire_snapshot) as one more.
+    """
+    own = os.path.join(directory, f'{os.getpid()}.json')
+    snapshots = {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        if path == own:
+            continue
+        try:
+            with open(path) as f:
+                snapshots[path] = json.load(f)
+        except (OSError, ValueError):
+            continue  # removed, or being replaced, since the listing
+    retired = snapshots.pop(os.path.join(directory, RETIRED_FILE), None) or {'pids': [], 'metrics': {}}
+    # A file read just before it was retired is already in the total.
+    for pid in retired['pids']:
+        snapshots.pop(os.path.join(directory, f'{pid}.json'), None)
+    return [*snapshots.values(), retired['metrics']]
+
+
+def retire_snapshot(directory, pid):
+    """
+    Fold the snapshot of the exited process ``pid`` into one file for all
+    exited processes, so recycled workers' totals are kept without a file
+    each. Only one process (the server's master) may call this.
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    retired_path = os.path.join(directory, RETIRED_FILE)
+    try:
+        with open(path) as f:
+            exited = json.load(f)
+    except (OSError, ValueError):
+        return
+    try:
+        with open(retired_path) as f:
+            retired = json.load(f)
+    except (OSError, ValueError):
+        retired = {'pids': [], 'metrics': {}}
+    retired = {'pids': [*retired['pids'], pid], 'metrics': merge([retired['metrics'], exited])}
+    with open(f'{retired_path}.tmp', 'w') as f:
+        json.dump(retired, f)
+    os.replace(f'{retired_path}.tmp', retired_path)
+    os.remove(path)
+
+
+def start_snapshot_writer(directory, interval):
+    """
+    Write this process's snapshot to ``directory`` every ``interval``
+    seconds from a daemon thread. Starts once per process (a forked child
+    starts its own). The server writes a last snapshot as the process
+    exits and keeps it, folded in with retire_snapshot(), so counters never
+    go backwards; it clears the directory when it starts.
+    """
+    global _writer_pid
+    with _registry_lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer_pid = os.getpid()
+    os.makedirs(directory, exist_ok=True)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError:
+                logger.exception('Could not write metrics to %s', directory)
+
+    threading.Thread(target=run, name='metrics-writer', daemon=True).start()
+
+
+def exposition(snap=None):
+    """Metrics in the Prometheus text format (version 0.0.4); this process's by default."""
+    lines = []
+    for name, entry in sorted((snap if snap is not None else snapshot()).items()):
+        lines.append(f'# HELP {name} {entry["help"]}')
+        lines.append(f'# TYPE {name} {entry["kind"]}')
+        labelnames = entry['labelnames']
+        samples = sorted((tuple(key), value) for key, value in entry['samples'])
+        if entry['kind'] == 'counter':
+            for key, value in samples:
+                lines.append(f'{name}{_labels(labelnames, key)} {_format_value(value)}')
+            continue
+        for key, series in samples:
+            for le, cumulative in series['buckets']:
+                labels = _labels(labelnames, key, [('le', _format_value(float(le)))])
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = _labels(labelnames, key)
+            lines.append(f'{name}_sum{labels} {_format_value(series["sum"])}')
+            lines.append(f'{name}_count{labels} {series["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,81 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.middleware.csrf import get_token
+from inertia.middleware import InertiaMiddleware as BaseInertiaMiddleware
+
+from . import instrumentation
+
+
+class MetricsMiddleware:
+    """
+    Per-request latency, query count/time, render time and response size,
+    exported via dirt_project.metrics and summarised in a Server-Timing
+    header. Should be first in MIDDLEWARE so its timing covers the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        instrumentation.share_metrics()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = instrumentation.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        return instrumentation.finish_request(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = instrumentation.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        return instrumentation.finish_request(request, response, stats)
+
+
+class InertiaMiddleware(BaseInertiaMiddleware):
+    """
+    inertia-django's middleware, made async-capable.
+
+    The upstream class is sync-only, which forces Django to run every async
+    view behind a thread hop under ASGI. The response handling is the same.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        # Same steps as BaseInertiaMiddleware.__call__ after the view runs.
+        get_token(request)
+
+        if not self.is_inertia_request(request):
+            return response
+
+        if self.is_non_post_redirect(request, response):
+            response.status_code = 303
+
+        if self.is_stale(request):
+            return self.force_refresh(request)
+
+        return response
@@ -0,0 +1,207 @@
+"""
+Inertia rendering for the project's views.
+
+A drop-in for ``inertia.render``/``inertia.inertia`` that keeps their
+partial-reload and lazy-prop semantics but routes server-side rendering
+through the pooled, cached SSR client in ``dirt_project.ssr``. Pages
+are encoded by ``dirt_project.serialization``, and a view can declare
+which fields of its props the page renders so nothing else is shipped.
+"""
+
+from functools import cache, wraps
+from inspect import isawaitable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.shortcuts import render as base_render
+from inertia.settings import settings
+from inertia.utils import LazyProp
+
+from . import serialization, ssr
+from .instrumentation import timed
+
+
+def is_partial_render(request, component):
+    return (
+        'X-Inertia-Partial-Data' in request.headers
+        and request.headers.get('X-Inertia-Partial-Component', '') == component
+    )
+
+
+def partial_keys(request):
+    return request.headers.get('X-Inertia-Partial-Data', '').split(',')
+
+
+def resolve(prop):
+    if isinstance(prop, dict):
+        return {key: resolve(value) for key, value in prop.items()}
+    return prop() if callable(prop) else prop
+
+
+async def aresolve(prop):
+    if isinstance(prop, dict):
+        return {key: await aresolve(value) for key, value in prop.items()}
+    value = prop() if callable(prop) else prop
+    if isawaitable(value):
+        value = await value
+    return value
+
+
+def select_props(request, component, props):
+    """
+    Merge shared and view props and keep only what this visit needs:
+    partial reloads get just the requested keys, full visits drop lazy()
+    props. Nothing is evaluated yet.
+    """
+    props = {
+        **(request.inertia.all() if hasattr(request, 'inertia') else {}),
+        **props,
+    }
+    if is_partial_render(request, component):
+        keys = partial_keys(request)
+        return {key: value for key, value in props.items() if key in keys}
+    return {key: value for key, value in props.items() if not isinstance(value, LazyProp)}
+
+
+def project(value, fields):
+    """
+    Keep only ``fields`` of ``value``, a dict or a list of dicts. ``fields``
+    is a sequence of keys, or a dict mapping a prop key to the fields of
+    its value, nested as deep as the props are.
+    """
+    if fields is None or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [project(item, fields) for item in value]
+    if isinstance(fields, dict):
+        return {key: project(item, fields.get(key)) for key, item in value.items()}
+    return {key: value[key] for key in fields if key in value}
+
+
+def once(func):
+    """Memoise a zero-argument prop callable, sync or async, so props can share it."""
+    if not iscoroutinefunction(func):
+        return cache(func)
+
+    result = []
+
+    async def wrapper():
+        if not result:
+            result.append(await func())
+        return result[0]
+
+    return wrapper
+
+
+def page_data(request, component, props):
+    return {
+        'component': component,
+        'props': props,
+        'url': request.build_absolute_uri(),
+        'version': settings.INERTIA_VERSION,
+    }
+
+
+def ssr_render(component, page_json):
+    """Server-rendered ``{'head', 'body'}`` for the page, or None for client rendering."""
+    if not settings.INERTIA_SSR_ENABLED:
+        return None
+    with timed('ssr'):
+        return ssr.get_client().render(component, page_json, settings.INERTIA_VERSION)
+
+
+def json_response(page):
+    with timed('serialize'):
+        body = serialization.dumps_bytes(page)
+    with timed('render'):
+        return HttpResponse(
+            body,
+            headers={
+                'Vary': 'Accept',
+                'X-Inertia': 'true',
+            },
+            content_type='application/json',
+        )
+
+
+def encode_page(page):
+    with timed('serialize'):
+        return serialization.dumps(page)
+
+
+def html_response(request, component, page_json, rendered, template_data):
+    # The layout uses the component name to preload that page's JS chunk.
+    template_data = {'inertia_component': component, **(template_data or {})}
+    if rendered is not None:
+        template_name = 'inertia_ssr.html'
+        context = {'inertia_layout': settings.INERTIA_LAYOUT, **rendered, **template_data}
+    else:
+        template_name = 'inertia.html'
+        context = {'inertia_layout': settings.INERTIA_LAYOUT, 'page': page_json, **template_data}
+    with timed('render'):
+        return base_render(request, template_name, context)
+
+
+def respond(request, component, props, template_data):
+    page = page_data(request, component, props)
+    if 'X-Inertia' in request.headers:
+        return json_response(page)
+
+    page_json = encode_page(page)
+    rendered = ssr_render(component, page_json)
+    return html_response(request, component, page_json, rendered, template_data)
+
+
+def render(request, component, props=None, template_data=None, fields=None):
+    props = project(resolve(select_props(request, component, props or {})), fields)
+    return respond(request, component, props, template_data)
+
+
+async def arender(request, component, props=None, template_data=None, fields=None):
+    """
+    Async counterpart of render(): async prop callables are awaited, so
+    views can use the async ORM. The SSR round-trip is blocking I/O that
+    touches no database state, so it runs in the shared thread pool rather
+    than the thread the async ORM is serialised on.
+    """
+    props = project(await aresolve(select_props(request, component, props or {})), fields)
+    page = page_data(request, component, props)
+    if 'X-Inertia' in request.headers:
+        return json_response(page)
+
+    page_json = encode_page(page)
+    rendered = None
+    if settings.INERTIA_SSR_ENABLED:
+        rendered = await sync_to_async(ssr_render, thread_sensitive=False)(component, page_json)
+    return html_response(request, component, page_json, rendered, template_data)
+
+
+def inertia(component, fields=None):
+    """
+    Render the props dict a view returns; works for sync and async views.
+    ``fields`` maps prop keys to the fields the page renders (see project()).
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_inner(request, *args, **kwargs):
+                props = await func(request, *args, **kwargs)
+                if not isinstance(props, dict):
+                    return props
+                return await arender(request, component, props, fields=fields)
+
+            return async_inner
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            props = func(request, *args, **kwargs)
+
+            # Anything other than a dict is a response the view built itself.
+            if not isinstance(props, dict):
+                return props
+
+            return render(request, component, props, fields=fields)
+
+        return inner
+
+    return decorator
@@ -2,72 +2,245 @@
 Django settings for DIRT project (Django + Inertia + React + Tailwind).
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# DJANGO_ENV=production selects the production profile: DEBUG off, the
+# cached template loader, no development CORS origins, no Server-Timing
+# header and deferred imports of modules the app doesn't call (see
+# dirt_project.startup). It requires DJANGO_SECRET_KEY. The Dockerfile sets
+# it for the running container; `manage.py runserver` stays in development.
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'development')
+PRODUCTION = DJANGO_ENV == 'production'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-dirt-stack-secret-key-change-in-production'
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    if PRODUCTION:
+        raise ImproperlyConfigured('DJANGO_SECRET_KEY must be set when DJANGO_ENV=production.')
+    SECRET_KEY = 'django-insecure-dirt-stack-secret-key-change-in-production'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# With DEBUG on, Django keeps every SQL query in connection.queries and shows
+# tracebacks to visitors.
+DEBUG = os.environ.get('DJANGO_DEBUG', '0' if PRODUCTION else '1') == '1'
 
 ALLOWED_HOSTS = ['*']  # Allow all hosts for ALB access
 
+# Optional apps. The admin (and django.contrib.messages, which only the
+# admin uses) can be left out of a deployment with ADMIN_ENABLED=0; it
+# costs import time at startup and middleware time on every request.
+ADMIN_ENABLED = os.environ.get('ADMIN_ENABLED', '1') == '1'
+
+# Cross-origin requests are only needed while the Vite dev server runs on
+# another port. In production CORS_ALLOWED_ORIGINS (comma-separated) turns
+# django-cors-headers on; left unset, the app and its middleware aren't loaded.
+CORS_ALLOWED_ORIGINS = [
+    *filter(None, os.environ.get('CORS_ALLOWED_ORIGINS', '').split(',')),
+] or ([] if PRODUCTION else [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "http://localhost:8000",
+    "http://127.0.0.1:8000",
+])
+CORS_ALLOW_CREDENTIALS = True
+CORS_ENABLED = bool(CORS_ALLOWED_ORIGINS)
+
 # Application definition
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    *(['django.contrib.admin'] if ADMIN_ENABLED else []),
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
-    'django.contrib.messages',
+    *(['django.contrib.messages'] if ADMIN_ENABLED else []),
     'django.contrib.staticfiles',
-    'corsheaders',
+    *(['corsheaders'] if CORS_ENABLED else []),
     'inertia',
     'pages',  # Our main app
     'events',  # Events app
+    'tickets',  # Ticket inventory and reservations
+    'jobs',  # Database-backed background jobs
 ]
 
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
+    'dirt_project.middleware.MetricsMiddleware',
+    *(['corsheaders.middleware.CorsMiddleware'] if CORS_ENABLED else []),
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'inertia.middleware.InertiaMiddleware',
+    'dirt_project.middleware.InertiaMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    *(['django.contrib.messages.middleware.MessageMiddleware'] if ADMIN_ENABLED else []),
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'dirt_project.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process in
+            # production; development re-reads them so edits show up.
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)] if PRODUCTION
+                else TEMPLATE_LOADERS
+            ),
             'context_processors': [
-                'django.template.context_processors.debug',
+                *([] if PRODUCTION else ['django.template.context_processors.debug']),
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
+                *(['django.contrib.messages.context_processors.messages'] if ADMIN_ENABLED else []),
             ],
         },
     },
 ]
 
+# Modules imported by dependencies but unused by the app, loaded only if
+# something touches them: inertia-django's package imports requests for an
+# SSR client dirt_project.ssr replaces (about a quarter of startup). With
+# SSR on, dirt_project.ssr uses requests itself, so it is imported as usual.
+INERTIA_SSR_ENABLED = os.environ.get('INERTIA_SSR_ENABLED', '') == '1'
+LAZY_IMPORTS = ['requests'] if PRODUCTION and not INERTIA_SSR_ENABLED else []
+# Move the objects created while loading the app out of the garbage
+# collector's reach, so the first request doesn't pay for a full collection.
+GC_FREEZE_AT_STARTUP = os.environ.get('GC_FREEZE_AT_STARTUP', '1' if PRODUCTION else '0') == '1'
+# benchmark_startup fails when a cold process takes longer than this to
+# import the application and answer its first request.
+STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1500))
+
 WSGI_APPLICATION = 'dirt_project.wsgi.application'
+ASGI_APPLICATION = 'dirt_project.asgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres selects the RDS instance from
+# infrastructure/cloudformation/03-database.yaml; SQLite is the default.
+# Connections persist for DB_CONN_MAX_AGE seconds (0 closes them after every
+# request) and are health-checked before reuse. Under ASGI (set by
+# dirt_project.asgi) the default is 0: sync ORM calls run on whichever
+# executor thread is free, and a connection left open in one isn't reused
+# by the next request, so persistent connections pile up instead of being
+# shared. Pool connections outside Django there (DB_POOLER=pgbouncer).
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+ASGI = os.environ.get('DJANGO_ASGI') == '1'
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '0' if ASGI else '60'))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'maticko'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # Required when connecting through PgBouncer in transaction mode.
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_POOLER') == 'pgbouncer',
+            'OPTIONS': {
+                'connect_timeout': 5,
+                'sslmode': os.environ.get('DB_SSLMODE', 'prefer'),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked".
+                'timeout': 5,
+            },
+        }
+    }
+
+# PRAGMAs applied to every new SQLite connection (dirt_project.db). WAL lets
+# readers proceed while a write is in progress; DB_SQLITE_TUNED=0 restores
+# SQLite's rollback journal defaults for comparison.
+if os.environ.get('DB_SQLITE_TUNED', '1') == '1':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'cache_size': -64000,  # KiB, i.e. 64 MB of page cache
+        'mmap_size': 268435456,
+        'temp_store': 'memory',
+    }
+else:
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'delete',
+        'synchronous': 'full',
     }
+
+# Request instrumentation (dirt_project.instrumentation)
+# Add a Server-Timing header (db, render, ssr, total) to every response.
+# Off in production: query counts and database time are visible to anyone.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0' if PRODUCTION else '1') == '1'
+# Log a possible N+1 when one SQL statement runs this often in a request.
+N_PLUS_ONE_THRESHOLD = 5
+# /metrics answers requests with "Authorization: Bearer <METRICS_TOKEN>"
+# when a token is set. Otherwise it answers clients in
+# METRICS_ALLOWED_NETWORKS (add the Prometheus host's network). Behind a
+# proxy on the same host every request comes from localhost: set a token,
+# or METRICS_CLIENT_IP_HEADER to the META key of the header the proxy
+# appends the client address to (e.g. HTTP_X_FORWARDED_FOR).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_NETWORKS = [
+    '127.0.0.1/32', '::1/128',
+    *filter(None, os.environ.get('METRICS_ALLOWED_NETWORKS', '').split(',')),
+]
+METRICS_CLIENT_IP_HEADER = os.environ.get('METRICS_CLIENT_IP_HEADER', '')
+# Worker processes write their metrics here every METRICS_WRITE_SECONDS,
+# and /metrics adds them up. gunicorn.conf.py sets it; empty reports the
+# answering process only.
+METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR', '')
+METRICS_WRITE_SECONDS = 5
+
+# Caches
+# The events cache (events.cache) holds serialized event payloads and list
+# pages. EVENT_CACHE_BACKEND=locmem keeps it per process, which is only
+# correct with a single worker; the file backend is shared by every worker
+# on the host, so invalidations reach all of them.
+EVENT_CACHE_BACKEND = os.environ.get('EVENT_CACHE_BACKEND', 'file')
+EVENT_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'events',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'dirt_project.cache.FileBasedCache',
+        'LOCATION': os.environ.get('EVENT_CACHE_LOCATION', BASE_DIR / '.cache' / 'events'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'events': EVENT_CACHE_BACKENDS[EVENT_CACHE_BACKEND],
+}
+EVENT_CACHE_ALIAS = 'events'
+# Seconds an entry lives; stale versions are never read, this only bounds space.
+EVENT_CACHE_TIMEOUT = 3600
+# Payloads that depend on the clock (upcoming related events) are cached for
+# at most this long; an event that just ended drops out within it.
+EVENT_CACHE_CLOCK_SECONDS = 60
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -98,25 +271,99 @@ STATICFILES_DIRS = [
     BASE_DIR.parent / 'frontend' / 'dist',  # Point to React build output
 ]
 
+# Vite emits content-hashed names such as main-DkH2LJ_O.js
+STATIC_IMMUTABLE_PATTERN = r'-[A-Za-z0-9_-]{8}\.(js|css|woff2?|png|jpe?g|svg|webp|avif)$'
+
+# Vite build manifest, read at runtime by the {% vite_entry %} template tag
+VITE_MANIFEST_PATH = os.environ.get(
+    'VITE_MANIFEST_PATH', BASE_DIR.parent / 'frontend' / 'dist' / '.vite' / 'manifest.json'
+)
+# Set to e.g. http://127.0.0.1:3000 to load assets from `npm run dev` instead
+VITE_DEV_SERVER_URL = os.environ.get('VITE_DEV_SERVER_URL')
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Hand media transfers to the front proxy instead of streaming them from
+# Python: None, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd).
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Cache lifetime for media whose names are not content-hashed
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Cover photos are stored under the SHA-256 of their content (see
+# dirt_project.storage), so re-uploading an image doesn't add a copy.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'covers': {'BACKEND': 'dirt_project.storage.ContentAddressedStorage'},
+}
+# Uploads are hashed as they stream in; bytes past the size limit are
+# dropped and the form rejects the file.
+FILE_UPLOAD_HANDLERS = [
+    'dirt_project.uploads.HashingMemoryFileUploadHandler',
+    'dirt_project.uploads.HashingTemporaryFileUploadHandler',
+]
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024))
+# Large uploads spool here; on the same filesystem as MEDIA_ROOT, saving
+# one is a rename instead of a second copy.
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR') or None
+
+# Background threads used to render resized cover photo variants
+EVENT_COVER_VARIANT_WORKERS = 2
+
+# How long a ticket reservation is held before it lapses back into inventory
+TICKET_HOLD_SECONDS = int(os.environ.get('TICKET_HOLD_SECONDS', 600))
+TICKET_MAX_PER_RESERVATION = 10
+
+# Live event feed (events.live): Server-Sent Events per web worker process.
+LIVE_MAX_CONNECTIONS = int(os.environ.get('LIVE_MAX_CONNECTIONS', 500))
+LIVE_HEARTBEAT_SECONDS = 15
+# How often changes written by other processes are picked up.
+LIVE_POLL_SECONDS = 1.0
+# Recent changes kept in memory for reconnecting clients; older ones are
+# replayed from the database, up to LIVE_REPLAY_LIMIT.
+LIVE_BUFFER_SIZE = 1000
+LIVE_REPLAY_LIMIT = 1000
+# Frames a slow client may fall behind before it is disconnected to resume.
+LIVE_CLIENT_QUEUE = 100
+# Streams end after this long and the browser reconnects, so a connection
+# whose client vanished without a disconnect is never held for long.
+LIVE_MAX_SECONDS = 300
+LIVE_RETRY_MS = 3000
+LIVE_RETENTION_HOURS = 24
+
+# Background jobs (jobs app), run by `manage.py run_jobs`. gunicorn.conf.py
+# starts one worker beside the web workers unless GUNICORN_JOB_WORKER=0;
+# JOB_WORKERS is how many jobs each run_jobs process runs at once.
+JOBS_ENABLED = os.environ.get('JOBS_ENABLED', '1') == '1'
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_SECONDS = 1.0
+JOB_MAX_ATTEMPTS = 5
+# Retry n waits about JOB_BACKOFF_BASE * 2**(n-1) seconds, up to JOB_BACKOFF_MAX.
+JOB_BACKOFF_BASE = 5
+JOB_BACKOFF_MAX = 3600
+# A running job whose worker hasn't renewed it for this long is run again.
+JOB_LEASE_SECONDS = 300
+JOB_RETENTION_DAYS = 7
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Inertia.js settings
 INERTIA_LAYOUT = 'app.html'
-INERTIA_SSR_URL = 'http://127.0.0.1:13714'
-INERTIA_SSR_ENABLED = False
-
-# CORS settings for development
-CORS_ALLOWED_ORIGINS = [
-    "http://localhost:3000",
-    "http://127.0.0.1:3000",
-    "http://localhost:8000",
-    "http://127.0.0.1:8000",
-]
-
-CORS_ALLOW_CREDENTIALS = True
-
+INERTIA_SSR_URL = os.environ.get('INERTIA_SSR_URL', 'http://127.0.0.1:13714')
+# INERTIA_SSR_ENABLED is read above, next to LAZY_IMPORTS.
+# Seconds before a render falls back to client-side rendering, and how long
+# to stop trying after a failure.
+INERTIA_SSR_TIMEOUT = float(os.environ.get('INERTIA_SSR_TIMEOUT', '0.5'))
+INERTIA_SSR_RETRY_AFTER = 5.0
+# Keep-alive connections to the render server per worker process
+INERTIA_SSR_POOL_SIZE = 10
+# Rendered pages cached per process, keyed by component, page hash and version
+INERTIA_SSR_CACHE_SIZE = 512
+INERTIA_SSR_CACHE_TTL = 300
+# JSON encoder for Inertia pages and the JSON endpoints: 'auto' (orjson when
+# installed), 'orjson', 'json', or a dotted path (see dirt_project.serialization).
+PROPS_SERIALIZER = os.environ.get('PROPS_SERIALIZER', 'auto')
@@ -0,0 +1,169 @@
+"""
+Client for the Inertia server-side rendering (SSR) service.
+
+Render calls reuse pooled keep-alive connections, identical pages are
+served from a bounded in-process cache, and any error or timeout returns
+None so the caller falls back to client-side rendering.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+RENDER_LATENCY = histogram(
+    'inertia_ssr_render_seconds',
+    'Round-trip time of SSR render requests.',
+    labelnames=('outcome',),
+)
+RENDER_CACHE = counter(
+    'inertia_ssr_cache_total',
+    'SSR render cache lookups.',
+    labelnames=('result',),
+)
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered pages with an optional TTL."""
+
+    def __init__(self, max_entries=512, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SSRClient:
+    def __init__(self, url, timeout=0.5, pool_size=10, cache_size=512, cache_ttl=None,
+                 retry_after=5.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retry_after = retry_after
+        self.cache = RenderCache(cache_size, cache_ttl) if cache_size else None
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+    @property
+    def session(self):
+        # requests is imported lazily; it is only needed when SSR is on.
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1, pool_maxsize=self.pool_size,
+                        pool_block=False, max_retries=0,
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def cache_key(self, component, page_json, version):
+        digest = hashlib.sha256(page_json.encode()).hexdigest()
+        return f'{component}:{version}:{digest}'
+
+    def render(self, component, page_json, version):
+        """
+        Return ``{'head': [...], 'body': '...'}`` for the page, or None if
+        the render server is unavailable so the page renders client-side.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(component, page_json, version)
+            cached = self.cache.get(key)
+            if cached is not None:
+                RENDER_CACHE.inc(result='hit')
+                return cached
+            RENDER_CACHE.inc(result='miss')
+
+        if time.monotonic() < self._unavailable_until:
+            RENDER_LATENCY.observe(0.0, outcome='skipped')
+            return None
+
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f'{self.url}/render',
+                data=page_json.encode(),
+                headers={'Content-Type': 'application/json'},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception as exc:
+            RENDER_LATENCY.observe(time.perf_counter() - started, outcome='error')
+            # Don't pay the timeout on every request while the server is down.
+            self._unavailable_until = time.monotonic() + self.retry_after
+            logger.warning('SSR render of %s failed, falling back to client rendering: %s',
+                           component, exc)
+            return None
+
+        RENDER_LATENCY.observe(time.perf_counter() - started, outcome='ok')
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SSRClient(
+                settings.INERTIA_SSR_URL,
+                timeout=getattr(settings, 'INERTIA_SSR_TIMEOUT', 0.5),
+                pool_size=getattr(settings, 'INERTIA_SSR_POOL_SIZE', 10),
+                cache_size=getattr(settings, 'INERTIA_SSR_CACHE_SIZE', 512),
+                cache_ttl=getattr(settings, 'INERTIA_SSR_CACHE_TTL', None),
+                retry_after=getattr(settings, 'INERTIA_SSR_RETRY_AFTER', 5.0),
+            )
+        return _client
+
+
+def reset_client():
+    """Drop the shared client, e.g. after SSR settings change."""
+    global _client
+    with _client_lock:
+        _client = None
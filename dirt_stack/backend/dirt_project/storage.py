@@ -0,0 +1,66 @@
+"""
+Content-addressed file storage.
+
+Files are saved under the SHA-256 of their bytes
+(``<upload_to>/<2 hex chars>/<digest><ext>``), so uploading the same image
+twice stores it once and the second save just returns the existing name.
+Uploaded content is always hashed, whatever its name: a client could send
+a filename that looks like a digest. Files derived from a hashed original
+(cover variants) are saved under the name their caller derived with
+save_derived().
+
+The digest comes from the upload handlers in ``dirt_project.uploads`` when
+the file arrived in a request, so nothing is read twice; other files are
+hashed here before saving.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(content):
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        directory, basename = os.path.split(name)
+        digest = file_digest(content)
+        ext = os.path.splitext(basename)[1].lower()
+        return os.path.join(directory, digest[:2], f'{digest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            return super().save(name, content, max_length)
+        name = self.hashed_name(self.generate_filename(name), content)
+        if self.exists(name):
+            # Same bytes, same name: nothing to write.
+            return name
+        # A concurrent save of the same bytes can still get a suffixed
+        # copy from FileSystemStorage; that only costs the duplicate.
+        return super().save(name, content, max_length)
+
+    def save_derived(self, name, content, max_length=None):
+        """
+        Save ``content`` under ``name`` as given, without hashing. Only for
+        names derived from a stored, hashed original, never for names a
+        client supplied. A file already stored under ``name`` is kept.
+        """
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
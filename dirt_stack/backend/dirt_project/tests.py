@@ -0,0 +1,310 @@
+import datetime
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import instrumentation, metrics, rendering, serialization, startup, vite
+from .media import parse_range, serve
+from .storage import ContentAddressedStorage
+from .uploads import oversized_uploads
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_same_bytes_are_stored_once(self):
+        first = self.storage.save('covers/a.jpg', ContentFile(b'one'))
+        second = self.storage.save('covers/b.JPG', ContentFile(b'one'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('.jpg'))
+
+    def test_digest_like_upload_names_are_hashed(self):
+        name = f'covers/{"ab" * 32}.jpg'
+        first = self.storage.save(name, ContentFile(b'first upload'))
+        second = self.storage.save(name, ContentFile(b'second upload'))
+        self.assertNotEqual(first, second)
+        with self.storage.open(second) as f:
+            self.assertEqual(f.read(), b'second upload')
+
+    def test_derived_names_are_kept(self):
+        name = f'variants/{"cd" * 32}-320w.webp'
+        self.assertEqual(self.storage.save_derived(name, ContentFile(b'variant')), name)
+        # Another job rendering the same variant gets the stored file back.
+        self.assertEqual(self.storage.save_derived(name, ContentFile(b'again')), name)
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'variant')
+
+
+class DeferredModuleTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Slow to execute, so other threads use it while it is loading.
+        Path(directory.name, 'deferred_example.py').write_text('import time\ntime.sleep(0.05)\nVALUE = 1\n')
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, 'deferred_example', None)
+
+    def test_module_runs_on_first_attribute_use(self):
+        self.assertTrue(startup.defer('deferred_example'))
+        import deferred_example
+        self.assertIsInstance(deferred_example, startup.DeferredModule)
+        self.assertEqual(deferred_example.VALUE, 1)
+        self.assertNotIsInstance(deferred_example, startup.DeferredModule)
+
+    def test_concurrent_first_use_sees_the_loaded_module(self):
+        startup.defer('deferred_example')
+        module = sys.modules['deferred_example']
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(getattr(module, 'VALUE', None))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [1] * 4)
+
+
+class RangeTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        Path(self.root, 'clip.bin').write_bytes(bytes(range(100)))
+
+    def get(self, **headers):
+        request = RequestFactory().get('/media/clip.bin', **headers)
+        response = serve(request, 'clip.bin', document_root=self.root)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=95-200', 100), (95, 99))
+        # Ignored: the whole file is sent.
+        for header in (None, '', 'bytes=0-1,5-6', 'items=0-1', 'bytes=-'):
+            self.assertIsNone(parse_range(header, 100))
+        for header in ('bytes=100-', 'bytes=5-1', 'bytes=-0'):
+            with self.assertRaises(ValueError):
+                parse_range(header, 100)
+
+    def test_partial_content(self):
+        response, body = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(body, bytes(range(10, 20)))
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(HTTP_RANGE='bytes=200-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=0-4', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, bytes(range(5))))
+        # A changed file: the whole of it, not a piece of the new bytes.
+        response, body = self.get(HTTP_RANGE='bytes=0-4', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, len(body)), (200, 100))
+
+    def test_not_modified(self):
+        etag = self.get()[0]['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def other_process(self, pid, requests):
+        snap = {'test_requests_total': {'kind': 'counter', 'help': 'Requests.', 'labelnames': ['view'],
+                                        'samples': [[['home'], requests]]}}
+        Path(self.directory, f'{pid}.json').write_text(json.dumps(snap))
+
+    def total(self, snap):
+        return dict((tuple(key), value) for key, value in snap['test_requests_total']['samples'])[('home',)]
+
+    def test_exposition_format(self):
+        metrics.counter('test_format_total', 'Counted.', labelnames=('view',)).inc(view='a"b')
+        metrics.histogram('test_format_seconds', 'Timed.', buckets=(0.1, 1.0)).observe(0.5)
+        text = metrics.exposition()
+        self.assertIn('# TYPE test_format_total counter\ntest_format_total{view="a\\"b"} 1\n', text)
+        self.assertIn('test_format_seconds_bucket{le="0.1"} 0\ntest_format_seconds_bucket{le="1.0"} 1\n'
+                      'test_format_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn('test_format_seconds_count 1\n', text)
+
+    def test_processes_are_added_up(self):
+        self.other_process(1, 3)
+        self.other_process(2, 4)
+        self.assertEqual(self.total(metrics.merge(metrics.read_snapshots(self.directory))), 7)
+
+    def test_exited_processes_are_kept_once(self):
+        self.other_process(1, 3)
+        # Read just before it was retired.
+        stale = json.loads(Path(self.directory, '1.json').read_text())
+        metrics.retire_snapshot(self.directory, 1)
+        self.other_process(1, 3)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['1.json', metrics.RETIRED_FILE])
+        self.assertEqual(self.total(metrics.merge(metrics.read_snapshots(self.directory))), 3)
+        self.assertEqual(self.total(stale), 3)
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_NETWORKS=['10.0.0.0/8'], METRICS_CLIENT_IP_HEADER='')
+    def test_allowed_networks(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='192.168.0.1').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_NETWORKS=['127.0.0.1/32'],
+                       METRICS_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_address_from_a_trusted_proxy(self):
+        # The proxy on localhost appends the address it saw.
+        forwarded = self.client.get('/metrics', HTTP_X_FORWARDED_FOR='127.0.0.1, 203.0.113.9')
+        self.assertEqual(forwarded.status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret', METRICS_ALLOWED_NETWORKS=['127.0.0.1/32'])
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_scrape_reports_every_process(self):
+        self.other_process(1, 5)
+        with override_settings(METRICS_MULTIPROCESS_DIR=self.directory):
+            response = instrumentation.metrics_view(RequestFactory().get('/metrics'))
+        self.assertIn('test_requests_total{view="home"} 5\n', response.content.decode())
+        self.assertTrue(Path(self.directory, f'{os.getpid()}.json').exists())
+
+
+class SerializationTests(SimpleTestCase):
+    props = {
+        'price': Decimal('12.50'),
+        'at': datetime.datetime(2031, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2031, 1, 2),
+        'id': uuid.UUID(int=1),
+        'name': 'Café',
+    }
+    expected = (
+        '{"price":"12.50","at":"2031-01-02T03:04:05+00:00","day":"2031-01-02",'
+        '"id":"00000000-0000-0000-0000-000000000001","name":"Café"}'
+    )
+
+    def test_backends_agree(self):
+        backends = [serialization.StdlibSerializer()]
+        if serialization.orjson is not None:
+            backends.append(serialization.OrjsonSerializer())
+        for backend in backends:
+            with self.subTest(backend.name):
+                self.assertEqual(backend.dumps(self.props), self.expected)
+                self.assertEqual(backend.dumps_bytes(self.props), self.expected.encode())
+
+    def test_models_fall_back_to_the_inertia_encoder(self):
+        self.assertEqual(serialization.fallback(User(username='organizer'))['username'], 'organizer')
+
+    def test_project(self):
+        props = {
+            'event': {'name': 'Jazz', 'description': 'Long text'},
+            'events': [{'id': 1, 'name': 'One'}, {'id': 2, 'name': 'Two'}],
+            'filters': {'venue': 'Hall'},
+        }
+        self.assertEqual(rendering.project(props, {'event': ('name',), 'events': ('id',)}), {
+            'event': {'name': 'Jazz'}, 'events': [{'id': 1}, {'id': 2}], 'filters': {'venue': 'Hall'},
+        })
+        self.assertIsNone(rendering.project(None, ('name',)))
+
+
+class ViteManifestTests(SimpleTestCase):
+    template = Template('{% load vite_assets %}{% vite_entry component="Home" %}')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'manifest.json')
+        self.write({
+            'src/main.jsx': {'file': 'assets/main-1.js', 'imports': ['_vendor.js'], 'css': ['assets/main-1.css']},
+            '_vendor.js': {'file': 'assets/vendor-1.js', 'css': ['assets/vendor-1.css']},
+            'src/Pages/Home.jsx': {
+                'file': 'assets/Home-1.js', 'imports': ['_vendor.js'], 'css': ['assets/Home-1.css'],
+            },
+        })
+        overrides = override_settings(VITE_MANIFEST_PATH=self.path, VITE_DEV_SERVER_URL='')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def write(self, entries, mtime=None):
+        with open(self.path, 'w') as f:
+            json.dump(entries, f)
+        if mtime:
+            os.utime(self.path, (mtime, mtime))
+
+    def render(self):
+        return [line.strip() for line in self.template.render(Context()).splitlines() if line.strip()]
+
+    def test_entry_and_page_chunk(self):
+        self.assertEqual(self.render(), [
+            '<link rel="stylesheet" href="/static/assets/vendor-1.css">',
+            '<link rel="stylesheet" href="/static/assets/main-1.css">',
+            '<link rel="stylesheet" href="/static/assets/Home-1.css">',
+            '<link rel="modulepreload" crossorigin href="/static/assets/vendor-1.js">',
+            '<link rel="modulepreload" crossorigin href="/static/assets/Home-1.js">',
+            '<script type="module" crossorigin src="/static/assets/main-1.js"></script>',
+        ])
+
+    def test_a_new_build_is_picked_up(self):
+        self.render()
+        version = vite.asset_version()
+        self.write({'src/main.jsx': {'file': 'assets/main-2.js'}}, mtime=os.stat(self.path).st_mtime + 10)
+        self.assertEqual(self.render(), ['<script type="module" crossorigin src="/static/assets/main-2.js"></script>'])
+        self.assertNotEqual(vite.asset_version(), version)
+
+    def test_missing_manifest(self):
+        os.remove(self.path)
+        with self.assertRaises(vite.ManifestNotFound):
+            self.render()
+        self.assertEqual(vite.asset_version(), '')
+
+
+class UploadHandlerTests(SimpleTestCase):
+    def post(self, size):
+        request = RequestFactory().post('/events/create/', {
+            'cover_photo': SimpleUploadedFile('cover.jpg', b'x' * size), 'name': 'After the file',
+        })
+        return request, request.FILES, request.POST
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=50)
+    def test_files_are_hashed_as_they_arrive(self):
+        # In memory, then (for requests over the memory limit) on disk.
+        for memory_size in (2_621_440, 10):
+            with self.subTest(memory_size=memory_size), override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=memory_size):
+                request, files, post = self.post(50)
+                self.assertEqual(files['cover_photo'].sha256, hashlib.sha256(b'x' * 50).hexdigest())
+                self.assertEqual(post['name'], 'After the file')
+                self.assertEqual(oversized_uploads(request), frozenset())
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=50)
+    def test_parsing_stops_at_an_oversized_file(self):
+        for memory_size in (2_621_440, 10):
+            with self.subTest(memory_size=memory_size), override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=memory_size):
+                request, files, post = self.post(51)
+                self.assertNotIn('cover_photo', files)
+                self.assertNotIn('name', post)
+                self.assertEqual(oversized_uploads(request), {'cover_photo'})
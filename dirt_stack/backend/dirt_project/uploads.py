@@ -0,0 +1,58 @@
+"""
+Upload handlers that hash files while they stream in.
+
+Each uploaded file gets a ``sha256`` attribute computed from the chunks as
+they are received, which ContentAddressedStorage uses as the file's name
+without reading it again. Past ``UPLOAD_MAX_FILE_SIZE`` bytes parsing stops
+(StopUpload) rather than reading, hashing and storing the rest of the body.
+The file and any fields after it are then missing from the request; its
+field name is recorded for oversized_uploads() so the view can tell why.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler, StopUpload, TemporaryFileUploadHandler,
+)
+
+
+def oversized_uploads(request):
+    """Names of the file fields whose upload was stopped at UPLOAD_MAX_FILE_SIZE."""
+    return getattr(request, '_oversized_uploads', frozenset())
+
+
+class HashingMixin:
+    def new_file(self, *args, **kwargs):
+        # Set before super(): an active memory handler raises StopFutureHandlers.
+        self.hasher = hashlib.sha256()
+        self.received = 0
+        self.max_size = settings.UPLOAD_MAX_FILE_SIZE
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not getattr(self, 'activated', True):
+            # The memory handler steps aside for large requests; the next
+            # handler counts, hashes and stores the file.
+            return raw_data
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            if self.request is not None:
+                self.request._oversized_uploads = oversized_uploads(self.request) | {self.field_name}
+            raise StopUpload(connection_reset=True)
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingMixin, TemporaryFileUploadHandler):
+    pass
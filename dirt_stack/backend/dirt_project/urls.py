@@ -1,16 +1,37 @@
 """
 URL configuration for DIRT project.
 """
-from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from . import instrumentation, media
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('pages.urls')),
     path('events/', include('events.urls')),
+    path('tickets/', include('tickets.urls')),
+    # Prometheus scrape endpoint, restricted to METRICS_ALLOWED_NETWORKS.
+    path('metrics', instrumentation.metrics_view, name='metrics'),
 ]
 
-# Serve media files (including production for Docker)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
+# Serve media files in every environment (including production for Docker),
+# with ETag/Range support and optional X-Accel-Redirect/X-Sendfile offload.
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media.serve),
+]
+
+# Collected static files for app servers other than runserver (gunicorn/uvicorn).
+# Vite's hashed build assets are cached as immutable.
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), media.serve, {
+        'document_root': settings.STATIC_ROOT,
+        'immutable_pattern': settings.STATIC_IMMUTABLE_PATTERN,
+    }),
+]
@@ -0,0 +1,170 @@
+"""
+Runtime resolution of Vite build assets from ``.vite/manifest.json``.
+
+The manifest is parsed once per process and re-read only when its mtime
+changes, so a new frontend build is picked up without restarting or
+rewriting templates.
+"""
+
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+
+class ManifestNotFound(Exception):
+    pass
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries = {}
+        self._graphs = {}
+
+    def entries(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            raise ManifestNotFound(
+                f'Vite manifest not found at {self.path}. Run `npm run build` in '
+                f'frontend/ or set VITE_DEV_SERVER_URL to use the dev server.'
+            )
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.path) as f:
+                        self._entries = json.load(f)
+                    self._graphs = {}
+                    self._mtime = mtime
+        return self._entries
+
+    def version(self):
+        """Changes whenever a new build is written, for cache validators."""
+        self.entries()
+        return f'{self._mtime:x}'
+
+    def graph(self, name):
+        """
+        ``(file, css, imports)`` for a manifest entry: its own JS file, every
+        stylesheet it needs and every JS chunk in its static import graph,
+        each in dependency order without duplicates.
+        """
+        entries = self.entries()
+        graph = self._graphs.get(name)
+        if graph is not None:
+            return graph
+        if name not in entries:
+            raise KeyError(name)
+
+        css, imports, seen = [], [], set()
+
+        def visit(key):
+            if key in seen:
+                return
+            seen.add(key)
+            chunk = entries[key]
+            for dependency in chunk.get('imports', ()):
+                visit(dependency)
+                dependency_file = entries[dependency]['file']
+                if dependency_file not in imports:
+                    imports.append(dependency_file)
+            for stylesheet in chunk.get('css', ()):
+                if stylesheet not in css:
+                    css.append(stylesheet)
+
+        visit(name)
+        graph = (entries[name]['file'], tuple(css), tuple(imports))
+        self._graphs[name] = graph
+        return graph
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest():
+    global _manifest
+    path = str(settings.VITE_MANIFEST_PATH)
+    with _manifest_lock:
+        if _manifest is None or _manifest.path != path:
+            _manifest = Manifest(path)
+        return _manifest
+
+
+def asset_version():
+    """Identifies the asset tags pages are rendered with (build or dev server)."""
+    if getattr(settings, 'VITE_DEV_SERVER_URL', None):
+        return settings.VITE_DEV_SERVER_URL
+    try:
+        return get_manifest().version()
+    except ManifestNotFound:
+        return ''
+
+
+def dev_server_tags(entry):
+    base = settings.VITE_DEV_SERVER_URL.rstrip('/')
+    # @vitejs/plugin-react needs this preamble when served by the dev server.
+    return format_html(
+        '<script type="module">'
+        'import RefreshRuntime from "{0}/@react-refresh";'
+        'RefreshRuntime.injectIntoGlobalHook(window);'
+        'window.$RefreshReg$ = () => {{}};'
+        'window.$RefreshSig$ = () => (type) => type;'
+        'window.__vite_plugin_react_preamble_installed__ = true;'
+        '</script>\n'
+        '<script type="module" src="{0}/@vite/client"></script>\n'
+        '<script type="module" src="{0}/{1}"></script>',
+        base, entry,
+    )
+
+
+def stylesheet_tags(css):
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(f),) for f in css))
+
+
+def modulepreload_tags(files):
+    return format_html_join(
+        '\n', '<link rel="modulepreload" crossorigin href="{}">', ((static(f),) for f in files)
+    )
+
+
+def page_entry(component):
+    """Manifest key of the lazily loaded chunk for an Inertia component."""
+    pages_dir = getattr(settings, 'VITE_PAGES_DIR', 'src/Pages')
+    return f'{pages_dir}/{component}.jsx'
+
+
+def entry_tags(entry, component=None):
+    """
+    Stylesheets, modulepreload hints and the module script for ``entry``.
+
+    When ``component`` is given, the chunk for that Inertia page (and its
+    own imports and CSS) is preloaded too, so the browser fetches it in
+    parallel with the entry instead of after the app boots.
+    """
+    if getattr(settings, 'VITE_DEV_SERVER_URL', None):
+        return dev_server_tags(entry)
+    manifest = get_manifest()
+    file, css, imports = manifest.graph(entry)
+    css, imports = list(css), list(imports)
+
+    if component:
+        try:
+            page_file, page_css, page_imports = manifest.graph(page_entry(component))
+        except KeyError:
+            page_file, page_css, page_imports = None, (), ()
+        css.extend(f for f in page_css if f not in css)
+        for f in (*page_imports, page_file):
+            if f and f != file and f not in imports:
+                imports.append(f)
+
+    return format_html(
+        '{}\n{}\n<script type="module" crossorigin src="{}"></script>',
+        stylesheet_tags(css), modulepreload_tags(imports), static(file),
+    )
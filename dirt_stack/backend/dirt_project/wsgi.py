@@ -8,4 +8,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dirt_project.settings')
 
+from . import startup  # noqa: E402
+
+startup.before_setup()
 application = get_wsgi_application()
+startup.after_setup()
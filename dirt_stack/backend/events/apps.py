@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'events'
\ No newline at end of file
+    name = 'events'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import restore_triggers_after_migrate
+
+        post_migrate.connect(restore_triggers_after_migrate, sender=self,
+                             dispatch_uid='events.restore_search_triggers')
@@ -0,0 +1,186 @@
+"""
+Cache for serialized event payloads and list pages.
+
+Keys embed version stamps instead of being deleted on change: saving or
+deleting an Event (events.signals) replaces the stamps it affects, so every
+key built from the old stamps is simply never read again and ages out of the
+backend. Stamps are unique tokens, not counters, so a stamp evicted from the
+cache can't come back with an old value and resurrect stale entries. They
+start with the time they were issued, which gives views a Last-Modified.
+
+Recomputation after a miss is single-flight: one caller takes a short lock
+in the cache and fills the entry while the others wait for it, so a popular
+event doesn't send every concurrent request to the database at once.
+"""
+
+import asyncio
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from dirt_project.metrics import counter
+
+
+CACHE_REQUESTS = counter(
+    'events_cache_requests_total',
+    'Event cache lookups by payload kind and result (hit, miss, wait, timeout).',
+    labelnames=('kind', 'result'),
+)
+
+# Bumped by bulk writes that bypass model signals; part of every stamp.
+ALL_VERSION = 'events:version'
+# Bumped by any event change; list pages and related-event lists.
+LIST_VERSION = 'events:version:list'
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+POLL_INTERVAL = 0.01
+
+_missing = object()
+
+
+def get_cache():
+    return caches[getattr(settings, 'EVENT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'EVENT_CACHE_TIMEOUT', 3600)
+
+
+def detail_version(slug):
+    return f'events:version:detail:{slug}'
+
+
+def new_version():
+    # Millisecond timestamp (for Last-Modified) plus a random suffix.
+    return f'{int(time.time() * 1000):x}-{uuid.uuid4().hex[:8]}'
+
+
+def stamp_time(stamp):
+    """Unix time (whole seconds, as HTTP dates are) of the newest version in a stamp."""
+    return max(int(version.split('-', 1)[0], 16) for version in stamp.split('.')) // 1000
+
+
+def join_stamp(names, versions):
+    return '.'.join(versions[name] for name in names)
+
+
+def stamp(*names):
+    """Current versions of ``names`` joined into one token, creating missing ones."""
+    cache = get_cache()
+    versions = cache.get_many(names)
+    for name in names:
+        if name not in versions:
+            cache.add(name, new_version(), None)
+            versions[name] = cache.get(name)
+    return join_stamp(names, versions)
+
+
+async def astamp(*names):
+    cache = get_cache()
+    versions = await cache.aget_many(names)
+    for name in names:
+        if name not in versions:
+            await cache.aadd(name, new_version(), None)
+            versions[name] = await cache.aget(name)
+    return join_stamp(names, versions)
+
+
+def list_stamp():
+    return stamp(ALL_VERSION, LIST_VERSION)
+
+
+async def alist_stamp():
+    return await astamp(ALL_VERSION, LIST_VERSION)
+
+
+def detail_stamp(slug):
+    return stamp(ALL_VERSION, detail_version(slug))
+
+
+async def adetail_stamp(slug):
+    return await astamp(ALL_VERSION, detail_version(slug))
+
+
+def clock_bucket():
+    """
+    Changes every EVENT_CACHE_CLOCK_SECONDS, for keys of payloads that
+    depend on the time as well as the data (e.g. which events are upcoming).
+    """
+    return int(time.time() // getattr(settings, 'EVENT_CACHE_CLOCK_SECONDS', 60))
+
+
+def invalidate_event(*slugs):
+    """Expire the detail payloads for ``slugs`` and every list page."""
+    get_cache().set_many(
+        {name: new_version() for name in (LIST_VERSION, *map(detail_version, slugs))}, None,
+    )
+
+
+def invalidate_all():
+    """Expire everything, e.g. after bulk_create/update() which send no signals."""
+    get_cache().set(ALL_VERSION, new_version(), None)
+
+
+def get_or_compute(kind, key, compute, timeout=None):
+    """
+    Return the cached value for ``key`` or store ``compute()`` there.
+    None is a valid value (e.g. an unknown slug) and is cached too.
+    """
+    cache = get_cache()
+    value = cache.get(key, _missing)
+    if value is not _missing:
+        CACHE_REQUESTS.inc(kind=kind, result='hit')
+        return value
+
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        CACHE_REQUESTS.inc(kind=kind, result='miss')
+        try:
+            value = compute()
+            cache.set(key, value, timeout or get_timeout())
+        finally:
+            cache.delete(lock)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key, _missing)
+        if value is not _missing:
+            CACHE_REQUESTS.inc(kind=kind, result='wait')
+            return value
+    # The lock holder is slow or died; don't keep the request waiting.
+    CACHE_REQUESTS.inc(kind=kind, result='timeout')
+    return compute()
+
+
+async def aget_or_compute(kind, key, compute, timeout=None):
+    """get_or_compute() for an async ``compute``."""
+    cache = get_cache()
+    value = await cache.aget(key, _missing)
+    if value is not _missing:
+        CACHE_REQUESTS.inc(kind=kind, result='hit')
+        return value
+
+    lock = f'{key}:lock'
+    if await cache.aadd(lock, 1, LOCK_TIMEOUT):
+        CACHE_REQUESTS.inc(kind=kind, result='miss')
+        try:
+            value = await compute()
+            await cache.aset(key, value, timeout or get_timeout())
+        finally:
+            await cache.adelete(lock)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        value = await cache.aget(key, _missing)
+        if value is not _missing:
+            CACHE_REQUESTS.inc(kind=kind, result='wait')
+            return value
+    CACHE_REQUESTS.inc(kind=kind, result='timeout')
+    return await compute()
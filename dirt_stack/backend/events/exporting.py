@@ -0,0 +1,147 @@
+"""
+Streaming export of events as CSV or JSON Lines.
+
+Rows are read with ``iterator(chunk_size=...)`` (a server-side cursor on
+PostgreSQL) and only the exported columns are selected, so memory use
+doesn't grow with the table. Output is produced in buffered chunks and can
+be gzip-compressed as it streams. The columns match what import_events
+reads, so an export can be imported elsewhere.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Event
+
+
+# Export column -> model field.
+COLUMNS = {
+    'id': 'id',
+    'slug': 'slug',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'venue': 'venue',
+    'user': 'user__username',
+    'cover_photo': 'cover_photo',
+    'created_at': 'created_at',
+}
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+CHUNK_SIZE = 2000
+# Output is yielded once this many characters are buffered.
+BUFFER_SIZE = 64 * 1024
+GZIP_LEVEL = 6
+
+
+def parse_bound(value):
+    """A date or date-time filter value; dates mean midnight (current time zone)."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'{value!r} is not an ISO 8601 date or date-time.')
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_queryset(start=None, end=None, owner=None):
+    """Events starting in ``[start, end)`` (either bound optional), by owner username."""
+    queryset = Event.objects.all()
+    if start:
+        queryset = queryset.filter(start_date__gte=start)
+    if end:
+        queryset = queryset.filter(start_date__lt=end)
+    if owner:
+        queryset = queryset.filter(user__username=owner)
+    # values() rather than values_list(): on Django 4.2 aiterator() runs a
+    # values_list() query eagerly, outside sync_to_async.
+    return queryset.order_by('id').values(*COLUMNS.values())
+
+
+def plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return str(value)
+
+
+class Encoder:
+    """Turns rows into text, handing back a chunk whenever the buffer is full."""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.buffer = io.StringIO()
+        if fmt == 'csv':
+            self.writer = csv.writer(self.buffer)
+            self.writer.writerow(COLUMNS)
+
+    def add(self, row):
+        row = [plain(row[field]) for field in COLUMNS.values()]
+        if self.fmt == 'csv':
+            self.writer.writerow(row)
+        else:
+            self.buffer.write(json.dumps(dict(zip(COLUMNS, row))))
+            self.buffer.write('\n')
+        if self.buffer.tell() >= BUFFER_SIZE:
+            return self.take()
+        return None
+
+    def take(self):
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text.encode()
+
+
+class Compressor:
+    """Gzip framing around a stream of chunks; identity when disabled."""
+
+    def __init__(self, enabled):
+        # wbits=31 writes a gzip header and trailer around the deflate stream.
+        self.zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if enabled else None
+
+    def compress(self, data):
+        return self.zlib.compress(data) if self.zlib else data
+
+    def flush(self):
+        return self.zlib.flush() if self.zlib else b''
+
+
+def stream_export(queryset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE):
+    """Yield the export of ``queryset`` as bytes."""
+    encoder, compressor = Encoder(fmt), Compressor(compress)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        data = encoder.add(row)
+        if data:
+            data = compressor.compress(data)
+            if data:
+                yield data
+    yield compressor.compress(encoder.take()) + compressor.flush()
+
+
+async def astream_export(queryset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE):
+    """stream_export() for ASGI, reading rows with the async ORM."""
+    encoder, compressor = Encoder(fmt), Compressor(compress)
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        data = encoder.add(row)
+        if data:
+            data = compressor.compress(data)
+            if data:
+                yield data
+    yield compressor.compress(encoder.take()) + compressor.flush()
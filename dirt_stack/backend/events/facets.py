@@ -0,0 +1,163 @@
+"""
+Facet filters for the event list and their precomputed counts.
+
+Counts live in EventFacet, one row per (facet, value), and are adjusted by
+the events they change on every save, delete and bulk write. Reading the
+counts costs one query over the facet rows, however many events exist.
+Counts are over all events; they aren't narrowed by the other selected
+filters.
+"""
+
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+
+from .models import Event, EventFacet
+
+
+# (key, label, lower bound inclusive, upper bound exclusive); None is unbounded.
+PRICE_BANDS = (
+    ('free', 'Free', None, Decimal('0.01')),
+    ('under-25', 'Under $25', Decimal('0.01'), Decimal('25')),
+    ('25-50', '$25 – $50', Decimal('25'), Decimal('50')),
+    ('50-100', '$50 – $100', Decimal('50'), Decimal('100')),
+    ('100-plus', '$100+', Decimal('100'), None),
+)
+PRICE_BAND_KEYS = {key: (low, high) for key, _, low, high in PRICE_BANDS}
+VENUE_FACET_LIMIT = 50
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def price_band(price):
+    price = Decimal(price)
+    for key, _, low, high in PRICE_BANDS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return key
+    raise ValueError(price)
+
+
+def price_filter(queryset, low, high):
+    if low is not None:
+        queryset = queryset.filter(price__gte=low)
+    if high is not None:
+        queryset = queryset.filter(price__lt=high)
+    return queryset
+
+
+def month_key(start_date):
+    return start_date.astimezone(dt_timezone.utc).strftime('%Y-%m')
+
+
+def facet_keys(venue, price, start_date):
+    return [('venue', venue), ('price', price_band(price)), ('month', month_key(start_date))]
+
+
+def apply_deltas(deltas):
+    """Add ``{(facet, value): delta}`` to the stored counts."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        # Make sure every row exists, then adjust them in place with F() so
+        # concurrent writers never overwrite each other's counts.
+        EventFacet.objects.bulk_create(
+            [EventFacet(facet=facet, value=value, count=0) for facet, value in deltas],
+            ignore_conflicts=True,
+        )
+        for (facet, value), delta in deltas.items():
+            EventFacet.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def count_events(events, sign=1):
+    """Deltas for adding (or with ``sign=-1`` removing) Event instances."""
+    deltas = Counter()
+    for event in events:
+        for key in facet_keys(event.venue, event.price, event.start_date):
+            deltas[key] += sign
+    return deltas
+
+
+def rebuild_facets():
+    """Recount every facet from the events table with one GROUP BY per facet."""
+    events = Event.objects.all()
+    counts = Counter()
+    for row in events.values('venue').annotate(n=Count('id')).order_by():
+        counts['venue', row['venue']] = row['n']
+    for key, _, low, high in PRICE_BANDS:
+        counts['price', key] = price_filter(events, low, high).count()
+    months = (events.annotate(month=TruncMonth('start_date', tzinfo=dt_timezone.utc))
+              .values('month').annotate(n=Count('id')).order_by())
+    for row in months:
+        counts['month', row['month'].strftime('%Y-%m')] = row['n']
+
+    with transaction.atomic():
+        EventFacet.objects.all().delete()
+        EventFacet.objects.bulk_create(
+            [EventFacet(facet=facet, value=value, count=n) for (facet, value), n in counts.items() if n]
+        )
+    return len(counts)
+
+
+def load_facets(rows):
+    """Shape ``(facet, value, count)`` rows for the event list's filter bar."""
+    venues, months, bands = [], [], {}
+    for facet, value, count in rows:
+        if facet == 'venue':
+            venues.append({'value': value, 'label': value, 'count': count})
+        elif facet == 'month':
+            label = datetime.strptime(value, '%Y-%m').strftime('%B %Y')
+            months.append({'value': value, 'label': label, 'count': count})
+        elif facet == 'price':
+            bands[value] = count
+    venues.sort(key=lambda item: (-item['count'], item['value']))
+    months.sort(key=lambda item: item['value'])
+    return {
+        'venue': venues[:VENUE_FACET_LIMIT],
+        'price': [
+            {'value': key, 'label': label, 'count': bands[key]}
+            for key, label, _, _ in PRICE_BANDS if bands.get(key)
+        ],
+        'month': months,
+    }
+
+
+async def afacet_counts():
+    rows = EventFacet.objects.filter(count__gt=0).values_list('facet', 'value', 'count')
+    return load_facets([row async for row in rows])
+
+
+def parse_filters(params):
+    """The selected facet filters from a query dict; raises InvalidFilter."""
+    filters = {}
+    if params.get('venue'):
+        filters['venue'] = params['venue']
+    if params.get('price'):
+        if params['price'] not in PRICE_BAND_KEYS:
+            raise InvalidFilter(f'Unknown price band {params["price"]!r}.')
+        filters['price'] = params['price']
+    if params.get('month'):
+        try:
+            datetime.strptime(params['month'], '%Y-%m')
+        except ValueError:
+            raise InvalidFilter('month must look like YYYY-MM.')
+        filters['month'] = params['month']
+    return filters
+
+
+def apply_filters(queryset, filters):
+    if 'venue' in filters:
+        queryset = queryset.filter(venue=filters['venue'])
+    if 'price' in filters:
+        queryset = price_filter(queryset, *PRICE_BAND_KEYS[filters['price']])
+    if 'month' in filters:
+        first = datetime.strptime(filters['month'], '%Y-%m').replace(tzinfo=dt_timezone.utc)
+        after = first.replace(year=first.year + first.month // 12, month=first.month % 12 + 1)
+        queryset = queryset.filter(start_date__gte=first, start_date__lt=after)
+    return queryset
@@ -1,13 +1,45 @@
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
 from django.utils import timezone
 from .models import Event
 
 
+# The rules are plain functions so bulk imports (events.importing) apply
+# exactly the same checks as the form.
+
+def validate_price(price):
+    if price is not None and price < 0:
+        raise ValidationError("Price cannot be negative.")
+
+
+def validate_event_dates(start_date, end_date, now=None, allow_past=False):
+    if start_date >= end_date:
+        raise ValidationError("End date must be after start date.")
+
+    if not allow_past and start_date < (now or timezone.now()):
+        raise ValidationError("Start date cannot be in the past.")
+
+
+def cover_size_error():
+    return f"Cover photo must be at most {filesizeformat(settings.UPLOAD_MAX_FILE_SIZE)}."
+
+
+class CoverPhotoField(forms.ImageField):
+    def to_python(self, data):
+        # Checked before the image is parsed. Uploads through the hashing
+        # handlers never get here oversized (see dirt_project.uploads).
+        if data and data.size > settings.UPLOAD_MAX_FILE_SIZE:
+            raise ValidationError(cover_size_error())
+        return super().to_python(data)
+
+
 class EventForm(forms.ModelForm):
     class Meta:
         model = Event
-        fields = ['name', 'description', 'cover_photo', 'price', 'start_date', 'end_date', 'venue']
+        fields = ['name', 'description', 'cover_photo', 'price', 'start_date', 'end_date', 'venue', 'capacity']
+        field_classes = {'cover_photo': CoverPhotoField}
         widgets = {
             'start_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
@@ -16,8 +48,7 @@ class EventForm(forms.ModelForm):
 
     def clean_price(self):
         price = self.cleaned_data.get('price')
-        if price is not None and price < 0:
-            raise ValidationError("Price cannot be negative.")
+        validate_price(price)
         return price
 
     def clean(self):
@@ -26,10 +57,6 @@ class EventForm(forms.ModelForm):
         end_date = cleaned_data.get('end_date')
 
         if start_date and end_date:
-            if start_date >= end_date:
-                raise ValidationError("End date must be after start date.")
-            
-            if start_date < timezone.now():
-                raise ValidationError("Start date cannot be in the past.")
+            validate_event_dates(start_date, end_date)
 
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
@@ -0,0 +1,102 @@
+"""
+iCalendar (RFC 5545) feed of events, generated while streaming.
+
+Events are read in chunks and written out as VEVENTs in buffered blocks,
+so a feed over a large window never exists in memory as a whole.
+"""
+
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+
+from .exporting import BUFFER_SIZE, CHUNK_SIZE
+
+
+ICAL_FIELDS = ('slug', 'name', 'description', 'venue', 'start_date', 'end_date', 'created_at')
+PRODID = '-//Maticko//Events//EN'
+# Content lines are folded at 75 octets (RFC 5545 section 3.1).
+FOLD_AT = 75
+
+
+def escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def ical_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    data = line.encode()
+    if len(data) <= FOLD_AT:
+        return line + '\r\n'
+    parts, start, limit = [], 0, FOLD_AT
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Never split a UTF-8 sequence: back up to a character boundary.
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, FOLD_AT - 1
+    return '\r\n '.join(parts) + '\r\n'
+
+
+class Calendar:
+    """Buffers VEVENTs and hands back encoded blocks of about BUFFER_SIZE."""
+
+    def __init__(self, name, url_for, host):
+        self.url_for = url_for
+        self.host = host
+        self.stamp = ical_datetime(timezone.now())
+        self.parts = [
+            'BEGIN:VCALENDAR\r\n', 'VERSION:2.0\r\n', f'PRODID:{PRODID}\r\n',
+            'CALSCALE:GREGORIAN\r\n', fold(f'X-WR-CALNAME:{escape(name)}'),
+        ]
+        self.size = 0
+
+    def add(self, row):
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{row["slug"]}@{self.host}',
+            f'DTSTAMP:{self.stamp}',
+            f'CREATED:{ical_datetime(row["created_at"])}',
+            f'DTSTART:{ical_datetime(row["start_date"])}',
+            f'DTEND:{ical_datetime(row["end_date"])}',
+            f'SUMMARY:{escape(row["name"])}',
+            f'LOCATION:{escape(row["venue"])}',
+            f'DESCRIPTION:{escape(row["description"])}',
+            f'URL:{self.url_for(row["slug"])}',
+            'END:VEVENT',
+        ]
+        text = ''.join(fold(line) for line in lines)
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= BUFFER_SIZE:
+            return self.take()
+        return None
+
+    def take(self):
+        data = ''.join(self.parts).encode()
+        self.parts, self.size = [], 0
+        return data
+
+    def close(self):
+        self.parts.append('END:VCALENDAR\r\n')
+        return self.take()
+
+
+def stream_calendar(queryset, calendar, chunk_size=CHUNK_SIZE):
+    for row in queryset.values(*ICAL_FIELDS).iterator(chunk_size=chunk_size):
+        data = calendar.add(row)
+        if data:
+            yield data
+    yield calendar.close()
+
+
+async def astream_calendar(queryset, calendar, chunk_size=CHUNK_SIZE):
+    async for row in queryset.values(*ICAL_FIELDS).aiterator(chunk_size=chunk_size):
+        data = calendar.add(row)
+        if data:
+            yield data
+    yield calendar.close()
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from jobs.queue import drain, enqueue
+
+from .cache import invalidate_event
+from .models import Event, cover_storage
+
+logger = logging.getLogger(__name__)
+
+# Target widths for the responsive cover images, smallest first.
+VARIANT_WIDTHS = {
+    'thumb': 320,
+    'card': 640,
+    'hero': 1600,
+}
+VARIANT_DIR = 'events/covers/variants'
+QUALITY = {'webp': 80, 'avif': 55}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def output_formats():
+    """WebP always; AVIF only when this Pillow build can encode it."""
+    from PIL import Image
+
+    Image.init()
+    formats = ['webp']
+    if 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    return formats
+
+
+def variant_name(name, width, fmt):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'{VARIANT_DIR}/{stem}-{width}w.{fmt}'
+
+
+def generate_variants(name, storage=None):
+    """
+    Render every size/format derivative for the stored image ``name``.
+
+    Widths larger than the original are clamped so nothing is upscaled.
+    Variants already stored for this original are reused as they are.
+    Returns ``{fmt: [[width, stored_name], ...]}`` ready to be saved on
+    ``Event.cover_variants``.
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or cover_storage()
+    # Variant names come from the original's digest, not from their bytes.
+    save = getattr(storage, 'save_derived', storage.save)
+    with storage.open(name, 'rb') as f:
+        with Image.open(f) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+            widths = sorted({min(w, original.width) for w in VARIANT_WIDTHS.values()})
+
+            variants = {}
+            for fmt in output_formats():
+                entries = []
+                for width in widths:
+                    target = variant_name(name, width, fmt)
+                    # Same original, same variant: other events may already
+                    # point at it, so it is reused and never replaced.
+                    if storage.exists(target):
+                        entries.append([width, target])
+                        continue
+                    height = max(1, round(original.height * width / original.width))
+                    resized = original.resize((width, height), Image.Resampling.LANCZOS)
+                    buffer = BytesIO()
+                    resized.save(buffer, fmt.upper(), quality=QUALITY[fmt])
+                    entries.append([width, save(target, ContentFile(buffer.getvalue()))])
+                variants[fmt] = entries
+    return variants
+
+
+def process_event_cover(event_id):
+    """Generate and record the variants for one event's current cover."""
+    row = Event.objects.filter(pk=event_id).values_list('cover_photo', 'slug').first()
+    if not row or not row[0]:
+        return None
+    name, slug = row
+    variants = generate_variants(name)
+    # Only record the result if the cover wasn't replaced in the meantime.
+    if Event.objects.filter(pk=event_id, cover_photo=name).update(cover_variants=variants):
+        invalidate_event(slug)
+    return variants
+
+
+def _run_in_background(event_id):
+    try:
+        process_event_cover(event_id)
+    except Exception:
+        logger.exception('Cover variant generation failed for event %s', event_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EVENT_COVER_VARIANT_WORKERS', 2),
+                thread_name_prefix='cover-variants',
+            )
+    return _executor
+
+
+def wait_for_cover_variants():
+    """
+    Block until scheduled variant work has finished, e.g. before a command
+    exits: queued jobs are run here when JOBS_ENABLED.
+    """
+    global _executor
+    if settings.JOBS_ENABLED:
+        drain(['events.cover_variants'])
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def schedule_cover_variants(event_id):
+    """
+    Queue variant generation off the request thread: as a job when
+    JOBS_ENABLED, otherwise on this process's thread pool.
+    """
+    if settings.JOBS_ENABLED:
+        return enqueue('events.cover_variants', {'event_id': event_id})
+    return get_executor().submit(_run_in_background, event_id)
@@ -0,0 +1,140 @@
+"""
+Streaming bulk import of events from CSV or JSON Lines.
+
+Rows are read one at a time (plain or gzip-compressed), validated with the
+same rules as EventForm, and handed to the import_events command in
+batches. Cover images referenced by local path are copied into storage and
+their variants rendered in worker processes.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from decimal import Decimal, InvalidOperation
+
+import django
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .forms import validate_event_dates, validate_price
+from .images import generate_variants
+from .models import Event, cover_storage
+
+
+REQUIRED = ('name', 'description', 'price', 'start_date', 'end_date', 'venue')
+MAX_LENGTHS = {
+    name: Event._meta.get_field(name).max_length for name in ('name', 'venue')
+}
+COVER_UPLOAD_TO = Event._meta.get_field('cover_photo').upload_to
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    raise ValueError(f'Cannot tell the format of {path!r}; pass --format csv or jsonl.')
+
+
+def open_text(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_rows(stream, fmt):
+    """Yield ``(record_number, row)`` pairs; a malformed JSON line yields a RowError."""
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+        return
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            yield number, RowError('Empty line.')
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, RowError(f'Invalid JSON: {exc}')
+            continue
+        yield number, row if isinstance(row, dict) else RowError('Expected a JSON object.')
+
+
+def parse_datetime_value(value, field):
+    if not isinstance(value, str):
+        raise RowError(f'{field}: expected an ISO 8601 date-time.')
+    parsed = parse_datetime(value.strip())
+    if parsed is None:
+        raise RowError(f'{field}: {value!r} is not an ISO 8601 date-time.')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def clean_row(row, now=None, allow_past=False):
+    """Validate one raw row; returns a dict of typed values or raises RowError."""
+    missing = [field for field in REQUIRED if row.get(field) in (None, '')]
+    if missing:
+        raise RowError(f'Missing {", ".join(missing)}.')
+
+    cleaned = {field: str(row[field]).strip() for field in ('name', 'description', 'venue')}
+    for field, limit in MAX_LENGTHS.items():
+        if len(cleaned[field]) > limit:
+            raise RowError(f'{field}: longer than {limit} characters.')
+
+    try:
+        price = Decimal(str(row['price']).strip())
+    except InvalidOperation:
+        raise RowError(f'price: {row["price"]!r} is not a number.')
+    if not price.is_finite() or price.as_tuple().exponent < -2 or abs(price) >= 10 ** 8:
+        raise RowError(f'price: {row["price"]!r} needs at most 8 digits and 2 decimal places.')
+    start_date = parse_datetime_value(row['start_date'], 'start_date')
+    end_date = parse_datetime_value(row['end_date'], 'end_date')
+
+    try:
+        validate_price(price)
+        validate_event_dates(start_date, end_date, now=now, allow_past=allow_past)
+    except ValidationError as exc:
+        raise RowError(' '.join(exc.messages))
+
+    cleaned.update(
+        price=price,
+        start_date=start_date,
+        end_date=end_date,
+        user=str(row.get('user') or '').strip(),
+        cover_photo=str(row.get('cover_photo') or '').strip(),
+    )
+    return cleaned
+
+
+def init_worker():
+    # Needed when the platform spawns rather than forks worker processes.
+    django.setup()
+
+
+def ingest_cover(path, variants=True):
+    """
+    Copy a local cover image into storage and render its variants.
+    Runs in a worker process; returns ``(path, stored_name, variants, error)``.
+    """
+    try:
+        with open(path, 'rb') as f:
+            name = cover_storage().save(
+                os.path.join(COVER_UPLOAD_TO, os.path.basename(path)), File(f),
+            )
+        return path, name, generate_variants(name) if variants else {}, None
+    except Exception as exc:
+        return path, None, None, f'{type(exc).__name__}: {exc}'
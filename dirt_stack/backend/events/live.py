@@ -0,0 +1,290 @@
+"""
+Live feed of event changes over Server-Sent Events.
+
+Saving or deleting an Event writes one EventChange row holding the
+serialized event (events.signals), so a change is serialized once however
+many clients are listening. Each process runs one Broker: a single task
+reads new rows, encodes each as an SSE frame once, keeps the latest in a
+ring buffer for reconnecting clients and hands the frames to every
+subscriber's queue. Changes saved in this process wake the broker at once;
+changes from other processes are picked up every LIVE_POLL_SECONDS.
+
+Clients resume with Last-Event-ID: missed frames come from the ring buffer,
+or from the database when they are older than it. A client too far behind
+gets a ``reset`` event and should reload.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from dirt_project import serialization
+
+from .models import Event, EventChange
+from .serializers import serialize_event
+
+logger = logging.getLogger(__name__)
+
+POLL_BATCH = 500
+# pg_advisory_xact_lock key serialising EventChange inserts (see lock_change_log).
+CHANGE_LOG_LOCK = 0x6576656e7473
+PRUNE_INTERVAL = 600
+HEARTBEAT = b': ping\n\n'
+
+
+class BrokerFull(Exception):
+    pass
+
+
+def encode_frame(change_id, kind, payload):
+    # JSON escapes newlines, so the payload is always one data line.
+    data = serialization.dumps(payload)
+    return f'id: {change_id}\nevent: {kind}\ndata: {data}\n\n'.encode()
+
+
+def control_frame(kind, change_id=None):
+    head = f'id: {change_id}\n' if change_id is not None else ''
+    return f'{head}event: {kind}\ndata: {{}}\n\n'.encode()
+
+
+def retry_frame():
+    return f'retry: {settings.LIVE_RETRY_MS}\n\n'.encode()
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def record_change(event_id, kind):
+    """Write the change row for a saved or deleted event and wake this process's broker."""
+    if kind == EventChange.DELETED:
+        payload = {'id': event_id}
+    else:
+        row = Event.objects.for_listing().filter(pk=event_id).first()
+        if row is None:
+            return
+        payload = serialize_event(row)
+    with transaction.atomic():
+        lock_change_log()
+        EventChange.objects.create(kind=kind, event_id=event_id, payload=payload)
+    broker.notify()
+
+
+def lock_change_log():
+    """
+    Make change ids become visible in id order. Readers take the changes
+    after the last id they saw, so a change that commits after one with a
+    higher id would be skipped for good. On PostgreSQL ids are drawn from
+    the sequence before commit, so concurrent inserts are serialised with
+    a transaction-level advisory lock, taken before the id is drawn. SQLite
+    already allows one writer at a time.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CHANGE_LOG_LOCK])
+
+
+def changes_after(after, limit):
+    return EventChange.objects.filter(id__gt=after).order_by('id').values_list('id', 'kind', 'payload')[:limit]
+
+
+def oldest_and_latest():
+    return EventChange.objects.aggregate(oldest=Min('id'), latest=Max('id'))
+
+
+def replayed(rows, oldest, after, limit):
+    """
+    ``(frames, complete)`` from up to ``limit + 1`` rows after ``after``.
+    Changes that were pruned, or a backlog beyond the limit, can't be
+    replayed in full.
+    """
+    complete = len(rows) <= limit and (oldest is None or oldest <= after + 1)
+    return [(pk, encode_frame(pk, kind, payload)) for pk, kind, payload in rows[:limit]], complete
+
+
+def replay_rows(after, limit):
+    rows = list(changes_after(after, limit + 1))
+    return replayed(rows, oldest_and_latest()['oldest'], after, limit)
+
+
+async def areplay_rows(after, limit):
+    rows = [row async for row in changes_after(after, limit + 1)]
+    return replayed(rows, (await oldest_and_latest_async())['oldest'], after, limit)
+
+
+def latest_change_id():
+    return oldest_and_latest()['latest'] or 0
+
+
+async def oldest_and_latest_async():
+    return await EventChange.objects.aaggregate(oldest=Min('id'), latest=Max('id'))
+
+
+async def alatest_change_id():
+    return (await oldest_and_latest_async())['latest'] or 0
+
+
+class Subscription:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_CLIENT_QUEUE)
+        self.overflowed = False
+
+
+class Broker:
+    def __init__(self):
+        self.subscribers = set()
+        self.buffer = deque(maxlen=settings.LIVE_BUFFER_SIZE)
+        # Every change after ``floor`` up to ``last_id`` is in the buffer.
+        self.floor = self.last_id = None
+        self.loop = self.wake = self.task = None
+        self.next_prune = 0
+
+    def subscribe(self):
+        if len(self.subscribers) >= settings.LIVE_MAX_CONNECTIONS:
+            raise BrokerFull
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop or self.task is None:
+            self.loop, self.wake = loop, asyncio.Event()
+            self.task = loop.create_task(self.run())
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def notify(self):
+        """Wake the broker from any thread, e.g. after a save in a sync view."""
+        loop, wake = self.loop, self.wake
+        if loop is not None and self.task is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # the loop has closed
+
+    async def run(self):
+        try:
+            # The buffer can't be trusted across an idle gap; start afresh.
+            self.buffer.clear()
+            self.floor = self.last_id = await alatest_change_id()
+            while self.subscribers:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), settings.LIVE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+                try:
+                    await self.poll()
+                except Exception:
+                    logger.exception('Reading event changes failed')
+        finally:
+            self.task = None
+
+    async def poll(self):
+        rows = [row async for row in changes_after(self.last_id, POLL_BATCH)]
+        for pk, kind, payload in rows:
+            self.publish(pk, encode_frame(pk, kind, payload))
+        if len(rows) == POLL_BATCH:
+            self.wake.set()
+        now = self.loop.time()
+        if now >= self.next_prune:
+            self.next_prune = now + PRUNE_INTERVAL
+            cutoff = timezone.now() - timedelta(hours=settings.LIVE_RETENTION_HOURS)
+            await EventChange.objects.filter(created_at__lt=cutoff).adelete()
+
+    def publish(self, change_id, frame):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.floor = self.buffer[0][0]
+        self.buffer.append((change_id, frame))
+        self.last_id = change_id
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait((change_id, frame))
+            except asyncio.QueueFull:
+                # Too slow to keep up: end its stream so it resumes by id.
+                subscription.overflowed = True
+                self.subscribers.discard(subscription)
+
+    async def replay(self, after):
+        """``(frames, complete)`` for the changes after id ``after``."""
+        if self.floor is not None and after >= self.floor:
+            return [(pk, frame) for pk, frame in self.buffer if pk > after], True
+        return await areplay_rows(after, settings.LIVE_REPLAY_LIMIT)
+
+
+broker = Broker()
+
+
+async def stream(subscription, after, disconnected=None):
+    """
+    The SSE byte stream for one subscriber, resuming after change id
+    ``after``; it ends early when the ``disconnected`` Event is set.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_MAX_SECONDS
+    gone = asyncio.ensure_future(disconnected.wait()) if disconnected is not None else None
+    try:
+        yield retry_frame()
+        if after is None:
+            # A fresh client starts from now; the id lets it resume later.
+            after = await alatest_change_id()
+            yield control_frame('ready', after)
+        frames, complete = await broker.replay(after)
+        if not complete:
+            yield control_frame('reset')
+        for change_id, frame in frames:
+            yield frame
+            after = change_id
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or (subscription.overflowed and subscription.queue.empty()):
+                return
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, gone} - {None},
+                timeout=min(settings.LIVE_HEARTBEAT_SECONDS, remaining),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter not in done:
+                getter.cancel()
+            if gone in done:
+                return
+            if getter not in done:
+                yield HEARTBEAT
+                continue
+            change_id, frame = getter.result()
+            # Replayed frames can also arrive through the queue.
+            if change_id > after:
+                yield frame
+                after = change_id
+    finally:
+        if gone is not None:
+            gone.cancel()
+        broker.unsubscribe(subscription)
+
+
+def stream_once(after):
+    """
+    For servers without an event loop (WSGI): send what changed since
+    ``after`` and end; the browser reconnects after LIVE_RETRY_MS.
+    """
+    yield retry_frame()
+    if after is None:
+        yield control_frame('ready', latest_change_id())
+        return
+    frames, complete = replay_rows(after, settings.LIVE_REPLAY_LIMIT)
+    if not complete:
+        yield control_frame('reset')
+    for _, frame in frames:
+        yield frame
+    if not frames:
+        yield HEARTBEAT
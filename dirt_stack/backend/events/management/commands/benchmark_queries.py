@@ -0,0 +1,117 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from events.models import Event
+from events.pagination import encode_cursor, keyset_queryset
+from events.seeding import SEED_SLUG_PREFIX, seed_events
+
+
+# Plan fragments that mean the database is reading the whole table.
+FULL_SCAN_MARKERS = ('Seq Scan on "events_event"', 'Seq Scan on events_event')
+
+
+def is_full_scan(plan):
+    if any(marker in plan for marker in FULL_SCAN_MARKERS):
+        return True
+    # SQLite reports "SCAN events_event" for table scans and
+    # "SCAN events_event USING [COVERING] INDEX ..." for index walks.
+    return any(
+        line.strip().endswith('SCAN events_event')
+        for line in plan.splitlines()
+    )
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic events, EXPLAIN the event view queries and record their timings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help='Number of seeded events to ensure exist (100k-1M).')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed executions per query.')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Benchmark the rows already in the database.')
+        parser.add_argument('--output', help='Write the JSON report to this path.')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit non-zero if any query plan scans the whole events table.')
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            started = time.perf_counter()
+            created = seed_events(options['rows'], batch_size=options['batch_size'])
+            self.stdout.write(
+                f'Seeded {created} events in {time.perf_counter() - started:.1f}s'
+            )
+
+        total_rows = Event.objects.filter(slug__startswith=SEED_SLUG_PREFIX).count()
+        if not total_rows:
+            raise CommandError('No seeded events to benchmark; run without --no-seed.')
+
+        results = []
+        for name, queryset in self.queries(total_rows):
+            plan = queryset.explain()
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results.append({
+                'query': name,
+                'full_scan': is_full_scan(plan),
+                'min_ms': round(min(timings), 3),
+                'median_ms': round(statistics.median(timings), 3),
+                'max_ms': round(max(timings), 3),
+                'plan': plan,
+            })
+            self.stdout.write(
+                f'{name:<28} median {results[-1]["median_ms"]:>9.3f} ms'
+                f'{"  FULL SCAN" if results[-1]["full_scan"] else ""}'
+            )
+
+        report = {
+            'vendor': connection.vendor,
+            'rows': total_rows,
+            'repeat': options['repeat'],
+            'queries': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}')
+
+        scans = [r['query'] for r in results if r['full_scan']]
+        if scans and options['fail_on_scan']:
+            raise CommandError(f'Full table scans in: {", ".join(scans)}')
+
+    def queries(self, total_rows):
+        """The queries issued by the event views and the filters they index for."""
+        now = timezone.now()
+        sample = (
+            Event.objects.filter(slug__startswith=SEED_SLUG_PREFIX)
+            .order_by('start_date', 'id')
+            .values('id', 'slug', 'start_date', 'venue', 'user_id')
+            [total_rows * 9 // 10]
+        )
+        listing = Event.objects.for_listing()
+        deep_cursor = encode_cursor(sample['start_date'], sample['id'])
+
+        return [
+            ('event_list:first_page', keyset_queryset(listing)),
+            ('event_list:deep_page', keyset_queryset(listing, after=deep_cursor)),
+            # As load_event() runs it: first() orders by pk and takes one row.
+            ('event_detail', Event.objects.for_detail().filter(slug=sample['slug']).order_by('pk')[:1]),
+            ('upcoming', listing.filter(end_date__gte=now).order_by('end_date', 'start_date')[:25]),
+            ('by_venue', listing.filter(venue=sample['venue']).order_by('start_date')[:25]),
+            ('by_owner', listing.filter(user_id=sample['user_id']).order_by('-created_at')[:25]),
+            ('by_price_range', listing.filter(price__gte=20, price__lte=80).order_by('price', 'start_date')[:25]),
+            ('free', keyset_queryset(listing.filter(price=0))),
+            ('happening_now', listing.filter(end_date__gte=now, start_date__lte=now).order_by('end_date')[:25]),
+            ('next_week', listing.filter(start_date__gte=now, start_date__lt=now + timedelta(days=7)).order_by('start_date', 'id')[:25]),
+        ]
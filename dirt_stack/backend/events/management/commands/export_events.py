@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.exporting import CHUNK_SIZE, FORMATS, export_queryset, parse_bound, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream events to a CSV or JSON Lines file (or stdout) in constant memory. '
+        'The output can be read back with import_events.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-',
+                            help='Output path, or - for stdout. A .gz suffix implies --gzip.')
+        parser.add_argument('--format', choices=tuple(FORMATS),
+                            help='Default: from the output suffix, else csv.')
+        parser.add_argument('--start', help='Only events starting at or after this date/date-time.')
+        parser.add_argument('--end', help='Only events starting before this date/date-time.')
+        parser.add_argument('--owner', help='Only events owned by this username.')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        fmt = options['format'] or ('jsonl' if output.removesuffix('.gz').endswith('.jsonl') else 'csv')
+        try:
+            start, end = parse_bound(options['start']), parse_bound(options['end'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        queryset = export_queryset(start, end, options['owner'])
+        started, written = time.perf_counter(), 0
+        target = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for data in stream_export(queryset, fmt, compress, options['chunk_size']):
+                target.write(data)
+                written += len(data)
+        finally:
+            if output == '-':
+                target.flush()
+            else:
+                target.close()
+
+        if output != '-':
+            self.stdout.write(
+                f'Wrote {written / 1e6:.1f} MB to {output} in {time.perf_counter() - started:.1f}s'
+            )
@@ -0,0 +1,215 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from events.cache import invalidate_all
+from events.facets import apply_deltas, count_events
+from events.importing import (
+    RowError, clean_row, detect_format, ingest_cover, init_worker, open_text, read_rows,
+)
+from events.models import Event, EventImport
+from events.slugs import SlugAllocator
+from events.timeline import sync_event_days
+
+
+# Covers reused by many rows are only ingested once per run. The cache may
+# hold more while a batch that needs more covers is being built.
+COVER_CACHE_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream events from a CSV or JSON Lines file (optionally .gz, or - for stdin) '
+        'into the database in batches. Rows follow the EventForm rules. Progress is '
+        'committed with each batch, so an interrupted import resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin (no resume).')
+        parser.add_argument('--format', choices=('csv', 'jsonl'),
+                            help='Input format; guessed from the file extension by default.')
+        parser.add_argument('--owner', help='Username for rows without a "user" column.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--images-dir', default='.',
+                            help='Directory that relative cover_photo paths are resolved against.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes copying cover images and rendering their variants.')
+        parser.add_argument('--no-variants', action='store_true',
+                            help='Only copy covers; run regenerate_cover_variants --missing-only later.')
+        parser.add_argument('--allow-past', action='store_true',
+                            help='Accept events that already started (historical data).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore a previous checkpoint for this file and start over.')
+        parser.add_argument('--errors', help='Write rejected rows to this JSON Lines file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or detect_format(path)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.options = options
+        self.owner = None
+        if options['owner']:
+            self.owner = User.objects.filter(username=options['owner']).values_list('id', flat=True).first()
+            if self.owner is None:
+                raise CommandError(f'No user named {options["owner"]!r}.')
+        self.users = {}
+        self.covers = OrderedDict()
+        self.slugs = SlugAllocator()
+        self.now = timezone.now()
+
+        self.checkpoint = self.load_checkpoint(path)
+        skip = self.checkpoint.rows_done if self.checkpoint else 0
+        if skip:
+            self.stdout.write(f'Resuming after record {skip}.')
+
+        started = time.perf_counter()
+        self.created = self.failed = self.failed_recorded = 0
+        self.pool = None
+        errors = open(options['errors'], 'a') if options['errors'] else nullcontext()
+        try:
+            with errors as self.errors_file, open_text(path) as stream:
+                batch, number = [], skip
+                for number, row in read_rows(stream, fmt):
+                    if number <= skip:
+                        continue
+                    try:
+                        if isinstance(row, RowError):
+                            raise row
+                        batch.append((number, clean_row(row, self.now, options['allow_past'])))
+                    except RowError as exc:
+                        self.reject(number, row, str(exc))
+                    if len(batch) >= options['batch_size']:
+                        self.flush(batch, number)
+                        batch = []
+                self.flush(batch, number, finished=True)
+        finally:
+            if self.pool:
+                self.pool.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Imported {self.created} events ({self.failed} rejected) in {elapsed:.1f}s '
+            f'({self.created / elapsed if elapsed else 0:.0f} rows/s)'
+        )
+
+    def load_checkpoint(self, path):
+        if path == '-':
+            return None
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        fingerprint = f'{stat.st_size}:{stat.st_mtime_ns}'
+        checkpoint, created = EventImport.objects.get_or_create(
+            source=source, defaults={'fingerprint': fingerprint},
+        )
+        if created or self.options['restart']:
+            checkpoint.fingerprint = fingerprint
+            checkpoint.rows_done = checkpoint.created = checkpoint.failed = 0
+            checkpoint.finished = False
+            checkpoint.save()
+        elif checkpoint.fingerprint != fingerprint:
+            raise CommandError(
+                f'{path} changed since it was partly imported ({checkpoint.rows_done} records); '
+                f'pass --restart to import it from the beginning.'
+            )
+        elif checkpoint.finished:
+            raise CommandError(f'{path} was already imported; pass --restart to import it again.')
+        return checkpoint
+
+    def reject(self, number, row, message):
+        self.failed += 1
+        self.stderr.write(f'Record {number}: {message}')
+        if self.errors_file:
+            self.errors_file.write(json.dumps({
+                'record': number, 'error': message, 'row': row if isinstance(row, dict) else None,
+            }, default=str) + '\n')
+
+    def resolve_users(self, batch):
+        names = {row['user'] for _, row in batch if row['user'] and row['user'] not in self.users}
+        if names:
+            self.users.update(User.objects.filter(username__in=names).values_list('username', 'id'))
+
+    def resolve_covers(self, batch):
+        """Ingest every cover this batch needs that isn't already known, in parallel."""
+        paths = set()
+        for _, row in batch:
+            if row['cover_photo']:
+                row['cover_photo'] = os.path.join(self.options['images_dir'], row['cover_photo'])
+                if row['cover_photo'] in self.covers:
+                    self.covers.move_to_end(row['cover_photo'])
+                else:
+                    paths.add(row['cover_photo'])
+        if not paths:
+            return
+        if self.pool is None:
+            # Started on first use, so imports without covers stay single-process.
+            self.pool = ProcessPoolExecutor(max_workers=self.options['workers'], initializer=init_worker)
+        variants = not self.options['no_variants']
+        results = self.pool.map(ingest_cover, paths, [variants] * len(paths), chunksize=4)
+        for path, name, rendered, error in results:
+            self.covers[path] = (name, rendered, error)
+
+    def build(self, batch):
+        self.resolve_users(batch)
+        self.resolve_covers(batch)
+        rows = []
+        for number, row in batch:
+            user_id = self.users.get(row['user']) if row['user'] else self.owner
+            if user_id is None:
+                message = f'Unknown user {row["user"]!r}.' if row['user'] else 'No user; pass --owner.'
+                self.reject(number, row, message)
+                continue
+            cover, variants = '', {}
+            if row['cover_photo']:
+                cover, variants, error = self.covers[row['cover_photo']]
+                if error:
+                    self.reject(number, row, f'cover_photo: {error}')
+                    continue
+            rows.append((row, user_id, cover, variants))
+        # Only now: the rows above may need more covers than the cache holds.
+        while len(self.covers) > COVER_CACHE_SIZE:
+            self.covers.popitem(last=False)
+
+        slugs = self.slugs.allocate([row['name'] for row, *_ in rows])
+        return [
+            Event(
+                user_id=user_id, name=row['name'], slug=slug, description=row['description'],
+                cover_photo=cover, cover_variants=variants, price=row['price'],
+                start_date=row['start_date'], end_date=row['end_date'], venue=row['venue'],
+                created_at=self.now,
+            )
+            for (row, user_id, cover, variants), slug in zip(rows, slugs)
+        ]
+
+    def flush(self, batch, upto, finished=False):
+        events = self.build(batch)
+        # The checkpoint is committed with the rows, so a crash can never
+        # leave a batch inserted but not recorded (or the reverse).
+        with transaction.atomic():
+            Event.objects.bulk_create(events)
+            sync_event_days(events, replace=False)
+            apply_deltas(count_events(events))
+            if self.checkpoint:
+                self.checkpoint.rows_done = upto
+                self.checkpoint.created += len(events)
+                self.checkpoint.failed += self.failed - self.failed_recorded
+                self.checkpoint.finished = finished
+                self.checkpoint.save()
+        self.slugs.release()
+        self.created += len(events)
+        self.failed_recorded = self.failed
+        if events:
+            # bulk_create sends no post_save, so expire cached pages explicitly.
+            invalidate_all()
+        if batch or finished:
+            self.stdout.write(f'Records up to {upto}: {self.created} imported, {self.failed} rejected')
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.timeline import rebuild_event_days
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-day EventDay buckets behind the time-window queries, '
+        'e.g. after writing events with raw SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild_event_days(options['batch_size'])
+        self.stdout.write(f'Bucketed {total} events in {time.perf_counter() - started:.2f}s')
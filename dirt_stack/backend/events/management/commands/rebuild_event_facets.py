@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.cache import invalidate_all
+from events.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the venue, price band and month facet counts from the events table, '
+        'e.g. after writing events with raw SQL.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild_facets()
+        invalidate_all()
+        self.stdout.write(f'Recounted {total} facet values in {time.perf_counter() - started:.2f}s')
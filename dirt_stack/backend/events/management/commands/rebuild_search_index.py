@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the events full-text search index from the events table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-optimize', action='store_true',
+                            help='Skip merging index segments after the rebuild.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not rebuild_index(optimize=not options['no_optimize']):
+            raise CommandError('Full-text search index is only available on SQLite.')
+        self.stdout.write(f'Search index rebuilt in {time.perf_counter() - started:.2f}s')
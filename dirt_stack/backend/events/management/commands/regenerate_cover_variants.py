@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+
+from events.cache import invalidate_all
+from events.images import generate_variants
+from events.models import Event
+
+
+def _init_worker():
+    # Needed when the platform spawns rather than forks worker processes.
+    django.setup()
+
+
+def _render(pk, name):
+    try:
+        return pk, name, generate_variants(name), None
+    except Exception as exc:
+        return pk, name, None, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = 'Regenerate resized WebP/AVIF cover variants for events using a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Skip events that already have variants.')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Rows written back to the database per update batch.')
+
+    def handle(self, *args, **options):
+        queryset = Event.objects.exclude(cover_photo='')
+        if options['missing_only']:
+            queryset = queryset.filter(cover_variants={})
+        rows = queryset.values_list('pk', 'cover_photo').iterator(chunk_size=2000)
+
+        started = time.perf_counter()
+        self.done = self.failed = 0
+        self.pending = []
+        max_in_flight = options['workers'] * 4
+        # Workers only touch storage; the parent owns the database connection.
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            in_flight = set()
+            for pk, name in rows:
+                in_flight.add(pool.submit(_render, pk, name))
+                if len(in_flight) >= max_in_flight:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self.collect(finished, options['batch_size'])
+            self.collect(wait(in_flight).done, options['batch_size'])
+        self.flush()
+
+        self.stdout.write(
+            f'Regenerated variants for {self.done} events ({self.failed} failed) '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def collect(self, futures, batch_size):
+        for future in futures:
+            pk, name, variants, error = future.result()
+            if error:
+                self.failed += 1
+                self.stderr.write(f'Event {pk} ({name}): {error}')
+                continue
+            self.pending.append(Event(pk=pk, cover_variants=variants))
+        if len(self.pending) >= batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            Event.objects.bulk_update(self.pending, ['cover_variants'])
+            invalidate_all()
+            self.done += len(self.pending)
+            self.pending = []
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_alter_event_cover_photo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='cover_photo',
+            field=models.ImageField(upload_to='events/covers/'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'id'], name='event_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['venue', 'start_date'], name='event_venue_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'created_at'], name='event_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['price', 'start_date'], name='event_price_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('price', 0)), fields=['start_date', 'id'], name='event_free_start_idx'),
+        ),
+    ]
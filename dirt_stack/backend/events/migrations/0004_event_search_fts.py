@@ -0,0 +1,66 @@
+# Full-text index over Event name/description/venue (SQLite FTS5).
+
+from django.db import migrations
+
+
+FTS_TABLE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_event_fts USING fts5(
+        name, description, venue,
+        content='events_event', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    # External-content FTS tables are kept in sync by triggers so every
+    # write path (ORM saves, bulk_create, raw SQL, cascades) is covered.
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_ai AFTER INSERT ON events_event BEGIN
+        INSERT INTO events_event_fts(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_ad AFTER DELETE ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_au
+    AFTER UPDATE OF name, description, venue ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+        INSERT INTO events_event_fts(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END
+    """,
+    "INSERT INTO events_event_fts(events_event_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS events_event_fts_au',
+    'DROP TRIGGER IF EXISTS events_event_fts_ad',
+    'DROP TRIGGER IF EXISTS events_event_fts_ai',
+    'DROP TABLE IF EXISTS events_event_fts',
+]
+
+
+def run_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(FTS_TABLE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_cover_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, unique=True)),
+                ('fingerprint', models.CharField(max_length=100)),
+                ('rows_done', models.PositiveBigIntegerField(default=0)),
+                ('created', models.PositiveBigIntegerField(default=0)),
+                ('failed', models.PositiveBigIntegerField(default=0)),
+                ('finished', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
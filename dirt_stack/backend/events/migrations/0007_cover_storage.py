@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:08
+
+from django.db import migrations, models
+import events.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_import'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='cover_photo',
+            field=models.ImageField(storage=events.models.cover_storage, upload_to='events/covers/'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:10
+
+from datetime import timedelta, timezone
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# events.timeline as of this migration, copied so later changes to it don't
+# change what this migration writes.
+MAX_BUCKET_DAYS = 31
+
+
+def day_buckets(start_date, end_date):
+    first = start_date.astimezone(timezone.utc).date()
+    last = max(end_date - timedelta(microseconds=1), start_date).astimezone(timezone.utc).date()
+    span = (last - first).days + 1
+    if span > MAX_BUCKET_DAYS:
+        return [None]
+    return [first + timedelta(days=i) for i in range(span)]
+
+
+def backfill(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventDay = apps.get_model('events', 'EventDay')
+    batch = []
+    for pk, start_date, end_date in Event.objects.values_list('id', 'start_date', 'end_date').iterator(chunk_size=5000):
+        batch.extend(EventDay(event_id=pk, day=day) for day in day_buckets(start_date, end_date))
+        if len(batch) >= 5000:
+            EventDay.objects.bulk_create(batch)
+            batch = []
+    EventDay.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_cover_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'event'], name='eventday_day_event_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:12
+
+from collections import Counter
+from datetime import timezone
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+# events.facets as of this migration, copied so later changes to it don't
+# change what this migration writes: (key, lower bound, upper bound).
+PRICE_BANDS = (
+    ('free', None, Decimal('0.01')),
+    ('under-25', Decimal('0.01'), Decimal('25')),
+    ('25-50', Decimal('25'), Decimal('50')),
+    ('50-100', Decimal('50'), Decimal('100')),
+    ('100-plus', Decimal('100'), None),
+)
+
+
+def backfill(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventFacet = apps.get_model('events', 'EventFacet')
+    counts = Counter()
+    for row in Event.objects.values('venue').annotate(n=Count('id')).order_by():
+        counts['venue', row['venue']] = row['n']
+    for key, low, high in PRICE_BANDS:
+        events = Event.objects.all()
+        if low is not None:
+            events = events.filter(price__gte=low)
+        if high is not None:
+            events = events.filter(price__lt=high)
+        counts['price', key] = events.count()
+    months = (Event.objects.annotate(month=TruncMonth('start_date', tzinfo=timezone.utc))
+              .values('month').annotate(n=Count('id')).order_by())
+    for row in months:
+        counts['month', row['month'].strftime('%Y-%m')] = row['n']
+    EventFacet.objects.bulk_create(
+        [EventFacet(facet=facet, value=value, count=n) for (facet, value), n in counts.items() if n]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=200)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='eventfacet',
+            constraint=models.UniqueConstraint(fields=('facet', 'value'), name='eventfacet_facet_value_uniq'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_event_facet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_remaining',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
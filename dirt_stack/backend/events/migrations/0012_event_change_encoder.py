@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:29
+
+import dirt_project.serialization
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_event_change'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventchange',
+            name='payload',
+            field=models.JSONField(encoder=dirt_project.serialization.PropsJSONEncoder),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# The FTS5 sync triggers from 0004 were dropped on SQLite when later
+# AddField operations (0005, 0010) rebuilt events_event, so the search
+# index stopped following new and edited events. Recreate them and
+# rebuild the index from the table.
+
+from django.db import migrations
+
+
+TRIGGER_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_ai AFTER INSERT ON events_event BEGIN
+        INSERT INTO events_event_fts(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_ad AFTER DELETE ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_event_fts_au
+    AFTER UPDATE OF name, description, venue ON events_event BEGIN
+        INSERT INTO events_event_fts(events_event_fts, rowid, name, description, venue)
+        VALUES ('delete', old.id, old.name, old.description, old.venue);
+        INSERT INTO events_event_fts(rowid, name, description, venue)
+        VALUES (new.id, new.name, new.description, new.venue);
+    END
+    """,
+    "INSERT INTO events_event_fts(events_event_fts) VALUES ('rebuild')",
+]
+
+
+def restore_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGER_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_change_encoder'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
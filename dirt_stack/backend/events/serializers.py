@@ -0,0 +1,52 @@
+from .models import cover_storage
+
+
+# The fields each page renders, for @inertia(..., fields=...): event cards
+# (list, home, related events) and the detail page. The rest of
+# serialize_event()'s output stays on the server.
+EVENT_CARD_FIELDS = (
+    'id', 'name', 'slug', 'description', 'cover_photo', 'cover_srcset', 'price', 'start_date', 'venue',
+)
+EVENT_DETAIL_FIELDS = (
+    'name', 'description', 'cover_photo', 'cover_srcset', 'price', 'start_date', 'end_date', 'venue', 'user',
+)
+
+
+def cover_url(name):
+    """Public URL for a stored cover photo name, or None when unset."""
+    if not name:
+        return None
+    return cover_storage().url(name)
+
+
+def cover_srcset(variants):
+    """``{format: "url 320w, url 640w, ..."}`` for <picture>/<source> tags."""
+    storage = cover_storage()
+    return {
+        fmt: ', '.join(f'{storage.url(name)} {width}w' for width, name in entries)
+        for fmt, entries in (variants or {}).items()
+    }
+
+
+def serialize_event(row):
+    """
+    Build the Inertia props dict for an event row from ``for_listing()``.
+    The price and dates stay Decimal and datetime; dirt_project.serialization
+    encodes them.
+    """
+    data = {
+        'id': row['id'],
+        'name': row['name'],
+        'slug': row['slug'],
+        'description': row['description'],
+        'cover_photo': cover_url(row['cover_photo']),
+        'cover_srcset': cover_srcset(row['cover_variants']),
+        'price': row['price'],
+        'start_date': row['start_date'],
+        'end_date': row['end_date'],
+        'venue': row['venue'],
+        'user': row['user__username'],
+    }
+    if 'created_at' in row:
+        data['created_at'] = row['created_at']
+    return data
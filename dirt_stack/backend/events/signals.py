@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_event
+from .facets import apply_deltas, count_events, facet_keys
+from .live import record_change
+from .models import Event, EventChange
+from .timeline import sync_event_days
+
+
+@receiver(post_save, sender=Event, dispatch_uid='events.invalidate_on_save')
+@receiver(post_delete, sender=Event, dispatch_uid='events.invalidate_on_delete')
+def invalidate_cached_event(sender, instance, **kwargs):
+    # A renamed slug leaves a cached page under the old one too. Bumping
+    # the stamps before commit would let a reader cache the old row again
+    # under the new stamp.
+    slugs = {instance.slug, getattr(instance, '_stored_slug', None)} - {None}
+    transaction.on_commit(lambda: invalidate_event(*slugs), robust=True)
+
+
+@receiver(post_save, sender=Event, dispatch_uid='events.sync_days_on_save')
+def sync_days(sender, instance, raw=False, **kwargs):
+    # Deleting an event cascades to its EventDay rows.
+    if not raw:
+        sync_event_days([instance])
+
+
+@receiver(pre_save, sender=Event, dispatch_uid='events.facets_before_save')
+def remember_stored_row(sender, instance, raw=False, **kwargs):
+    # The stored row's values: its facet counts move if they change, and
+    # the cache entries of its slug are invalidated if the slug does.
+    instance._stored_facets = instance._stored_slug = None
+    if instance.pk and not raw:
+        row = (Event.objects.filter(pk=instance.pk)
+               .values_list('venue', 'price', 'start_date', 'slug').first())
+        if row:
+            instance._stored_facets = facet_keys(*row[:3])
+            instance._stored_slug = row[3]
+
+
+@receiver(post_save, sender=Event, dispatch_uid='events.facets_on_save')
+def update_facets(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = count_events([instance])
+    for key in getattr(instance, '_stored_facets', None) or ():
+        deltas[key] -= 1
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid='events.facets_on_delete')
+def remove_facets(sender, instance, **kwargs):
+    apply_deltas(count_events([instance], sign=-1))
+
+
+@receiver(post_save, sender=Event, dispatch_uid='events.live_on_save')
+def publish_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        kind = EventChange.CREATED if created else EventChange.UPDATED
+        transaction.on_commit(lambda: record_change(instance.pk, kind), robust=True)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid='events.live_on_delete')
+def publish_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: record_change(pk, EventChange.DELETED), robust=True)
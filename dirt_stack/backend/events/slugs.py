@@ -0,0 +1,110 @@
+import re
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Event
+
+
+SLUG_MAX_LENGTH = Event._meta.get_field('slug').max_length
+# Room left for a "-<n>" suffix when a base slug is truncated.
+SUFFIX_ROOM = 8
+# Bases per prefix-scan query; SQLite caps the depth of an OR chain.
+SCAN_CHUNK = 200
+
+
+def base_slug(name):
+    return slugify(name)[:SLUG_MAX_LENGTH - SUFFIX_ROOM].strip('-') or 'event'
+
+
+def prefix_range(prefix):
+    # A range rather than startswith: LIKE can't use the unique index on
+    # slug (on SQLite it is case-insensitive and has an ESCAPE clause).
+    return Q(slug__gte=prefix, slug__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+class SlugAllocator:
+    """
+    Hand out unique slugs for many names at once: "jazz-night",
+    "jazz-night-2", ... with one lookup query per allocate() call, a
+    prefix scan for every SCAN_CHUNK bases that already exist, and one
+    query checking the candidates (repeated only for those that collide).
+
+    The next free suffix of each base is remembered (bounded LRU), so a
+    base that repeats across batches isn't looked up again. Slugs handed
+    out but not yet committed are tracked until release(). The suffix scan
+    can't see every collision: another base may produce the same slug
+    ("a 2" -> "a-2"), or a suffixed slug may exist without its base, so
+    every candidate is checked against the table before it is returned.
+    """
+
+    def __init__(self, queryset=None, max_bases=100_000):
+        self.queryset = queryset if queryset is not None else Event.objects.all()
+        self.max_bases = max_bases
+        self._next = OrderedDict()
+        self._pending = set()
+        # Candidates found in the table; never handed out again.
+        self._taken = set()
+
+    def allocate(self, names):
+        bases = [base_slug(name) for name in names]
+        self._load({base for base in bases if base not in self._next})
+
+        slugs = [self._claim(base) for base in bases]
+        unchecked = list(range(len(slugs)))
+        while unchecked:
+            taken = set(self.queryset.filter(
+                slug__in=[slugs[i] for i in unchecked],
+            ).values_list('slug', flat=True))
+            if not taken:
+                break
+            self._taken |= taken
+            self._pending -= taken
+            unchecked = [i for i in unchecked if slugs[i] in taken]
+            for i in unchecked:
+                slugs[i] = self._claim(bases[i])
+
+        while len(self._next) > self.max_bases:
+            self._next.popitem(last=False)
+        return slugs
+
+    def _claim(self, base):
+        n = self._next[base]
+        slug = base if n == 1 else f'{base}-{n}'
+        while slug in self._pending or slug in self._taken:
+            n += 1
+            slug = f'{base}-{n}'
+        self._next[base] = n + 1
+        self._next.move_to_end(base)
+        self._pending.add(slug)
+        return slug
+
+    def release(self):
+        """Forget pending slugs once they are committed (the database now has them)."""
+        self._pending.clear()
+
+    def _load(self, bases):
+        if not bases:
+            return
+        taken = set(self.queryset.filter(slug__in=bases).values_list('slug', flat=True))
+        for base in bases - taken:
+            self._next[base] = 1
+        if not taken:
+            return
+
+        # Existing bases: continue after their highest numeric suffix.
+        highest = dict.fromkeys(taken, 1)
+        taken = sorted(taken)
+        for i in range(0, len(taken), SCAN_CHUNK):
+            suffixed = self.queryset.filter(
+                reduce(or_, (prefix_range(f'{base}-') for base in taken[i:i + SCAN_CHUNK]))
+            ).values_list('slug', flat=True)
+            for slug in suffixed.iterator():
+                base, _, suffix = slug.rpartition('-')
+                if base in highest and re.fullmatch(r'\d+', suffix):
+                    highest[base] = max(highest[base], int(suffix))
+        for base, n in highest.items():
+            self._next[base] = n + 1
@@ -0,0 +1,8 @@
+from jobs.queue import task
+
+from .images import process_event_cover
+
+
+@task('events.cover_variants')
+def cover_variants(event_id):
+    process_event_cover(event_id)
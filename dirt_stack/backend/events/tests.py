@@ -0,0 +1,558 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from inertia.settings import settings as inertia_settings
+
+from dirt_project.storage import ContentAddressedStorage
+
+from . import cache
+from .exporting import export_queryset, stream_export
+from .facets import rebuild_facets
+from .ical import Calendar, escape, fold
+from .images import generate_variants
+from .models import Event, EventChange, EventDay, EventFacet
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+from .slugs import SlugAllocator
+from .timeline import day_buckets, overlapping
+
+
+# Saving an event invalidates the events cache; keep tests off the shared one.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'events': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'events-tests'},
+}
+
+
+def make_event(user, slug='', name='Event', start=None, **fields):
+    start = start or timezone.now() + timedelta(days=7)
+    return Event.objects.create(
+        user=user, name=name, slug=slug, description=fields.pop('description', ''), price=fields.pop('price', 10),
+        start_date=start, end_date=fields.pop('end_date', start + timedelta(hours=3)),
+        venue=fields.pop('venue', 'Hall'), **fields,
+    )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SlugAllocatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def test_suffixes_within_a_batch(self):
+        self.assertEqual(SlugAllocator().allocate(['Jazz', 'Jazz', 'Jazz 2']), ['jazz', 'jazz-2', 'jazz-2-2'])
+
+    def test_committed_slugs_are_not_handed_out_again(self):
+        allocator = SlugAllocator()
+        first = allocator.allocate(['A', 'A 2'])
+        self.assertEqual(first, ['a', 'a-2'])
+        for slug in first:
+            make_event(self.user, slug=slug)
+        allocator.release()
+
+        second = allocator.allocate(['A'])
+        self.assertNotIn(second[0], first)
+        self.assertFalse(Event.objects.filter(slug=second[0]).exists())
+
+    def test_suffixed_slug_without_its_base(self):
+        make_event(self.user, slug='rock-2')
+        slugs = SlugAllocator().allocate(['Rock', 'Rock'])
+        self.assertEqual(slugs[0], 'rock')
+        self.assertEqual(len(set(slugs)), 2)
+        self.assertNotIn('rock-2', slugs)
+
+    def test_events_with_the_same_name_get_their_own_slugs(self):
+        first = make_event(self.user, name='Jazz Night')
+        second = make_event(self.user, name='Jazz Night')
+        self.assertEqual((first.slug, second.slug), ('jazz-night', 'jazz-night-2'))
+
+    def test_a_slug_taken_before_the_insert_is_retried(self):
+        make_event(self.user, slug='jazz')
+        allocate = SlugAllocator.allocate
+        answers = iter([['jazz']])  # another request inserted "jazz" after the check
+
+        def racing_allocate(allocator, names):
+            return next(answers, None) or allocate(allocator, names)
+
+        with mock.patch.object(SlugAllocator, 'allocate', racing_allocate):
+            event = make_event(self.user, name='Jazz')
+        self.assertEqual(event.slug, 'jazz-2')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LiveFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def test_changes_replay_in_id_order(self):
+        from .live import record_change, replay_rows
+
+        first = make_event(self.user, slug='first')
+        second = make_event(self.user, slug='second')
+        record_change(first.pk, EventChange.CREATED)
+        record_change(second.pk, EventChange.UPDATED)
+        record_change(first.pk, EventChange.DELETED)
+
+        ids = list(EventChange.objects.order_by('id').values_list('id', flat=True))
+        frames, complete = replay_rows(ids[0] - 1, limit=10)
+        self.assertTrue(complete)
+        self.assertEqual([pk for pk, _ in frames], ids)
+        self.assertIn(b'event: updated\ndata: {"id":%d' % second.pk, frames[1][1])
+
+        frames, complete = replay_rows(ids[0], limit=1)
+        self.assertEqual([pk for pk, _ in frames], ids[1:2])
+        self.assertFalse(complete)
+
+    def test_feed_resumes_after_last_event_id(self):
+        from .live import record_change
+
+        event = make_event(self.user, slug='live')
+        record_change(event.pk, EventChange.CREATED)
+        record_change(event.pk, EventChange.UPDATED)
+        first, second = EventChange.objects.order_by('id').values_list('id', flat=True)
+
+        response = self.client.get('/events/live/', HTTP_LAST_EVENT_ID=str(first))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(b'id: %d\nevent: updated\n' % second, body)
+        self.assertNotIn(b'id: %d\n' % first, body)
+        self.assertNotIn(b'event: reset', body)
+
+    def test_feed_resets_when_changes_were_pruned(self):
+        from .live import record_change
+
+        event = make_event(self.user, slug='live')
+        record_change(event.pk, EventChange.CREATED)
+        record_change(event.pk, EventChange.UPDATED)
+        pruned = EventChange.objects.order_by('id').first().pk
+        EventChange.objects.filter(pk=pruned).delete()
+
+        response = self.client.get('/events/live/', HTTP_LAST_EVENT_ID=str(pruned - 1))
+        self.assertIn(b'event: reset', b''.join(response.streaming_content))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+        start = timezone.now() + timedelta(days=1)
+        # Shared start dates, so pages have to break ties on id.
+        for i in range(7):
+            make_event(cls.user, slug=f'event-{i}', start=start + timedelta(hours=i // 3))
+
+    def test_cursor_round_trip(self):
+        start = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(start, 42)), (start, 42))
+
+    def test_malformed_cursor(self):
+        for token in ('', 'not-a-cursor', encode_cursor(timezone.now(), 1)[:-4]):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+    def test_pages_cover_every_event_once(self):
+        queryset = Event.objects.values('id', 'start_date')
+        seen, after = [], None
+        while True:
+            rows, after = keyset_page(queryset, after, page_size=3)
+            seen.extend(row['id'] for row in rows)
+            if after is None:
+                break
+        expected = list(Event.objects.order_by('start_date', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class EventCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def test_saving_an_event_replaces_its_stamps(self):
+        event = make_event(self.user, slug='cached')
+        other = make_event(self.user, slug='other')
+        detail, list_stamp, other_detail = (
+            cache.detail_stamp('cached'), cache.list_stamp(), cache.detail_stamp('other'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            event.name = 'Renamed'
+            event.save()
+            # Not before the new row is visible to other connections.
+            self.assertEqual(cache.detail_stamp('cached'), detail)
+        self.assertNotEqual(cache.detail_stamp('cached'), detail)
+        self.assertNotEqual(cache.list_stamp(), list_stamp)
+        self.assertEqual(cache.detail_stamp('other'), other_detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertNotEqual(cache.detail_stamp('other'), other_detail)
+
+    def test_changing_the_slug_expires_the_old_one(self):
+        event = make_event(self.user, slug='before')
+        before = cache.detail_stamp('before')
+        event.slug = 'after'
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+        self.assertNotEqual(cache.detail_stamp('before'), before)
+
+    def test_values_are_computed_once_per_key(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None
+
+        for _ in range(2):
+            self.assertIsNone(cache.get_or_compute('test', 'events:test', compute))
+        self.assertEqual(len(calls), 1)
+
+
+    def test_a_failed_signal_handler_leaves_the_event_unchanged(self):
+        event = make_event(self.user, slug='atomic')
+        event.venue = 'Elsewhere'
+        with mock.patch('events.signals.apply_deltas', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                event.save()
+        self.assertEqual(Event.objects.values_list('venue', flat=True).get(pk=event.pk), 'Hall')
+
+
+@override_settings(CACHES=TEST_CACHES, VITE_DEV_SERVER_URL='http://localhost:5173')
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def setUp(self):
+        self.event = make_event(self.user, slug='conditional')
+
+    def get(self, **headers):
+        return self.client.get('/events/conditional/', **headers)
+
+    def test_repeat_visit_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        repeat = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], first['ETag'])
+
+    def test_change_to_the_event_sends_a_new_page(self):
+        etag = self.get()['ETag']
+        self.event.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_related_events_revalidate_with_the_clock(self):
+        headers = {
+            'HTTP_X_INERTIA': 'true', 'HTTP_X_INERTIA_VERSION': str(inertia_settings.INERTIA_VERSION),
+            'HTTP_X_INERTIA_PARTIAL_COMPONENT': 'Events/EventDetail',
+            'HTTP_X_INERTIA_PARTIAL_DATA': 'related_events',
+        }
+        with mock.patch('events.views.clock_bucket', return_value=1):
+            etag = self.get(**headers)['ETag']
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag, **headers).status_code, 304)
+        with mock.patch('events.views.clock_bucket', return_value=2):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag, **headers).status_code, 200)
+
+    def test_representations_have_their_own_etags(self):
+        html = self.get()
+        json = self.get(HTTP_X_INERTIA='true', HTTP_X_INERTIA_VERSION=str(inertia_settings.INERTIA_VERSION))
+        self.assertEqual(json.status_code, 200)
+        self.assertNotEqual(json['ETag'], html['ETag'])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=json['ETag']).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def test_best_match_first_whatever_its_age(self):
+        from .search import search_events
+
+        start = timezone.now() + timedelta(days=1)
+        make_event(self.user, slug='named', name='Zydeco Night', start=start)
+        for i in range(5):
+            make_event(self.user, slug=f'mention-{i}', name=f'Party {i}', description='zydeco covers',
+                       start=start + timedelta(days=i))
+        results = search_events('zyde', limit=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['slug'], 'named')
+        self.assertEqual(search_events('"*) OR'), [])
+
+    def test_new_and_edited_events_are_found(self):
+        from .search import search_events
+
+        event = make_event(self.user, slug='edited', name='Tango Lessons')
+        self.assertEqual([row['slug'] for row in search_events('tango')], ['edited'])
+        event.name = 'Salsa Lessons'
+        event.save()
+        self.assertEqual(search_events('tango'), [])
+        self.assertEqual([row['slug'] for row in search_events('salsa')], ['edited'])
+
+    def test_triggers_dropped_by_a_table_rebuild_are_restored(self):
+        from django.db import connection
+
+        from .search import ensure_triggers, search_events
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER events_event_fts_ai')
+        make_event(self.user, slug='unindexed', name='Polka Party')
+        self.assertEqual(ensure_triggers(), ['events_event_fts_ai'])
+        self.assertEqual([row['slug'] for row in search_events('polka')], ['unindexed'])
+        self.assertEqual(ensure_triggers(), [])
+
+
+def utc(day, hour=0):
+    return datetime(2031, 1, day, hour, tzinfo=dt_timezone.utc)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CreateEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=50)
+    def test_an_oversized_cover_is_reported(self):
+        self.client.force_login(self.user)
+        page = self.client.post('/events/create/', {
+            'cover_photo': SimpleUploadedFile('cover.jpg', b'x' * 51), 'name': 'Jazz',
+        }, HTTP_X_INERTIA='true', HTTP_X_INERTIA_VERSION=str(inertia_settings.INERTIA_VERSION)).json()
+        self.assertEqual(page['props']['errors'], {'cover_photo': ['Cover photo must be at most 50\xa0bytes.']})
+        self.assertFalse(Event.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def counts(self):
+        return {(facet, value): count for facet, value, count
+                in EventFacet.objects.filter(count__gt=0).values_list('facet', 'value', 'count')}
+
+    def test_counts_follow_every_write(self):
+        event = make_event(self.user, slug='moves', price=0, start=utc(10, 12))
+        make_event(self.user, slug='stays', price=30, start=utc(10, 12))
+        self.assertEqual(self.counts(), {
+            ('venue', 'Hall'): 2, ('price', 'free'): 1, ('price', '25-50'): 1, ('month', '2031-01'): 2,
+        })
+
+        event.venue, event.price = 'Park', 120
+        event.start_date, event.end_date = utc(10, 12) + timedelta(days=31), utc(10, 15) + timedelta(days=31)
+        event.save()
+        self.assertEqual(self.counts(), {
+            ('venue', 'Hall'): 1, ('venue', 'Park'): 1, ('price', '25-50'): 1, ('price', '100-plus'): 1,
+            ('month', '2031-01'): 1, ('month', '2031-02'): 1,
+        })
+
+        event.delete()
+        counts = self.counts()
+        self.assertEqual(counts, {('venue', 'Hall'): 1, ('price', '25-50'): 1, ('month', '2031-01'): 1})
+        rebuild_facets()
+        self.assertEqual(self.counts(), counts)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.stderr = io.StringIO()
+
+    def row(self, name, **changes):
+        start = datetime.now(dt_timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=30)
+        return {'name': name, 'description': 'Live music.', 'price': '10', 'start_date': start.isoformat(),
+                'end_date': (start + timedelta(hours=3)).isoformat(), 'venue': 'Hall', 'user': 'organizer',
+                **changes}
+
+    def write(self, *rows):
+        path = os.path.join(self.directory, 'events.jsonl')
+        with open(path, 'w') as f:
+            for row in rows:
+                f.write((json.dumps(row) if isinstance(row, dict) else row) + '\n')
+        return path
+
+    def run_import(self, *args):
+        stdout = io.StringIO()
+        call_command('import_events', *args, stdout=stdout, stderr=self.stderr)
+        return stdout.getvalue()
+
+    def test_rows_are_imported_and_rejects_written_out(self):
+        path = self.write(self.row('Jazz'), self.row('Jazz'), self.row('Bad', price='abc'), 'not json')
+        errors = os.path.join(self.directory, 'errors.jsonl')
+        self.run_import(path, '--errors', errors)
+        self.assertEqual(list(Event.objects.order_by('id').values_list('slug', flat=True)), ['jazz', 'jazz-2'])
+        self.assertEqual(EventFacet.objects.get(facet='venue', value='Hall').count, 2)
+        self.assertEqual(EventDay.objects.count(), 2)
+        with open(errors) as f:
+            rejected = [json.loads(line) for line in f]
+        self.assertEqual([(r['record'], r['row'] and r['row']['name']) for r in rejected], [(3, 'Bad'), (4, None)])
+        self.assertIn('price', rejected[0]['error'])
+
+    def test_an_interrupted_import_resumes_after_its_last_batch(self):
+        path = self.write(self.row('One'), self.row('Two'), self.row('Three'))
+        # Fails once the first batch is committed.
+        with mock.patch('events.management.commands.import_events.invalidate_all', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Event.objects.count(), 2)
+
+        self.assertIn('Resuming after record 2.', self.run_import(path, '--batch-size', '2'))
+        self.assertEqual(sorted(Event.objects.values_list('name', flat=True)), ['One', 'Three', 'Two'])
+        errors = os.path.join(self.directory, 'errors.jsonl')
+        with self.assertRaisesMessage(CommandError, 'already imported'):
+            self.run_import(path, '--errors', errors)
+        self.assertFalse(os.path.exists(errors))
+
+    def test_a_batch_may_need_more_covers_than_are_cached(self):
+        path = self.write(*(self.row(name, cover_photo=cover) for name, cover in
+                            [('One', 'a.jpg'), ('Two', 'b.jpg'), ('Three', 'c.jpg'), ('Four', 'a.jpg')]))
+
+        def ingest_cover(path, variants):
+            return path, f'events/covers/{os.path.basename(path)}', {}, None
+
+        command = 'events.management.commands.import_events'
+        with mock.patch(f'{command}.COVER_CACHE_SIZE', 1), \
+                mock.patch(f'{command}.ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch(f'{command}.ingest_cover', ingest_cover):
+            self.run_import(path, '--images-dir', '/covers')
+        self.assertEqual(
+            list(Event.objects.order_by('id').values_list('name', 'cover_photo')),
+            [('One', 'events/covers/a.jpg'), ('Two', 'events/covers/b.jpg'),
+             ('Three', 'events/covers/c.jpg'), ('Four', 'events/covers/a.jpg')],
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+        make_event(cls.user, slug='first', name='First, "quoted"', price=Decimal('12.50'), start=utc(5))
+        make_event(cls.user, slug='second', name='Second', start=utc(6))
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(b''.join(stream_export(export_queryset())).decode())))
+        self.assertEqual([(r['slug'], r['name'], r['price'], r['user']) for r in rows], [
+            ('first', 'First, "quoted"', '12.50', 'organizer'), ('second', 'Second', '10.00', 'organizer'),
+        ])
+        self.assertEqual(rows[0]['start_date'], '2031-01-05T00:00:00+00:00')
+
+    def test_compressed_output_matches_across_chunks(self):
+        plain = b''.join(stream_export(export_queryset(), 'jsonl'))
+        with mock.patch('events.exporting.BUFFER_SIZE', 1):
+            chunks = list(stream_export(export_queryset(), 'jsonl', compress=True))
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+        self.assertEqual([json.loads(line)['slug'] for line in plain.decode().splitlines()], ['first', 'second'])
+
+    def test_date_bounds(self):
+        self.assertEqual([row['slug'] for row in export_queryset(start=utc(6))], ['second'])
+        self.assertEqual([row['slug'] for row in export_queryset(end=utc(6))], ['first'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='organizer')
+
+    def test_day_buckets(self):
+        self.assertEqual(day_buckets(utc(1, 22), utc(2, 0)), [date(2031, 1, 1)])
+        self.assertEqual(day_buckets(utc(1, 22), utc(2, 1)), [date(2031, 1, 1), date(2031, 1, 2)])
+        self.assertEqual(day_buckets(utc(1), utc(1) + timedelta(days=40)), [None])
+
+    def test_buckets_follow_the_event(self):
+        event = make_event(self.user, start=utc(1, 10), end_date=utc(3, 10))
+        days = lambda: list(EventDay.objects.filter(event=event).order_by('day').values_list('day', flat=True))
+        self.assertEqual(days(), [date(2031, 1, 1), date(2031, 1, 2), date(2031, 1, 3)])
+        event.end_date = utc(1, 12)
+        event.save()
+        self.assertEqual(days(), [date(2031, 1, 1)])
+
+    def test_windows(self):
+        make_event(self.user, slug='short', start=utc(10, 10), end_date=utc(10, 12))
+        make_event(self.user, slug='long', start=utc(1), end_date=utc(1) + timedelta(days=40))
+        make_event(self.user, slug='later', start=utc(20, 10), end_date=utc(20, 12))
+        slugs = lambda start, end: sorted(overlapping(start, end).values_list('slug', flat=True))
+        self.assertEqual(slugs(utc(10, 11), utc(10, 13)), ['long', 'short'])
+        self.assertEqual(slugs(utc(10, 12), utc(10, 12)), ['long'])
+        self.assertEqual(slugs(utc(15), utc(21)), ['later', 'long'])
+
+
+class ICalTests(SimpleTestCase):
+    def test_long_lines_fold_at_75_octets(self):
+        line = 'DESCRIPTION:' + 'é' * 100
+        folded = fold(line)
+        self.assertTrue(folded.endswith('\r\n'))
+        physical = folded[:-2].split('\r\n')
+        self.assertTrue(all(len(part.encode()) <= 75 for part in physical))
+        self.assertEqual(physical[0] + ''.join(part[1:] for part in physical[1:]), line)
+        self.assertEqual(fold('SUMMARY:short'), 'SUMMARY:short\r\n')
+
+    def test_text_is_escaped(self):
+        self.assertEqual(escape('a,b;c\\d\nnext'), 'a\\,b\\;c\\\\d\\nnext')
+
+    def test_calendar(self):
+        calendar = Calendar('Events', lambda slug: f'https://example.com/events/{slug}/', 'example.com')
+        calendar.add({'slug': 'jazz', 'name': 'Jazz', 'description': '', 'venue': 'Hall', 'start_date': utc(1, 20),
+                      'end_date': utc(1, 23), 'created_at': utc(1)})
+        text = calendar.close().decode()
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n'))
+        self.assertTrue(text.endswith('END:VEVENT\r\nEND:VCALENDAR\r\n'))
+        self.assertIn('UID:jazz@example.com\r\nDTSTAMP:', text)
+        self.assertIn('DTSTART:20310101T200000Z\r\nDTEND:20310101T230000Z\r\n', text)
+
+
+class CoverVariantTests(SimpleTestCase):
+    def setUp(self):
+        from PIL import Image
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 400), 'red').save(buffer, 'PNG')
+        self.name = self.storage.save('events/covers/cover.png', ContentFile(buffer.getvalue()))
+
+    def test_widths_never_exceed_the_original(self):
+        from PIL import Image
+
+        variants = generate_variants(self.name, storage=self.storage)
+        self.assertEqual([width for width, _ in variants['webp']], [320, 640, 800])
+        with self.storage.open(variants['webp'][0][1]) as f, Image.open(f) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (320, 160)))
+
+    def test_stored_variants_are_reused(self):
+        from PIL import Image
+
+        first = generate_variants(self.name, storage=self.storage)
+        path = self.storage.path(first['webp'][0][1])
+        modified = os.stat(path).st_mtime_ns
+        with mock.patch.object(Image.Image, 'resize') as resize:
+            self.assertEqual(generate_variants(self.name, storage=self.storage), first)
+        resize.assert_not_called()
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
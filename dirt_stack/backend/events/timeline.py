@@ -0,0 +1,104 @@
+"""
+Time-window queries over events.
+
+An event overlaps ``[start, end)`` when ``start_date < end`` and
+``end_date > start``. No single B-tree index bounds both sides of that,
+so every event is bucketed by the UTC days it spans (EventDay): a window
+first reads the buckets of its days from the (day, event) index, and only
+those events are checked against the exact bounds. Events longer than
+MAX_BUCKET_DAYS share one NULL bucket that every window includes.
+"""
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Event, EventDay
+
+
+MAX_BUCKET_DAYS = 31
+# Widest window the API accepts.
+MAX_WINDOW_DAYS = 366
+
+
+def utc_day(value):
+    return value.astimezone(dt_timezone.utc).date()
+
+
+def day_buckets(start_date, end_date):
+    """The UTC days ``[start_date, end_date)`` touches, or ``[None]`` for long events."""
+    first = utc_day(start_date)
+    # An event ending exactly at midnight doesn't occupy the next day.
+    last = utc_day(max(end_date - timedelta(microseconds=1), start_date))
+    span = (last - first).days + 1
+    if span > MAX_BUCKET_DAYS:
+        return [None]
+    return [first + timedelta(days=i) for i in range(span)]
+
+
+def build_days(rows):
+    """EventDay objects for ``(id, start_date, end_date)`` rows."""
+    return [
+        EventDay(event_id=pk, day=day)
+        for pk, start_date, end_date in rows
+        for day in day_buckets(start_date, end_date)
+    ]
+
+
+def sync_event_days(events, replace=True):
+    """
+    Write the buckets of ``events`` (saved Event instances). Pass
+    ``replace=False`` for events just created with bulk_create, which have
+    no buckets to remove yet.
+    """
+    rows = [(event.pk, event.start_date, event.end_date) for event in events]
+    if not rows:
+        return
+    with transaction.atomic():
+        if replace:
+            EventDay.objects.filter(event_id__in=[pk for pk, _, _ in rows]).delete()
+        EventDay.objects.bulk_create(build_days(rows), batch_size=5000)
+
+
+def rebuild_event_days(batch_size=5000):
+    """Recompute every bucket from the events table; returns the number of events."""
+    total = 0
+    with transaction.atomic():
+        EventDay.objects.all().delete()
+        batch = []
+        rows = Event.objects.values_list('id', 'start_date', 'end_date').iterator(chunk_size=batch_size)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                EventDay.objects.bulk_create(build_days(batch))
+                total += len(batch)
+                batch = []
+        EventDay.objects.bulk_create(build_days(batch))
+        total += len(batch)
+    return total
+
+
+def overlapping(start, end, queryset=None):
+    """Events overlapping ``[start, end)``; with ``start == end``, those running at that instant."""
+    queryset = queryset if queryset is not None else Event.objects.all()
+    buckets = EventDay.objects.filter(
+        Q(day__range=(utc_day(start), utc_day(end))) | Q(day__isnull=True)
+    ).values('event_id')
+    if start == end:
+        queryset = queryset.filter(start_date__lte=start, end_date__gt=start)
+    else:
+        queryset = queryset.filter(start_date__lt=end, end_date__gt=start)
+    return queryset.filter(id__in=buckets)
+
+
+def happening_now(queryset=None, now=None):
+    now = now or timezone.now()
+    return overlapping(now, now, queryset)
+
+
+def starting_between(start, end, queryset=None):
+    """Events starting in ``[start, end)``; the (start_date, id) index covers this."""
+    queryset = queryset if queryset is not None else Event.objects.all()
+    return queryset.filter(start_date__gte=start, start_date__lt=end)
@@ -4,5 +4,12 @@ from . import views
 urlpatterns = [
     path('', views.event_list, name='event_list'),
     path('create/', views.create_event, name='create_event'),
+    path('search/', views.event_search, name='event_search'),
+    path('export/', views.export_events, name='export_events'),
+    path('window/', views.events_in_window, name='events_in_window'),
+    path('upcoming/', views.upcoming_events, name='upcoming_events'),
+    path('now/', views.events_now, name='events_now'),
+    path('calendar.ics', views.event_calendar, name='event_calendar'),
+    path('live/', views.event_feed, name='event_feed'),
     path('<slug:slug>/', views.event_detail, name='event_detail'),
 ]
\ No newline at end of file
@@ -1,54 +1,139 @@
-from django.shortcuts import redirect, get_object_or_404
+import hashlib
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
-from inertia import inertia
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from inertia import lazy
+from dirt_project.conditional import conditional
+from dirt_project.disconnects import disconnected_event
+from dirt_project.rendering import inertia, once, partial_keys
+from dirt_project.serialization import json_response
+from dirt_project.uploads import oversized_uploads
+from .cache import (
+    ALL_VERSION, LIST_VERSION, adetail_stamp, aget_or_compute, alist_stamp, astamp,
+    clock_bucket, detail_version, stamp_time,
+)
 from .models import Event
-from .forms import EventForm
-from datetime import datetime, timezone
-
-
-@inertia('Events/EventList')
-def event_list(request):
-    # Sample events for now
-    sample_events = [
-        {
-            'id': 1,
-            'name': 'Summer Music Festival',
-            'slug': 'summer-music-festival',
-            'description': 'Join us for an amazing outdoor music festival featuring top artists.',
-            'cover_photo': '/media/matickov1.png',
-            'price': '75.00',
-            'start_date': '2024-07-15T18:00:00Z',
-            'end_date': '2024-07-15T23:00:00Z',
-            'venue': 'Central Park Amphitheater',
-            'user': 'eventorganizer',
-        },
-        {
-            'id': 2,
-            'name': 'Tech Conference 2024',
-            'slug': 'tech-conference-2024',
-            'description': 'Discover the latest in technology and innovation.',
-            'cover_photo': '/media/backv1.png',
-            'price': '150.00',
-            'start_date': '2024-06-20T09:00:00Z',
-            'end_date': '2024-06-21T17:00:00Z',
-            'venue': 'Convention Center',
-            'user': 'techevents',
-        },
-        {
-            'id': 3,
-            'name': 'Art Gallery Opening',
-            'slug': 'art-gallery-opening',
-            'description': 'Experience contemporary art from emerging artists.',
-            'cover_photo': '/media/footer.svg',
-            'price': '25.00',
-            'start_date': '2024-05-30T19:00:00Z',
-            'end_date': '2024-05-30T22:00:00Z',
-            'venue': 'Downtown Art Gallery',
-            'user': 'artcurator',
-        },
-    ]
-    
-    return {'events': sample_events}
+from .forms import EventForm, cover_size_error
+from .pagination import InvalidCursor, akeyset_page, decode_cursor, parse_page_size
+from .facets import InvalidFilter, afacet_counts, apply_filters, parse_filters
+from .exporting import FORMATS, astream_export, export_queryset, parse_bound, stream_export
+from .ical import Calendar, astream_calendar, stream_calendar
+from .live import BrokerFull, broker, parse_last_event_id, stream, stream_once
+from .images import schedule_cover_variants
+from .search import search_events
+from .serializers import EVENT_CARD_FIELDS, EVENT_DETAIL_FIELDS, serialize_event
+from .timeline import MAX_WINDOW_DAYS, happening_now, overlapping, starting_between
+
+
+RELATED_EVENTS_LIMIT = 6
+UPCOMING_DAYS = 30
+CALENDAR_DAYS = 90
+
+# Props are returned as callables so Inertia only evaluates (and queries
+# for) the keys a partial reload asks for via X-Inertia-Partial-Data.
+# Props wrapped in lazy() are skipped on full visits and only computed
+# when explicitly requested.
+#
+# The read-only pages are async views using the async ORM, so under ASGI a
+# slow query doesn't pin a worker thread. create_event stays synchronous:
+# form parsing, file writes and login_required are sync-only, and Django
+# runs it in its thread pool.
+#
+# Serialized events and list pages come from events.cache, so a hot detail
+# page is answered from the cache without a query until the event changes.
+# The same version stamps are the pages' validators: a repeat visit with a
+# matching If-None-Match gets a 304 before any props are built.
+#
+# Cached events hold every serialized field; each page's ``fields`` trims
+# them to what it renders when the page is encoded.
+
+
+async def list_validators(request):
+    stamp = await alist_stamp()
+    return stamp, stamp_time(stamp)
+
+
+async def detail_validators(request, slug):
+    if 'related_events' not in partial_keys(request):
+        stamp = await astamp(ALL_VERSION, detail_version(slug))
+        return stamp, stamp_time(stamp)
+    # Related events are upcoming ones, so they also change with the clock.
+    stamp = await astamp(ALL_VERSION, detail_version(slug), LIST_VERSION)
+    return f'{stamp}:{clock_bucket()}', stamp_time(stamp)
+
+
+@conditional(list_validators)
+@inertia('Events/EventList', fields={'events': EVENT_CARD_FIELDS})
+async def event_list(request):
+    after = request.GET.get('after')
+    try:
+        if after:
+            decode_cursor(after)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid pagination cursor.')
+
+    try:
+        filters = parse_filters(request.GET)
+    except InvalidFilter as exc:
+        return HttpResponseBadRequest(str(exc))
+    page_size = parse_page_size(request.GET.get('limit'))
+
+    @once
+    async def page():
+        key = f'events:list:{await alist_stamp()}:{filters_key(filters)}:{after or ""}:{page_size}'
+        return await aget_or_compute('list', key, lambda: load_page(after, page_size, filters))
+
+    async def events():
+        rows, _ = await page()
+        return rows
+
+    async def next_cursor():
+        _, cursor = await page()
+        return cursor
+
+    async def facets():
+        key = f'events:facets:{await alist_stamp()}'
+        return await aget_or_compute('facets', key, afacet_counts)
+
+    return {
+        'events': events,
+        'next_cursor': next_cursor,
+        'facets': facets,
+        'filters': filters,
+    }
+
+
+def filters_key(filters):
+    # Venue names can hold characters cache backends reject in keys.
+    if not filters:
+        return ''
+    return hashlib.blake2b(urlencode(sorted(filters.items())).encode(), digest_size=8).hexdigest()
+
+
+async def load_page(after, page_size, filters=None):
+    queryset = apply_filters(Event.objects.for_listing(), filters or {})
+    rows, cursor = await akeyset_page(queryset, after=after, page_size=page_size)
+    return [serialize_event(row) for row in rows], cursor
+
+
+@inertia('Events/EventList', fields={'events': EVENT_CARD_FIELDS})
+def event_search(request):
+    query = request.GET.get('q', '').strip()
+    limit = parse_page_size(request.GET.get('limit'))
+    return {
+        'events': lambda: [serialize_event(row) for row in search_events(query, limit=limit)] if query else [],
+        'next_cursor': None,
+        'query': query,
+    }
 
 
 @login_required
@@ -56,75 +141,190 @@ def event_list(request):
 def create_event(request):
     if request.method == 'POST':
         form = EventForm(request.POST, request.FILES)
+        if 'cover_photo' in oversized_uploads(request):
+            # Parsing stopped at the cover, so the fields after it never arrived.
+            return {'errors': {'cover_photo': [cover_size_error()]}}
         if form.is_valid():
             event = form.save(commit=False)
             event.user = request.user
             event.save()
+            transaction.on_commit(lambda: schedule_cover_variants(event.pk))
             return redirect('event_detail', slug=event.slug)
         return {'form': form, 'errors': form.errors}
     
     return {'form': EventForm()}
 
 
-@inertia('Events/EventDetail')
-def event_detail(request, slug):
-    # Sample events for now
-    sample_events = {
-        'summer-music-festival': {
-            'id': 1,
-            'name': 'Summer Music Festival',
-            'slug': 'summer-music-festival',
-            'description': 'Join us for an amazing outdoor music festival featuring top artists.',
-            'cover_photo': '/media/matickov1.png',
-            'price': '75.00',
-            'start_date': '2024-07-15T18:00:00Z',
-            'end_date': '2024-07-15T23:00:00Z',
-            'venue': 'Central Park Amphitheater',
-            'user': 'eventorganizer',
-        },
-        'tech-conference-2024': {
-            'id': 2,
-            'name': 'Tech Conference 2024',
-            'slug': 'tech-conference-2024',
-            'description': 'Discover the latest in technology and innovation.',
-            'cover_photo': '/media/backv1.png',
-            'price': '150.00',
-            'start_date': '2024-06-20T09:00:00Z',
-            'end_date': '2024-06-21T17:00:00Z',
-            'venue': 'Convention Center',
-            'user': 'techevents',
-        },
-        'art-gallery-opening': {
-            'id': 3,
-            'name': 'Art Gallery Opening',
-            'slug': 'art-gallery-opening',
-            'description': 'Experience contemporary art from emerging artists.',
-            'cover_photo': '/media/footer.svg',
-            'price': '25.00',
-            'start_date': '2024-05-30T19:00:00Z',
-            'end_date': '2024-05-30T22:00:00Z',
-            'venue': 'Downtown Art Gallery',
-            'user': 'artcurator',
-        },
+@conditional(detail_validators)
+@inertia('Events/EventDetail', fields={'event': EVENT_DETAIL_FIELDS, 'related_events': EVENT_CARD_FIELDS})
+async def event_detail(request, slug):
+    key = f'events:detail:{await adetail_stamp(slug)}:{slug}'
+    event = await aget_or_compute('detail', key, lambda: load_event(slug))
+    if event is None:
+        raise Http404('No event matches the given slug.')
+
+    return {
+        'event': event,
+        'related_events': lazy(lambda: related_events(event)),
     }
-    
-    if slug not in sample_events:
-        # Try database if sample not found
-        event = get_object_or_404(Event, slug=slug)
-        return {
-            'event': {
-                'id': event.id,
-                'name': event.name,
-                'slug': event.slug,
-                'description': event.description,
-                'cover_photo': event.cover_photo if event.cover_photo else None,
-                'price': str(event.price),
-                'start_date': event.start_date.isoformat(),
-                'end_date': event.end_date.isoformat(),
-                'venue': event.venue,
-                'created_at': event.created_at.isoformat(),
-                'user': event.user.username,
-            }
-        }
-    
-    return {'event': sample_events[slug]}
\ No newline at end of file
+
+
+async def load_event(slug):
+    row = await Event.objects.for_detail().filter(slug=slug).afirst()
+    return serialize_event(row) if row else None
+
+
+async def related_events(event):
+    # Upcoming events depend on the time, not only on the list stamp.
+    key = f'events:related:{await alist_stamp()}:{clock_bucket()}:{event["id"]}'
+    return await aget_or_compute('related', key, lambda: load_related_events(event))
+
+
+async def load_related_events(event):
+    queryset = (
+        Event.objects.for_listing().upcoming()
+        .filter(venue=event['venue']).exclude(id=event['id'])
+        .order_by('start_date')[:RELATED_EVENTS_LIMIT]
+    )
+    return [serialize_event(row) async for row in queryset]
+
+
+@login_required
+def export_events(request):
+    """
+    Stream all events (or those starting in ?start..?end, or owned by
+    ?owner) as CSV or JSON Lines (?format=jsonl), gzipped with ?gzip=1.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest('format must be csv or jsonl.')
+    try:
+        start = parse_bound(request.GET.get('start'))
+        end = parse_bound(request.GET.get('end'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    compress = request.GET.get('gzip') == '1'
+
+    queryset = export_queryset(start, end, request.GET.get('owner'))
+    # Under ASGI a sync iterator would be read into memory before sending,
+    # so the rows come from the async ORM there.
+    stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+    content_type, extension = FORMATS[fmt]
+    filename = f'events-{timezone.now():%Y%m%d-%H%M%S}.{extension}'
+    if compress:
+        content_type, filename = 'application/gzip', f'{filename}.gz'
+    response = StreamingHttpResponse(stream(queryset, fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class InvalidWindow(ValueError):
+    pass
+
+
+def parse_window(request, default_days=None):
+    """``(start, end)`` from ?start=&end= (ISO dates or date-times), bounded in length."""
+    try:
+        start = parse_bound(request.GET.get('start'))
+        end = parse_bound(request.GET.get('end'))
+    except ValueError as exc:
+        raise InvalidWindow(str(exc))
+    if default_days is not None:
+        start = start or timezone.now()
+        end = end or start + timedelta(days=default_days)
+    if start is None or end is None:
+        raise InvalidWindow('start and end are required.')
+    if end < start:
+        raise InvalidWindow('end must not be before start.')
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        raise InvalidWindow(f'The window can be at most {MAX_WINDOW_DAYS} days.')
+    return start, end
+
+
+async def event_page_response(request, queryset):
+    after = request.GET.get('after')
+    try:
+        if after:
+            decode_cursor(after)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid pagination cursor.')
+    rows, cursor = await akeyset_page(
+        queryset.for_listing(), after=after, page_size=parse_page_size(request.GET.get('limit')),
+    )
+    return json_response({'events': [serialize_event(row) for row in rows], 'next_cursor': cursor})
+
+
+async def events_in_window(request):
+    """Events overlapping ?start..?end, keyset-paginated by start date."""
+    try:
+        start, end = parse_window(request)
+    except InvalidWindow as exc:
+        return HttpResponseBadRequest(str(exc))
+    return await event_page_response(request, overlapping(start, end))
+
+
+async def upcoming_events(request):
+    """Events starting in the next ?days (default 30)."""
+    try:
+        days = int(request.GET.get('days', UPCOMING_DAYS))
+    except ValueError:
+        return HttpResponseBadRequest('days must be a whole number.')
+    if not 1 <= days <= MAX_WINDOW_DAYS:
+        return HttpResponseBadRequest(f'days must be between 1 and {MAX_WINDOW_DAYS}.')
+    now = timezone.now()
+    return await event_page_response(request, starting_between(now, now + timedelta(days=days)))
+
+
+async def events_now(request):
+    """Events running right now."""
+    return await event_page_response(request, happening_now())
+
+
+def event_calendar(request):
+    """
+    iCalendar feed of events overlapping ?start..?end (default: the next
+    90 days), streamed like the export.
+    """
+    try:
+        start, end = parse_window(request, default_days=CALENDAR_DAYS)
+    except InvalidWindow as exc:
+        return HttpResponseBadRequest(str(exc))
+    queryset = overlapping(start, end).order_by('start_date', 'id')
+    detail_url = request.build_absolute_uri(reverse('event_detail', args=['slug']))
+
+    calendar = Calendar('Maticko events', lambda slug: detail_url.replace('/slug/', f'/{slug}/'),
+                        request.get_host())
+    stream = astream_calendar if isinstance(request, ASGIRequest) else stream_calendar
+    response = StreamingHttpResponse(stream(queryset, calendar), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="events.ics"'
+    return response
+
+
+async def event_feed(request):
+    """
+    Server-Sent Events of created, updated and deleted events. Browsers
+    resume with Last-Event-ID (or ?last_event_id=) after a reconnect.
+    """
+    after = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    )
+    if isinstance(request, ASGIRequest):
+        try:
+            subscription = broker.subscribe()
+        except BrokerFull:
+            response = HttpResponse('Too many live connections.', status=503)
+            response['Retry-After'] = str(settings.LIVE_RETRY_MS // 1000)
+            return response
+        content = stream(subscription, after, disconnected_event(request))
+    else:
+        # Without an event loop to hold connections open, each request
+        # answers with what changed and the browser reconnects.
+        content = stream_once(after)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,128 @@
+"""
+Production server configuration: gunicorn managing uvicorn workers that
+run the ASGI application.
+
+    gunicorn -c gunicorn.conf.py dirt_project.asgi:application
+"""
+
+import glob
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+
+from dirt_project import metrics
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Each uvicorn worker is a single event loop; async views interleave
+# requests within it, so one worker per core is enough.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn_worker.UvicornWorker'
+# There is no `threads` setting: UvicornWorker ignores it. Django runs each
+# sync view (e.g. create_event) on a thread of its own per request, and
+# thread_sensitive=False calls (SSR renders) on the event loop's default
+# executor.
+
+keepalive = 5
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+
+# Recycle workers periodically to bound memory growth.
+max_requests = 2000
+max_requests_jitter = 200
+
+# Each worker writes its metrics here, so /metrics reports the whole
+# server whichever worker answers the scrape.
+metrics_dir = os.environ.setdefault(
+    'METRICS_MULTIPROCESS_DIR', os.path.join(tempfile.gettempdir(), 'dirt-metrics'),
+)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+# One job worker (manage.py run_jobs) runs beside the web workers, so the
+# container needs no separate process for background work. The master
+# restarts it if it exits and stops it on shutdown. Set GUNICORN_JOB_WORKER=0
+# when job workers are deployed on their own (JOB_WORKERS is the number of
+# jobs each of them runs at once). Its Prometheus metrics are served on
+# GUNICORN_JOB_METRICS_HOST:GUNICORN_JOB_METRICS_PORT without
+# authentication; leave the port empty to turn them off.
+job_worker_enabled = (
+    os.environ.get('GUNICORN_JOB_WORKER', '1') == '1' and os.environ.get('JOBS_ENABLED', '1') == '1'
+)
+job_metrics_host = os.environ.get('GUNICORN_JOB_METRICS_HOST', '127.0.0.1')
+job_metrics_port = os.environ.get('GUNICORN_JOB_METRICS_PORT', '9101')
+# Seconds between restarts of a job worker that keeps exiting.
+job_worker_restart_delay = 5
+
+
+def start_job_worker():
+    command = [sys.executable, 'manage.py', 'run_jobs']
+    if job_metrics_port:
+        command += ['--metrics-host', job_metrics_host, '--metrics-port', job_metrics_port]
+    return subprocess.Popen(command)
+
+
+def supervise_job_worker(server):
+    while True:
+        returncode = server.job_worker.wait()
+        # Waits out the delay, or returns early once the server is stopping.
+        if server.job_worker_stopping.wait(job_worker_restart_delay):
+            return
+        with server.job_worker_lock:
+            if server.job_worker_stopping.is_set():
+                return
+            server.log.warning('Job worker exited with status %s; restarting it.', returncode)
+            server.job_worker = start_job_worker()
+
+
+def on_starting(server):
+    # Totals start again with the server.
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.json')):
+        os.remove(path)
+
+
+def post_worker_init(worker):
+    # uvicorn re-raises the SIGTERM it shut down on once it is done. Left
+    # to the default action, that kills the worker before worker_exit runs.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def worker_exit(server, worker):
+    # The worker's last values, for child_exit to keep.
+    metrics.write_snapshot(metrics_dir)
+
+
+def child_exit(server, worker):
+    metrics.retire_snapshot(metrics_dir, worker.pid)
+
+
+def when_ready(server):
+    if not job_worker_enabled:
+        return
+    server.job_worker_lock = threading.Lock()
+    server.job_worker_stopping = threading.Event()
+    server.job_worker = start_job_worker()
+    threading.Thread(target=supervise_job_worker, args=(server,), daemon=True).start()
+
+
+def on_exit(server):
+    job_worker = getattr(server, 'job_worker', None)
+    if job_worker is None:
+        return
+    with server.job_worker_lock:
+        server.job_worker_stopping.set()
+        job_worker = server.job_worker
+    # run_jobs finishes the jobs it is running on SIGTERM.
+    job_worker.terminate()
+    try:
+        job_worker.wait(timeout=graceful_timeout)
+    except subprocess.TimeoutExpired:
+        job_worker.kill()
@@ -0,0 +1,150 @@
+import signal
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from dirt_project import metrics
+from jobs import queue
+
+
+# Leases are renewed and stale jobs looked for this often, relative to the lease.
+RENEW_FRACTION = 3
+
+
+def init_worker():
+    django.setup()
+    # Forked workers must not share the parent's database connection.
+    connections.close_all()
+    queue.load_tasks()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.exposition().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued jobs on a pool of threads or processes until stopped with '
+        'SIGTERM or Ctrl-C; --burst exits once the queue is empty.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS,
+                            help='Jobs run at the same time.')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run jobs in worker processes instead of threads, for CPU-bound tasks.')
+        parser.add_argument('--poll', type=float, default=settings.JOB_POLL_SECONDS,
+                            help='Seconds to wait before looking again when the queue is empty.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit when no due jobs are left instead of waiting for more.')
+        parser.add_argument('--stats-interval', type=float, default=60,
+                            help='Seconds between throughput and latency summaries; 0 disables them.')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Serve this worker\'s Prometheus metrics on this port.')
+        parser.add_argument('--metrics-host', default='127.0.0.1',
+                            help='Address to serve the metrics on; they have no authentication.')
+
+    def handle(self, *args, **options):
+        queue.load_tasks()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if options['metrics_port']:
+            server = ThreadingHTTPServer((options['metrics_host'], options['metrics_port']), MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        workers = options['workers']
+        if options['processes']:
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+        self.stdout.write(
+            f'Running jobs on {workers} {"processes" if options["processes"] else "threads"} '
+            f'({", ".join(sorted(queue.TASKS)) or "no tasks registered"})'
+        )
+
+        running = {}
+        lease_check = settings.JOB_LEASE_SECONDS / RENEW_FRACTION
+        next_lease_check = time.monotonic()
+        next_stats = time.monotonic() + options['stats_interval']
+        window = self.new_window()
+        try:
+            while not self.stopping or running:
+                claimed = []
+                if not self.stopping and len(running) < workers:
+                    claimed = queue.claim(workers - len(running))
+                    for job in claimed:
+                        running[pool.submit(queue.execute, job.task, job.payload)] = job
+                if running:
+                    # Wake for the first finished job, or to look for new
+                    # ones when a slot is free.
+                    timeout = options['poll'] if len(running) < workers else lease_check
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        error, seconds = future.result()
+                        outcome = queue.finish(job, error, seconds)
+                        window[outcome] += 1
+                        window['waits'].append((job.started_at - job.run_at).total_seconds())
+                        window['durations'].append(seconds)
+                        if error is not None:
+                            self.stderr.write(f'{job.task} #{job.pk} failed ({outcome}):\n{error}')
+                elif options['burst'] and not claimed:
+                    break
+                else:
+                    time.sleep(options['poll'])
+
+                now = time.monotonic()
+                if now >= next_lease_check:
+                    next_lease_check = now + lease_check
+                    if running:
+                        queue.renew(running.values())
+                    queue.requeue_stale()
+                    queue.purge_finished()
+                if options['stats_interval'] and now >= next_stats:
+                    next_stats = now + options['stats_interval']
+                    self.report(window)
+                    window = self.new_window()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self.report(window)
+
+    def stop(self, signum, frame):
+        if not self.stopping:
+            self.stdout.write('Finishing running jobs, then stopping.')
+        self.stopping = True
+
+    def new_window(self):
+        return {'started': time.monotonic(), 'done': 0, 'retry': 0, 'failed': 0, 'lost': 0,
+                'waits': [], 'durations': []}
+
+    def report(self, window):
+        finished = window['done'] + window['retry'] + window['failed'] + window['lost']
+        if not finished:
+            return
+        seconds = time.monotonic() - window['started']
+        self.stdout.write(
+            f'{window["done"]} done, {window["retry"]} retried, {window["failed"]} failed, '
+            f'{window["lost"]} lost in '
+            f'{seconds:.1f}s ({finished / seconds:.1f} jobs/s); '
+            f'wait p50 {statistics.median(window["waits"]):.3f}s, '
+            f'run p50 {statistics.median(window["durations"]):.3f}s; '
+            f'{queue.queue_depth()} due in queue'
+        )
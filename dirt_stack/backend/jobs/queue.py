@@ -0,0 +1,203 @@
+"""
+A job queue in the application database, run by ``manage.py run_jobs``.
+
+Tasks are plain functions registered with ``@task('app.name')`` in an
+app's ``tasks`` module. ``enqueue()`` writes a Job row in the caller's
+transaction, so a job for an object that is rolled back never runs.
+
+Workers claim due jobs with a conditional UPDATE (``... WHERE status =
+'queued'``): whichever worker flips a row owns it, and on databases with
+SKIP LOCKED the candidates are read without waiting on rows another worker
+is claiming. A running job's lease is renewed while it runs; a job whose
+worker died is queued again once its lease runs out, so tasks must be
+safe to run more than once.
+"""
+
+import random
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from dirt_project import metrics
+
+from .models import Job
+
+
+JOB_WAIT = metrics.histogram(
+    'job_wait_seconds',
+    'Time from when a job was due to when a worker started it.',
+    labelnames=('task',),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOB_DURATION = metrics.histogram(
+    'job_duration_seconds',
+    'Time spent running a job, per outcome.',
+    labelnames=('task', 'outcome'),
+)
+JOBS_FINISHED = metrics.counter(
+    'jobs_finished_total',
+    'Job attempts by outcome: done, retry (failed, will run again), failed, or lost (lease expired).',
+    labelnames=('task', 'outcome'),
+)
+
+TASKS = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name):
+    """Register the decorated function as the task called ``name``."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def load_tasks():
+    autodiscover_modules('tasks')
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=None):
+    """Queue ``name(**payload)``; the payload must be JSON-serialisable."""
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        run_at=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim(limit, now=None, tasks=None):
+    """Take up to ``limit`` due jobs for this worker, oldest first; only of ``tasks`` if given."""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+        if tasks is not None:
+            due = due.filter(task__in=tasks)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=token, locked_at=now, started_at=now,
+        )
+    return list(Job.objects.filter(id__in=ids, locked_by=token).order_by('run_at', 'id'))
+
+
+def renew(jobs, now=None):
+    """Extend the lease of jobs that are still running."""
+    Job.objects.filter(
+        id__in=[job.pk for job in jobs], locked_by__in={job.locked_by for job in jobs},
+    ).update(locked_at=now or timezone.now())
+
+
+def execute(name, payload):
+    """
+    Run one task; returns ``(error, seconds)`` with the formatted traceback
+    or None. Runs in a worker thread or process, so it takes no Job.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        if name not in TASKS:
+            raise UnknownTask(f'No task is registered as {name!r}.')
+        TASKS[name](**payload)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        close_old_connections()
+    return error, time.perf_counter() - started
+
+
+def finish(job, error, seconds, now=None):
+    """Record the outcome of a claimed job; returns 'done', 'retry', 'failed' or 'lost'."""
+    now = now or timezone.now()
+    attempts = job.attempts + 1
+    mine = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+    if error is None:
+        outcome = 'done'
+        updated = mine.update(status=Job.DONE, attempts=attempts, finished_at=now, locked_by='', last_error='')
+    elif attempts < job.max_attempts:
+        outcome = 'retry'
+        updated = mine.update(status=Job.QUEUED, attempts=attempts, run_at=now + backoff(attempts),
+                              locked_by='', last_error=error)
+    else:
+        outcome = 'failed'
+        updated = mine.update(status=Job.FAILED, attempts=attempts, finished_at=now, locked_by='',
+                              last_error=error)
+    if not updated:
+        # The lease ran out and the job was queued again; that run reports instead.
+        outcome = 'lost'
+    JOB_WAIT.observe(max(0.0, (job.started_at - job.run_at).total_seconds()), task=job.task)
+    JOB_DURATION.observe(seconds, task=job.task, outcome=outcome)
+    JOBS_FINISHED.inc(task=job.task, outcome=outcome)
+    return outcome
+
+
+def requeue_stale(now=None):
+    """Queue again running jobs whose worker stopped renewing them; counts as an attempt."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS),
+    )
+    requeued = 0
+    for job in stale.only('id', 'attempts', 'max_attempts', 'locked_by'):
+        attempts = job.attempts + 1
+        status = Job.QUEUED if attempts < job.max_attempts else Job.FAILED
+        requeued += Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING).update(
+            status=status, attempts=attempts, locked_by='', run_at=now,
+            finished_at=now if status == Job.FAILED else None,
+            last_error='The worker running this job stopped before it finished.',
+        )
+    return requeued
+
+
+def purge_finished(now=None):
+    """Delete jobs that finished successfully more than JOB_RETENTION_DAYS ago."""
+    now = now or timezone.now()
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, finished_at__lt=now - timedelta(days=settings.JOB_RETENTION_DAYS),
+    ).delete()
+    return deleted
+
+
+def drain(tasks, timeout=None):
+    """
+    Run the due jobs of ``tasks`` in this process, then wait for the ones
+    other workers are running, for commands that need the work finished
+    before they go on. Jobs retried later are not waited for. Returns False
+    if jobs were still running after ``timeout`` seconds (default: a lease).
+    """
+    load_tasks()
+    deadline = time.monotonic() + (settings.JOB_LEASE_SECONDS if timeout is None else timeout)
+    while True:
+        jobs = claim(1, tasks=tasks)
+        for job in jobs:
+            finish(job, *execute(job.task, job.payload))
+        if jobs:
+            continue
+        if not Job.objects.filter(task__in=tasks, status=Job.RUNNING).exists():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(settings.JOB_POLL_SECONDS)
+
+
+def queue_depth(now=None):
+    return Job.objects.filter(status=Job.QUEUED, run_at__lte=now or timezone.now()).count()
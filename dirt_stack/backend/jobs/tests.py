@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+
+calls = []
+
+
+@queue.task('jobs.test_record')
+def record(value):
+    calls.append(value)
+
+
+class ClaimTests(TestCase):
+    def test_a_job_is_claimed_once(self):
+        job = queue.enqueue('jobs.test_record', {'value': 1})
+        claimed = queue.claim(5)
+        self.assertEqual([j.pk for j in claimed], [job.pk])
+        self.assertEqual(claimed[0].status, Job.RUNNING)
+        self.assertEqual(queue.claim(5), [])
+
+    def test_jobs_run_when_due_oldest_first(self):
+        later = queue.enqueue('jobs.test_record', delay=timedelta(minutes=5))
+        second = queue.enqueue('jobs.test_record')
+        first = queue.enqueue('jobs.test_record')
+        Job.objects.filter(pk=first.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([j.pk for j in queue.claim(5)], [first.pk, second.pk])
+        self.assertEqual([j.pk for j in queue.claim(5, now=timezone.now() + timedelta(minutes=6))], [later.pk])
+
+
+@override_settings(JOB_BACKOFF_BASE=5, JOB_BACKOFF_MAX=3600)
+class RetryTests(TestCase):
+    def run_once(self, error, now=None):
+        [job] = queue.claim(1, now=now)
+        return queue.finish(job, error, 0.01, now=now)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = queue.enqueue('jobs.test_record', max_attempts=2)
+        now = timezone.now()
+        self.assertEqual(self.run_once('boom', now=now), 'retry')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.QUEUED, 1, 'boom'))
+        self.assertGreaterEqual(job.run_at, now + timedelta(seconds=2.5))
+        self.assertEqual(queue.claim(1, now=now), [])
+
+        self.assertEqual(self.run_once('boom again', now=job.run_at), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_success_after_a_retry(self):
+        job = queue.enqueue('jobs.test_record')
+        self.run_once('boom')
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(self.run_once(None), 'done')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.DONE, ''))
+
+    def test_stale_jobs_are_queued_again(self):
+        job = queue.enqueue('jobs.test_record')
+        [claimed] = queue.claim(1)
+        later = timezone.now() + timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        self.assertEqual(queue.requeue_stale(now=later), 1)
+        # The first worker's result no longer counts.
+        self.assertEqual(queue.finish(claimed, None, 0.01), 'lost')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+
+
+class DrainTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_due_jobs_of_the_given_tasks_only(self):
+        queue.enqueue('jobs.test_record', {'value': 1})
+        other = queue.enqueue('jobs.test_other')
+        self.assertTrue(queue.drain(['jobs.test_record'], timeout=0))
+        self.assertEqual(calls, [1])
+        other.refresh_from_db()
+        self.assertEqual(other.status, Job.QUEUED)
+
+    def test_gives_up_on_jobs_another_worker_holds(self):
+        job = queue.enqueue('jobs.test_record', {'value': 1})
+        queue.claim(1)
+        self.assertFalse(queue.drain(['jobs.test_record'], timeout=0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
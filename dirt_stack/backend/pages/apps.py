@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class PagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pages'
+
+    def ready(self):
+        from dirt_project.db import configure_sqlite
+        from dirt_project.instrumentation import instrument_connection
+
+        connection_created.connect(configure_sqlite, dispatch_uid='dirt_project.db.configure_sqlite')
+        connection_created.connect(
+            instrument_connection, dispatch_uid='dirt_project.instrumentation.instrument_connection',
+        )
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dirt_project.loadtest import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a running server at increasing concurrency and report throughput '
+        'and latency percentiles, e.g. to compare runserver/WSGI with the '
+        'gunicorn + uvicorn ASGI setup in gunicorn.conf.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Absolute URL to request, e.g. http://127.0.0.1:8000/events/')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per concurrency level.')
+        parser.add_argument('--concurrency', default='1,10,50',
+                            help='Comma-separated concurrency levels to run.')
+        parser.add_argument('--inertia', action='store_true',
+                            help='Send X-Inertia so the JSON page object is measured instead of HTML.')
+        parser.add_argument('--output', help='Also write the results as JSON to this path.')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers.')
+
+        headers = {'X-Inertia': 'true'} if options['inertia'] else {}
+        results = []
+        self.stdout.write(f'{"conc":>5} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} '
+                          f'{"p99 ms":>8} {"errors":>7}')
+        for level in levels:
+            result = run_load(options['url'], total=options['requests'],
+                              concurrency=level, headers=headers)
+            result['concurrency'] = level
+            results.append(result)
+            self.stdout.write(
+                f'{level:>5} {result["throughput"]:>9.1f} {ms(result["p50"]):>8} '
+                f'{ms(result["p95"]):>8} {ms(result["p99"]):>8} {result["errors"]:>7}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'url': options['url'], 'results': results}, f, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}')
+
+
+def ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
@@ -0,0 +1,129 @@
+import itertools
+import json
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, connections, transaction
+
+from dirt_project.db import describe
+from dirt_project.loadtest import summarize
+from events.models import Event
+
+
+SCRATCH_TABLE = 'dirt_db_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure read, write and mixed throughput against the configured database. '
+        'Run it once per profile (e.g. DB_SQLITE_TUNED=0, DB_CONN_MAX_AGE=0, '
+        'DB_ENGINE=postgres) with --output to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='Duration of each workload.')
+        parser.add_argument('--label', default='',
+                            help='Name recorded for this profile in the report.')
+        parser.add_argument('--output', help='Append the JSON report to this file (one line per run).')
+
+    def handle(self, *args, **options):
+        ids = list(Event.objects.values_list('id', flat=True)[:10_000])
+        if not ids:
+            raise CommandError('No events to read; run `manage.py benchmark_queries` to seed some.')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+            cursor.execute(
+                f'CREATE TABLE {SCRATCH_TABLE} (id BIGINT PRIMARY KEY, payload VARCHAR(200) NOT NULL)'
+            )
+        profile = describe(connection)
+        self.stdout.write(' '.join(f'{key}={value}' for key, value in profile.items()))
+
+        next_id = itertools.count(1).__next__
+
+        def read():
+            Event.objects.for_detail().filter(pk=random.choice(ids)).first()
+
+        def write():
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'INSERT INTO {SCRATCH_TABLE} (id, payload) VALUES (%s, %s)',
+                        [next_id(), 'x' * 100],
+                    )
+
+        threads, seconds = options['threads'], options['seconds']
+        workloads = {
+            'read': [read] * threads,
+            'write': [write] * threads,
+            # One writer alongside readers: with a rollback journal every
+            # commit locks the readers out.
+            'mixed': [write] + [read] * (threads - 1),
+        }
+        results = {}
+        try:
+            for name, operations in workloads.items():
+                results[name] = run_workload(operations, seconds)
+                result = results[name]
+                self.stdout.write(
+                    f'{name:<6} {result["throughput"]:>9.1f} ops/s  '
+                    f'p50 {ms(result["p50"])} ms  p99 {ms(result["p99"])} ms  '
+                    f'errors {result["errors"]}'
+                )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
+
+        if options['output']:
+            with open(options['output'], 'a') as f:
+                f.write(json.dumps({
+                    'label': options['label'], 'threads': threads, 'profile': profile,
+                    'results': results,
+                }) + '\n')
+            self.stdout.write(f'Appended to {options["output"]}')
+
+
+def run_workload(operations, seconds):
+    """
+    Run each operation in its own thread until ``seconds`` elapse. Like a
+    request, each iteration ends with close_old_connections(), so
+    CONN_MAX_AGE=0 pays for a new connection every time.
+    """
+    deadline = time.perf_counter() + seconds
+    latencies, lock = [], threading.Lock()
+    errors = [0]
+
+    def worker(operation):
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation()
+                    ok = True
+                except DatabaseError:
+                    ok = False
+                duration = time.perf_counter() - started
+                close_old_connections()
+                with lock:
+                    if ok:
+                        latencies.append(duration)
+                    else:
+                        errors[0] += 1
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=worker, args=(op,)) for op in operations]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.2f}'
@@ -0,0 +1,299 @@
+import json
+import os
+import platform
+import resource
+import time
+import uuid
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.middleware.csrf import _get_new_csrf_string
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
+from inertia.settings import settings as inertia_settings
+from PIL import Image
+
+from dirt_project.loadtest import closed_loop, http_sender
+from events.images import wait_for_cover_variants
+from events.models import Event, cover_storage
+from events.pagination import keyset_page
+from events.seeding import SEED_SLUG_PREFIX, seed_events
+
+
+BENCH_USERNAME = 'benchmark-user'
+BENCH_EVENT_PREFIX = 'Benchmark Event'
+# Not committed: timings only compare with a baseline from the same machine.
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+# Summary fields compared against the baseline.
+REPORTED = ('throughput', 'p50', 'p95', 'p99', 'queries_max', 'payload_bytes', 'serialize_ms',
+            'peak_rss_kb', 'errors')
+
+
+def inertia_headers():
+    return {'X-Inertia': 'true', 'X-Inertia-Version': str(inertia_settings.INERTIA_VERSION)}
+
+
+def cover_image():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), (200, 80, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def create_event_data(image):
+    start = timezone.now() + timedelta(days=30)
+    return {
+        'name': f'{BENCH_EVENT_PREFIX} {uuid.uuid4().hex[:12]}',
+        'description': 'Created by benchmark_routes.',
+        'price': '10.00',
+        'start_date': start.strftime('%Y-%m-%dT%H:%M'),
+        'end_date': (start + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M'),
+        'venue': 'Benchmark Hall',
+        'cover_photo': SimpleUploadedFile('cover.jpg', image, content_type='image/jpeg'),
+    }
+
+
+def routes(slug, cursor):
+    """``(name, method, path, headers, expected statuses)`` for every benchmarked route."""
+    return [
+        ('home', 'GET', '/', {}, {200}),
+        ('event_list', 'GET', '/events/', {}, {200}),
+        ('event_list_inertia', 'GET', '/events/', inertia_headers(), {200}),
+        ('event_list_page', 'GET', f'/events/?after={cursor}', inertia_headers(), {200}),
+        ('event_detail', 'GET', f'/events/{slug}/', {}, {200}),
+        ('event_detail_inertia', 'GET', f'/events/{slug}/', inertia_headers(), {200}),
+        # A successful create redirects to the new event.
+        ('create_event', 'POST', '/events/create/', {}, {302}),
+    ]
+
+
+def client_sender(method, path, headers, user, image):
+    """A make_sender() that calls the WSGI app in-process through the test client."""
+    def make_sender():
+        client = Client()
+        if method == 'POST':
+            client.force_login(user)
+
+        def send():
+            if method == 'POST':
+                response = client.post(path, create_event_data(image), headers=headers)
+            else:
+                response = client.get(path, headers=headers)
+            size = None if response.streaming else len(response.content)
+            return response.status_code, response.get('Server-Timing'), size
+
+        return send, connections.close_all
+
+    return make_sender
+
+
+def server_sender(base_url, method, path, headers, user, image):
+    """A make_sender() for a running server; POSTs carry a session and CSRF token."""
+    headers = dict(headers)
+    body = None
+    if method == 'POST':
+        client = Client()
+        client.force_login(user)
+        csrf_token = _get_new_csrf_string()
+        headers.update({
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}; '
+                      f'{settings.CSRF_COOKIE_NAME}={csrf_token}',
+            'X-CSRFToken': csrf_token,
+            'Content-Type': MULTIPART_CONTENT,
+        })
+
+        def body():
+            return encode_multipart(BOUNDARY, create_event_data(image))
+
+    return http_sender(base_url.rstrip('/') + path, method=method, headers=headers, body=body)
+
+
+def peak_rss_kb(server_pid=None):
+    """Peak resident memory of the server process (VmHWM) or of this process."""
+    if server_pid:
+        try:
+            with open(f'/proc/{server_pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def machine():
+    """Where a report was recorded; timings are only comparable on the same machine."""
+    return {'host': platform.node(), 'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+
+def regressions(results, baseline, tolerance, timings=True):
+    """
+    Human-readable list of metrics that got worse than the baseline allows.
+    Latency and throughput are only compared when ``timings`` is true.
+    """
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result['errors']:
+            found.append(f'{name}: {result["errors"]} failed requests')
+        if timings:
+            for metric in ('p95', 'p99'):
+                if base.get(metric) and result.get(metric) and result[metric] > base[metric] * (1 + tolerance):
+                    found.append(f'{name}: {metric} {result[metric] * 1000:.1f} ms > '
+                                 f'baseline {base[metric] * 1000:.1f} ms (+{tolerance:.0%})')
+            if base.get('throughput') and result['throughput'] < base['throughput'] * (1 - tolerance):
+                found.append(f'{name}: throughput {result["throughput"]:.1f}/s < '
+                             f'baseline {base["throughput"]:.1f}/s (-{tolerance:.0%})')
+        # Query counts are deterministic once warm, so any increase counts.
+        if base.get('queries_max') is not None and (result.get('queries_max') or 0) > base['queries_max']:
+            found.append(f'{name}: {result["queries_max"]} queries > baseline {base["queries_max"]}')
+        # So are payloads, bar the odd longer value; growth past the tolerance is a new prop or field.
+        if base.get('payload_bytes') and (result.get('payload_bytes') or 0) > base['payload_bytes'] * (1 + tolerance):
+            found.append(f'{name}: payload {result["payload_bytes"]} bytes > '
+                         f'baseline {base["payload_bytes"]} bytes (+{tolerance:.0%})')
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every route against a seeded database, in-process through the '
+        'WSGI handler or against a running server, and compare with a baseline '
+        'recorded earlier on this machine.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000,
+                            help='Seeded events to ensure exist before benchmarking.')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per route.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Unmeasured requests per route, so caches are in steady state.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--routes', help='Comma-separated subset of routes to run.')
+        parser.add_argument('--url', help='Base URL of a running server; default is in-process.')
+        parser.add_argument('--server-pid', type=int,
+                            help='With --url, read the server\'s peak memory from /proc.')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Local baseline to compare with; nothing is compared until one is recorded.')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write these results as the new baseline instead of comparing.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown in latency/throughput before failing.')
+        parser.add_argument('--output', help='Write the JSON report to this path.')
+
+    def handle(self, *args, **options):
+        if options['rows']:
+            seed_events(options['rows'])
+        slug = (Event.objects.filter(slug__startswith=SEED_SLUG_PREFIX)
+                .order_by('id').values_list('slug', flat=True).first())
+        if not slug:
+            raise CommandError('No seeded events; run with --rows > 0.')
+        _, cursor = keyset_page(Event.objects.for_listing())
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        image = cover_image()
+
+        selected = set(options['routes'].split(',')) if options['routes'] else None
+        results = {}
+        try:
+            for name, method, path, headers, expect in routes(slug, cursor):
+                if selected and name not in selected:
+                    continue
+                if options['url']:
+                    make_sender = server_sender(options['url'], method, path, headers, user, image)
+                else:
+                    make_sender = client_sender(method, path, headers, user, image)
+                if options['warmup']:
+                    closed_loop(make_sender, options['warmup'], 1, expect)
+                result = closed_loop(make_sender, options['requests'], options['concurrency'], expect)
+                result['peak_rss_kb'] = peak_rss_kb(options['server_pid'] if options['url'] else None)
+                results[name] = {key: result.get(key) for key in ('requests', *REPORTED)}
+                self.stdout.write(
+                    f'{name:<22} {result["throughput"]:>8.1f} req/s  p50 {ms(result["p50"])}  '
+                    f'p95 {ms(result["p95"])}  p99 {ms(result["p99"])}  '
+                    f'queries {result.get("queries_max", "-")}  '
+                    f'payload {kb(result.get("payload_bytes"))}  serialize {result.get("serialize_ms", "-")} ms  '
+                    f'errors {result["errors"]}'
+                )
+        finally:
+            self.cleanup()
+
+        report = {
+            'mode': 'server' if options['url'] else 'in-process',
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'database': connections['default'].vendor,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'machine': machine(),
+            'routes': results,
+        }
+        if options['output']:
+            write_json(options['output'], report)
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            write_json(baseline_path, report)
+            self.stdout.write(f'Baseline written to {baseline_path}')
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f'No baseline at {baseline_path}; run with --update-baseline to create one.')
+            return
+
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        same_machine = baseline.get('machine') == report['machine'] and baseline.get('mode') == report['mode']
+        if not same_machine:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was recorded on another machine or in another mode; only errors, '
+                'query counts and payload sizes are compared. Re-record it with --update-baseline.'
+            ))
+        found = regressions(results, baseline.get('routes', {}), options['tolerance'], timings=same_machine)
+        if found:
+            raise CommandError('Regressions against baseline:\n  ' + '\n  '.join(found))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def cleanup(self):
+        """
+        Remove the events created by the create_event route. Covers are
+        shared by content, so a cover (and its variants) is only deleted
+        when no remaining event uses it.
+        """
+        wait_for_cover_variants()
+        created = Event.objects.filter(name__startswith=BENCH_EVENT_PREFIX)
+        files = {}
+        for cover, variants in created.values_list('cover_photo', 'cover_variants'):
+            if cover:
+                files.setdefault(cover, set()).update(
+                    name for entries in (variants or {}).values() for _, name in entries
+                )
+        for event in created:
+            event.delete()
+        in_use = set(Event.objects.filter(cover_photo__in=files).values_list('cover_photo', flat=True))
+        storage = cover_storage()
+        for cover, variants in files.items():
+            if cover not in in_use:
+                for name in (cover, *variants):
+                    storage.delete(name)
+
+
+def ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f} ms'
+
+
+def kb(size):
+    return '-' if size is None else f'{size / 1024:.1f} KB'
+
+
+def write_json(path, report):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
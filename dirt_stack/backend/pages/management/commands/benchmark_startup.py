@@ -0,0 +1,141 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Run in a fresh interpreter per measurement, so nothing is imported yet.
+# Prints one JSON line: import time of the WSGI application, then the first
+# and a second request through it, without Django's test client.
+CHILD = '''
+import time
+started = time.time()
+clock = time.perf_counter()
+import json, os, sys
+from wsgiref.util import setup_testing_defaults
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dirt_project.settings')
+from dirt_project.wsgi import application
+imported = time.perf_counter()
+modules = len(sys.modules)
+
+def request(path):
+    path, _, query = path.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+    setup_testing_defaults(environ)
+    status = []
+    begin = time.perf_counter()
+    body = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in body:
+            pass
+    finally:
+        getattr(body, 'close', lambda: None)()
+    return time.perf_counter() - begin, int(status[0].split()[0])
+
+paths = json.loads(sys.argv[1])
+first, first_status = request(paths[0])
+later = [request(path) for path in paths[1:]]
+warm, _ = request(paths[0])
+print(json.dumps({
+    'started': started,
+    'import': imported - clock,
+    'first_request': first,
+    'other_first_requests': [seconds for seconds, _ in later],
+    'warm_request': warm,
+    'statuses': [first_status] + [status for _, status in later],
+    'modules': modules,
+}))
+'''
+
+
+def run_child(env, paths, importtime=False):
+    environ = {**os.environ, 'DJANGO_ENV': env}
+    # The production profile refuses to start without a key.
+    environ.setdefault('DJANGO_SECRET_KEY', 'benchmark-startup')
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', CHILD, json.dumps(paths)]
+    spawned = time.time()
+    completed = subprocess.run(command, cwd=settings.BASE_DIR, env=environ, capture_output=True, text=True)
+    if completed.returncode:
+        raise CommandError(f'The {env} process failed:\n{completed.stderr}')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Interpreter start-up, before the first line of the script runs.
+    result['interpreter'] = max(0.0, result.pop('started') - spawned)
+    return result, completed.stderr
+
+
+def slowest_imports(stderr, limit):
+    """Top-level packages by total self import time, from ``-X importtime`` output."""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return [(name, us / 1000) for name, us in totals.most_common(limit)]
+
+
+def ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start per settings profile: interpreter start-up, the import of '
+        'wsgi.application and the first request, each in a fresh process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--envs', default='development,production',
+                            help='Comma-separated DJANGO_ENV profiles to measure.')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per profile.')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path requested first (repeatable); default /events/.')
+        parser.add_argument('--budget-ms', type=float, default=settings.STARTUP_BUDGET_MS,
+                            help='Fail when the median import plus first request exceeds this.')
+        parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                            help='Also list the N slowest top-level packages to import per profile.')
+        parser.add_argument('--output', help='Write the JSON report to this path.')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/events/']
+        report = {'paths': paths, 'runs': options['runs'], 'budget_ms': options['budget_ms'], 'profiles': {}}
+        over = []
+        for env in options['envs'].split(','):
+            runs = [run_child(env, paths)[0] for _ in range(options['runs'])]
+            if any(status >= 500 for run in runs for status in run['statuses']):
+                raise CommandError(f'{env}: a request failed with {runs[0]["statuses"]}.')
+            summary = {
+                key: ms(statistics.median(run[key] for run in runs))
+                for key in ('interpreter', 'import', 'first_request', 'warm_request')
+            }
+            summary['import_min'] = ms(min(run['import'] for run in runs))
+            summary['cold_start'] = round(summary['import'] + summary['first_request'], 1)
+            summary['modules'] = runs[0]['modules']
+            if options['importtime']:
+                _, stderr = run_child(env, paths, importtime=True)
+                summary['slowest_imports'] = dict(slowest_imports(stderr, options['importtime']))
+            report['profiles'][env] = summary
+
+            self.stdout.write(
+                f'{env:<12} interpreter {summary["interpreter"]} ms  import {summary["import"]} ms '
+                f'(min {summary["import_min"]})  first request {summary["first_request"]} ms  '
+                f'warm {summary["warm_request"]} ms  {summary["modules"]} modules'
+            )
+            for name, took in summary.get('slowest_imports', {}).items():
+                self.stdout.write(f'    {name:<28} {took:.1f} ms')
+            if summary['cold_start'] > options['budget_ms']:
+                over.append(f'{env}: import + first request {summary["cold_start"]} ms > '
+                            f'budget {options["budget_ms"]:.0f} ms')
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}')
+        if over:
+            raise CommandError('Over the startup budget:\n  ' + '\n  '.join(over))
@@ -0,0 +1,66 @@
+import html
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a stand-in for the Inertia SSR server that answers /render with '
+        'placeholder markup, for exercising the SSR path without Node.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=13714)
+        parser.add_argument('--delay', type=float, default=0.0,
+                            help='Seconds to sleep per render, to simulate a slow server.')
+
+    def handle(self, *args, **options):
+        delay = options['delay']
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self.respond({'status': 'OK'})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != '/render':
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                page = json.loads(self.rfile.read(length) or b'{}')
+                if delay:
+                    time.sleep(delay)
+                data_page = html.escape(json.dumps(page), quote=True)
+                self.respond({
+                    'head': [f'<title>{html.escape(page.get("component", ""))}</title>'],
+                    'body': f'<div id="app" data-page="{data_page}"><!-- ssr --></div>',
+                })
+
+            def respond(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                stdout.write(format % args)
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(f'SSR stand-in listening on http://{options["host"]}:{options["port"]}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,14 @@
+from django import template
+
+from dirt_project.vite import entry_tags
+
+register = template.Library()
+
+
+@register.simple_tag
+def vite_entry(entry='src/main.jsx', component=None):
+    """
+    Render every tag needed to load a Vite entry, resolved from the manifest,
+    plus preloads for the given Inertia page component's chunk.
+    """
+    return entry_tags(entry, component)
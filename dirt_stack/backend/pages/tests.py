@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from inertia.settings import settings as inertia_settings
+
+from events.tests import TEST_CACHES, make_event
+
+from .management.commands.benchmark_routes import regressions
+
+
+class RegressionTests(SimpleTestCase):
+    baseline = {'detail': {'p95': 0.010, 'p99': 0.020, 'throughput': 100.0, 'queries_max': 2,
+                           'payload_bytes': 1000}}
+
+    def result(self, **changes):
+        return {'detail': {'errors': 0, 'p95': 0.010, 'p99': 0.020, 'throughput': 100.0, 'queries_max': 2,
+                           'payload_bytes': 1000, **changes}}
+
+    def test_within_tolerance(self):
+        self.assertEqual(regressions(self.result(p95=0.012, throughput=80.0), self.baseline, 0.25), [])
+
+    def test_slower_routes_fail_on_the_same_machine_only(self):
+        slower = self.result(p95=0.020, throughput=50.0)
+        self.assertEqual(len(regressions(slower, self.baseline, 0.25)), 2)
+        self.assertEqual(regressions(slower, self.baseline, 0.25, timings=False), [])
+
+    def test_queries_and_payloads_are_always_compared(self):
+        found = regressions(self.result(queries_max=3, payload_bytes=2000, errors=1), self.baseline, 0.25,
+                            timings=False)
+        self.assertEqual(len(found), 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HomeTests(TestCase):
+    headers = {'HTTP_X_INERTIA': 'true', 'HTTP_X_INERTIA_VERSION': str(inertia_settings.INERTIA_VERSION)}
+
+    def test_props(self):
+        page = self.client.get('/', **self.headers).json()
+        self.assertEqual(page['component'], 'Home')
+        self.assertEqual(page['props']['message'], 'hello home')
+        # Deferred until the client asks for it.
+        self.assertNotIn('upcoming_events', page['props'])
+
+    def test_upcoming_events_on_request(self):
+        make_event(User.objects.create(username='organizer'), slug='soon', name='Soon')
+        page = self.client.get('/', HTTP_X_INERTIA_PARTIAL_COMPONENT='Home',
+                               HTTP_X_INERTIA_PARTIAL_DATA='upcoming_events', **self.headers).json()
+        self.assertEqual(list(page['props']), ['upcoming_events'])
+        self.assertEqual([event['slug'] for event in page['props']['upcoming_events']], ['soon'])
@@ -1,9 +1,23 @@
-from inertia import render
+from inertia import lazy
+
+from dirt_project.rendering import render
+from events.models import Event
+from events.serializers import EVENT_CARD_FIELDS, serialize_event
+
+
+UPCOMING_EVENTS_LIMIT = 6
 
 
 def home(request):
     """Home page view"""
     return render(request, 'Home', {
         'message': 'hello home',
-        'page_name': 'home'
-    })
+        'page_name': 'home',
+        # Deferred: fetched by the client with a partial reload.
+        'upcoming_events': lazy(upcoming_events),
+    }, fields={'upcoming_events': EVENT_CARD_FIELDS})
+
+
+def upcoming_events():
+    rows = Event.objects.for_listing().upcoming().order_by('start_date', 'id')[:UPCOMING_EVENTS_LIMIT]
+    return [serialize_event(row) for row in rows]
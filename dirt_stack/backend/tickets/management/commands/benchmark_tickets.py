@@ -0,0 +1,258 @@
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+from django.utils import timezone
+
+from events.models import Event
+from tickets import services
+from tickets.models import Reservation
+
+
+BENCH_SLUG_PREFIX = 'ticket-bench-'
+BENCH_USER_PREFIX = 'ticket-bench-'
+# How often buyers look again once an event seems sold out while holds are
+# still outstanding, and how often the expiry pass runs.
+SOLD_OUT_POLL = 0.05
+
+
+def init_worker():
+    django.setup()
+    # Forked workers must not share the parent's database connection.
+    connections.close_all()
+
+
+def naive_reserve(event_id, user, quantity, key, hold):
+    """Read-modify-write, as a checkout without a conditional UPDATE would do it."""
+    remaining = Event.objects.values_list('tickets_remaining', flat=True).get(pk=event_id)
+    if remaining < quantity:
+        raise services.SoldOut('Not enough tickets left.')
+    time.sleep(0)  # let another buyer in between the read and the write
+    Event.objects.filter(pk=event_id).update(tickets_remaining=remaining - quantity)
+    return Reservation.objects.create(
+        event_id=event_id, user=user, quantity=quantity, idempotency_key=key,
+        expires_at=timezone.now() + hold,
+    ), True
+
+
+def run_buyer(event_id, user_id, seed, options):
+    """Buy until the event is sold out; returns this buyer's counters."""
+    rng = random.Random(seed)
+    user = User.objects.get(pk=user_id)
+    reserve = naive_reserve if options['strategy'] == 'naive' else services.reserve
+    stats = {'attempts': 0, 'reserved': 0, 'tickets': 0, 'confirmed': 0, 'cancelled': 0,
+             'abandoned': 0, 'sold_out': 0, 'replays': 0, 'replay_mismatches': 0,
+             'lock_errors': 0, 'latencies': []}
+    hold = timedelta(seconds=options['hold_seconds'])
+    deadline = time.monotonic() + options['duration']
+    try:
+        while time.monotonic() < deadline:
+            quantity = rng.randint(1, options['max_quantity'])
+            key = uuid.uuid4().hex
+            started = time.perf_counter()
+            stats['attempts'] += 1
+            try:
+                try:
+                    reservation, _ = reserve(event_id, user, quantity, key, hold=hold)
+                except services.SoldOut:
+                    # Fewer than ``quantity`` may be left; settle for one.
+                    reservation, _ = reserve(event_id, user, 1, key, hold=hold)
+            except services.SoldOut:
+                stats['latencies'].append(time.perf_counter() - started)
+                stats['sold_out'] += 1
+                if options['strategy'] == 'naive' or not Reservation.objects.filter(
+                    event_id=event_id, status=Reservation.HELD,
+                ).exists():
+                    break
+                time.sleep(SOLD_OUT_POLL)
+                continue
+            except OperationalError:
+                stats['lock_errors'] += 1
+                continue
+            stats['latencies'].append(time.perf_counter() - started)
+            stats['reserved'] += 1
+            stats['tickets'] += reservation.quantity
+
+            if options['strategy'] != 'naive' and rng.random() < options['retry']:
+                # The client timed out and sends the same request again.
+                again, created = services.reserve(event_id, user, reservation.quantity, key, hold=hold)
+                stats['replays'] += 1
+                stats['replay_mismatches'] += created or again.pk != reservation.pk
+
+            roll = rng.random()
+            try:
+                if roll < options['abandon']:
+                    stats['abandoned'] += 1
+                elif roll < options['abandon'] + options['cancel']:
+                    services.cancel(reservation.pk, user)
+                    stats['cancelled'] += 1
+                else:
+                    services.confirm(reservation.pk, user)
+                    stats['confirmed'] += 1
+            except services.HoldExpired:
+                stats['abandoned'] += 1
+            except OperationalError:
+                stats['lock_errors'] += 1
+    finally:
+        connection.close()
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Have concurrent buyers reserve, confirm, cancel and abandon tickets for one '
+        'event, report throughput, and check that it was never oversold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=1000)
+        parser.add_argument('--buyers', type=int, default=8, help='Concurrent buyers.')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run buyers in separate processes instead of threads.')
+        parser.add_argument('--max-quantity', type=int, default=4)
+        parser.add_argument('--abandon', type=float, default=0.1,
+                            help='Fraction of holds left to expire.')
+        parser.add_argument('--cancel', type=float, default=0.1,
+                            help='Fraction of holds cancelled.')
+        parser.add_argument('--retry', type=float, default=0.2,
+                            help='Fraction of reservations sent twice with the same key.')
+        parser.add_argument('--hold-seconds', type=float, default=1.0)
+        parser.add_argument('--duration', type=float, default=120,
+                            help='Stop buyers after this many seconds even if tickets are left.')
+        parser.add_argument('--strategy', choices=['conditional', 'naive'], default='conditional',
+                            help='naive reads then writes the remaining count, to show the oversell.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help="Don't delete the benchmark event.")
+        parser.add_argument('--output', help='Write the JSON report to this path.')
+
+    def handle(self, *args, **options):
+        if options['max_quantity'] > settings.TICKET_MAX_PER_RESERVATION:
+            raise CommandError('--max-quantity is above TICKET_MAX_PER_RESERVATION.')
+        event, user_ids = self.prepare(options)
+        self.stdout.write(
+            f'{options["buyers"]} {"processes" if options["processes"] else "threads"} buying '
+            f'{options["capacity"]} tickets ({options["strategy"]} strategy, {connection.vendor})'
+        )
+
+        stop = threading.Event()
+        expirer = threading.Thread(target=self.expire_holds, args=(event.pk, stop), daemon=True)
+        expirer.start()
+        pool_class = ProcessPoolExecutor if options['processes'] else ThreadPoolExecutor
+        pool_options = {'initializer': init_worker} if options['processes'] else {}
+        connections.close_all()
+        started = time.perf_counter()
+        try:
+            with pool_class(max_workers=options['buyers'], **pool_options) as pool:
+                futures = [
+                    pool.submit(run_buyer, event.pk, user_id, options['seed'] + i, options)
+                    for i, user_id in enumerate(user_ids)
+                ]
+                results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+        finally:
+            stop.set()
+            expirer.join()
+
+        # Let any holds still outstanding lapse so the final count is settled.
+        released = services.release_expired_holds(
+            event_id=event.pk, now=timezone.now() + timedelta(seconds=options['hold_seconds']),
+        )
+        report = self.report(event, results, elapsed, released, options)
+        if not options['keep']:
+            event.delete()
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}')
+        if report['oversold'] or report['replay_mismatches'] or not report['consistent']:
+            if options['strategy'] == 'naive':
+                self.stdout.write('The naive strategy broke the inventory, as expected.')
+            else:
+                raise CommandError('The inventory invariant was violated.')
+
+    def prepare(self, options):
+        user_ids = []
+        for i in range(options['buyers']):
+            user, _ = User.objects.get_or_create(username=f'{BENCH_USER_PREFIX}{i}')
+            user_ids.append(user.pk)
+        now = timezone.now()
+        event = Event.objects.create(
+            name=f'Ticket benchmark {now:%Y-%m-%d %H:%M:%S}',
+            slug=f'{BENCH_SLUG_PREFIX}{uuid.uuid4().hex[:12]}',
+            description='Created by benchmark_tickets.', price=10, venue='Benchmark Hall',
+            start_date=now + timedelta(days=30), end_date=now + timedelta(days=30, hours=3),
+            user_id=user_ids[0], capacity=options['capacity'],
+        )
+        return event, user_ids
+
+    def expire_holds(self, event_id, stop):
+        try:
+            while not stop.wait(SOLD_OUT_POLL):
+                try:
+                    services.release_expired_holds(event_id=event_id)
+                except OperationalError:
+                    pass
+        finally:
+            connection.close()
+
+    def report(self, event, results, elapsed, released, options):
+        event.refresh_from_db()
+        by_status = dict(
+            Reservation.objects.filter(event=event).values_list('status')
+            .annotate(quantity=Sum('quantity')).order_by()
+        )
+        held = by_status.get(Reservation.HELD, 0)
+        confirmed = by_status.get(Reservation.CONFIRMED, 0)
+        totals = {key: sum(r[key] for r in results) for key in results[0] if key != 'latencies'}
+        latencies = sorted(latency for r in results for latency in r['latencies'])
+        # Every ticket is either unsold, held or sold, and never more than capacity are sold.
+        consistent = event.tickets_remaining + held + confirmed == event.capacity
+        oversold = max(0, confirmed + held - event.capacity)
+        report = {
+            'vendor': connection.vendor,
+            'strategy': options['strategy'],
+            'workers': 'processes' if options['processes'] else 'threads',
+            'buyers': options['buyers'],
+            'capacity': event.capacity,
+            'seconds': round(elapsed, 3),
+            'reservations_per_second': round(totals['reserved'] / elapsed, 1),
+            'attempts_per_second': round(totals['attempts'] / elapsed, 1),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+                'p99': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+            },
+            'confirmed': confirmed,
+            'held': held,
+            'remaining': event.tickets_remaining,
+            'released_at_end': released,
+            'consistent': consistent,
+            'oversold': oversold,
+            **totals,
+        }
+        self.stdout.write(
+            f'{report["reserved"]} reservations ({report["attempts"]} attempts) in {report["seconds"]}s: '
+            f'{report["reservations_per_second"]}/s, p50 {report["latency_ms"]["p50"]} ms, '
+            f'p99 {report["latency_ms"]["p99"]} ms'
+        )
+        self.stdout.write(
+            f'confirmed {confirmed}, held {held}, remaining {event.tickets_remaining} of {event.capacity}; '
+            f'{report["cancelled"]} cancelled, {report["abandoned"]} abandoned, '
+            f'{report["replays"]} replays ({report["replay_mismatches"]} mismatched), '
+            f'{report["lock_errors"]} lock timeouts'
+        )
+        self.stdout.write(
+            f'oversold by {oversold}' if oversold or not consistent
+            else 'never oversold: remaining + held + confirmed == capacity'
+        )
+        return report
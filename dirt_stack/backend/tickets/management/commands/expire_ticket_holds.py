@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.services import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = (
+        'Return the tickets of lapsed holds to their events. Runs once, or every '
+        '--interval seconds when run as a long-lived process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep running, releasing holds every this many seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            released = release_expired_holds()
+            if released or not options['interval']:
+                self.stdout.write(f'Released {released} expired holds in {time.perf_counter() - started:.3f}s')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
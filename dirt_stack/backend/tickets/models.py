@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import models
+
+from events.models import Event
+
+
+class Reservation(models.Model):
+    """
+    Tickets taken from an event's inventory. A hold keeps them for
+    TICKET_HOLD_SECONDS; confirming it is the purchase, and an expired or
+    cancelled hold gives them back. See tickets.services.
+    """
+    HELD = 'held'
+    CONFIRMED = 'confirmed'
+    EXPIRED = 'expired'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (HELD, 'Held'),
+        (CONFIRMED, 'Confirmed'),
+        (EXPIRED, 'Expired'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    # Client-chosen key; repeating a request with the same key returns the
+    # original reservation instead of taking more tickets.
+    idempotency_key = models.CharField(max_length=64)
+    # Set by the expiry pass that released this hold, so it can add back
+    # exactly the tickets of the rows it flipped.
+    release_batch = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='reservation_user_key_uniq'),
+        ]
+        indexes = [
+            # The expiry pass looks for holds past their deadline.
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_exp_idx'),
+            models.Index(fields=['release_batch'], name='reservation_release_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.quantity} x {self.event} ({self.status})'
@@ -0,0 +1,185 @@
+"""
+Ticket inventory operations.
+
+An event's ``tickets_remaining`` is only ever changed by a single
+conditional UPDATE (``... SET tickets_remaining = tickets_remaining - n
+WHERE tickets_remaining >= n``), so buyers never read-modify-write the
+count and a row lock is held for one statement rather than for a whole
+checkout. Overselling is impossible: the UPDATE matches no row once the
+tickets are gone.
+"""
+
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from events.models import Event
+
+from .models import Reservation
+
+
+class TicketError(Exception):
+    status = 400
+
+
+class NotTicketed(TicketError):
+    status = 404
+
+
+class SoldOut(TicketError):
+    status = 409
+
+
+class IdempotencyConflict(TicketError):
+    status = 422
+
+
+class HoldExpired(TicketError):
+    status = 410
+
+
+def hold_duration():
+    return timedelta(seconds=settings.TICKET_HOLD_SECONDS)
+
+
+def take_tickets(event_id, quantity):
+    return Event.objects.filter(
+        pk=event_id, tickets_remaining__gte=quantity,
+    ).update(tickets_remaining=F('tickets_remaining') - quantity) == 1
+
+
+def return_tickets(event_id, quantity):
+    Event.objects.filter(pk=event_id).update(tickets_remaining=F('tickets_remaining') + quantity)
+
+
+def replay(user, key, event_id, quantity):
+    """The reservation already made with ``key``, if it asked for the same thing."""
+    existing = Reservation.objects.filter(user=user, idempotency_key=key).first()
+    if existing and (existing.event_id, existing.quantity) != (event_id, quantity):
+        raise IdempotencyConflict('This idempotency key was used for a different reservation.')
+    return existing
+
+
+def reserve(event_id, user, quantity, key, now=None, hold=None):
+    """
+    Hold ``quantity`` tickets for ``user`` for ``hold`` (default
+    TICKET_HOLD_SECONDS). Returns ``(reservation, created)``; repeating a
+    call with the same ``key`` returns the first reservation.
+    """
+    if not 1 <= quantity <= settings.TICKET_MAX_PER_RESERVATION:
+        raise TicketError(f'Quantity must be between 1 and {settings.TICKET_MAX_PER_RESERVATION}.')
+    existing = replay(user, key, event_id, quantity)
+    if existing:
+        return existing, False
+
+    now = now or timezone.now()
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                if take_tickets(event_id, quantity):
+                    return Reservation.objects.create(
+                        event_id=event_id, user=user, quantity=quantity,
+                        expires_at=now + (hold or hold_duration()), idempotency_key=key,
+                    ), True
+        except IntegrityError:
+            # A concurrent request with the same key won; its decrement
+            # stands and ours was rolled back with the insert.
+            return replay(user, key, event_id, quantity), False
+        # Sold out, unless lapsed holds are still counted against the event.
+        if attempt or not release_expired_holds(event_id=event_id, now=now):
+            break
+
+    if not Event.objects.filter(pk=event_id, capacity__isnull=False).exists():
+        raise NotTicketed('This event has no tickets.')
+    raise SoldOut('Not enough tickets left.')
+
+
+def confirm(reservation_id, user, now=None):
+    """Turn a live hold into a purchase; confirming twice is harmless."""
+    now = now or timezone.now()
+    Reservation.objects.filter(
+        pk=reservation_id, user=user, status=Reservation.HELD, expires_at__gt=now,
+    ).update(status=Reservation.CONFIRMED, updated_at=now)
+    reservation = Reservation.objects.get(pk=reservation_id, user=user)
+    if reservation.status == Reservation.CONFIRMED:
+        return reservation
+    if reservation.status == Reservation.CANCELLED:
+        raise TicketError('This reservation was cancelled.')
+    raise HoldExpired('This hold has expired.')
+
+
+def cancel(reservation_id, user, now=None):
+    """Release a hold before it expires; confirmed tickets stay sold."""
+    now = now or timezone.now()
+    reservation = Reservation.objects.get(pk=reservation_id, user=user)
+    with transaction.atomic():
+        if Reservation.objects.filter(pk=reservation.pk, status=Reservation.HELD).update(
+            status=Reservation.CANCELLED, updated_at=now,
+        ):
+            return_tickets(reservation.event_id, reservation.quantity)
+            reservation.status = Reservation.CANCELLED
+            return reservation
+    reservation.refresh_from_db()
+    if reservation.status == Reservation.CONFIRMED:
+        raise TicketError('Confirmed tickets cannot be cancelled.')
+    return reservation
+
+
+def release_expired_holds(event_id=None, now=None):
+    """
+    Expire every lapsed hold in one UPDATE and give the tickets back with
+    one UPDATE per event. Returns the number of holds released.
+    """
+    now = now or timezone.now()
+    batch = uuid4()
+    with transaction.atomic():
+        holds = Reservation.objects.filter(status=Reservation.HELD, expires_at__lte=now)
+        if event_id is not None:
+            holds = holds.filter(event_id=event_id)
+        released = holds.update(status=Reservation.EXPIRED, release_batch=batch, updated_at=now)
+        if released:
+            totals = (Reservation.objects.filter(release_batch=batch)
+                      .values('event_id').annotate(quantity=Sum('quantity')).order_by())
+            for row in totals:
+                return_tickets(row['event_id'], row['quantity'])
+    return released
+
+
+def availability(event, now=None):
+    # Lapsed holds still count against tickets_remaining until they are
+    # released, but nobody holds them any more.
+    held = (Reservation.objects.filter(event=event, status=Reservation.HELD,
+                                       expires_at__gt=now or timezone.now())
+            .aggregate(total=Sum('quantity'))['total'] or 0)
+    return {
+        'capacity': event.capacity,
+        'remaining': event.tickets_remaining,
+        'held': held,
+    }
+
+
+def set_capacity(event_id, capacity):
+    """Change an event's capacity, moving the remaining count by the difference."""
+    old = Event.objects.values_list('capacity', flat=True).get(pk=event_id)
+    if capacity is None:
+        if old is not None and not Event.objects.filter(
+            pk=event_id, capacity=old, tickets_remaining=old,
+        ).update(capacity=None, tickets_remaining=None):
+            raise TicketError('Tickets have been sold; the event must stay ticketed.')
+        return
+    if old is None:
+        changed = Event.objects.filter(pk=event_id, capacity__isnull=True).update(
+            capacity=capacity, tickets_remaining=capacity,
+        )
+    else:
+        # Guarded on the capacity read above and on enough unsold tickets,
+        # so a sale in between can't push the count below zero.
+        changed = Event.objects.filter(
+            pk=event_id, capacity=old, tickets_remaining__gte=old - capacity,
+        ).update(capacity=capacity, tickets_remaining=F('tickets_remaining') + (capacity - old))
+    if not changed:
+        raise TicketError('More tickets are sold or held than the new capacity.')
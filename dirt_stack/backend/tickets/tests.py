@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from events.models import Event
+from events.tests import TEST_CACHES, make_event
+
+from . import services
+from .models import Reservation
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReserveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='buyer')
+
+    def setUp(self):
+        self.event = make_event(self.user, capacity=5)
+
+    def remaining(self):
+        return Event.objects.values_list('tickets_remaining', flat=True).get(pk=self.event.pk)
+
+    def test_never_sells_more_than_capacity(self):
+        services.reserve(self.event.pk, self.user, 3, 'a')
+        with self.assertRaises(services.SoldOut):
+            services.reserve(self.event.pk, self.user, 3, 'b')
+        services.reserve(self.event.pk, self.user, 2, 'c')
+        with self.assertRaises(services.SoldOut):
+            services.reserve(self.event.pk, self.user, 1, 'd')
+        self.assertEqual(self.remaining(), 0)
+
+    def test_repeated_key_takes_tickets_once(self):
+        first, created = services.reserve(self.event.pk, self.user, 2, 'a')
+        again, created_again = services.reserve(self.event.pk, self.user, 2, 'a')
+        self.assertEqual((again.pk, created, created_again), (first.pk, True, False))
+        self.assertEqual(self.remaining(), 3)
+        with self.assertRaises(services.IdempotencyConflict):
+            services.reserve(self.event.pk, self.user, 1, 'a')
+
+    def test_lapsed_holds_are_sold_again(self):
+        now = timezone.now()
+        services.reserve(self.event.pk, self.user, 5, 'a', now=now, hold=timedelta(seconds=-1))
+        reservation, _ = services.reserve(self.event.pk, self.user, 4, 'b', now=now)
+        self.assertEqual(self.remaining(), 1)
+        with self.assertRaises(services.HoldExpired):
+            services.confirm(Reservation.objects.get(idempotency_key='a').pk, self.user, now=now)
+        self.assertEqual(services.confirm(reservation.pk, self.user, now=now).status, Reservation.CONFIRMED)
+
+    def test_unticketed_event(self):
+        event = make_event(self.user, slug='free')
+        with self.assertRaises(services.NotTicketed):
+            services.reserve(event.pk, self.user, 1, 'a')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CapacityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='buyer')
+
+    def setUp(self):
+        self.event = make_event(self.user, capacity=10)
+
+    def test_saving_a_new_capacity_moves_the_remaining_count(self):
+        services.reserve(self.event.pk, self.user, 3, 'a')
+        event = Event.objects.get(pk=self.event.pk)
+        event.capacity = 20
+        event.save()
+        self.assertEqual(event.tickets_remaining, 17)
+        self.assertEqual(Event.objects.values_list('capacity', 'tickets_remaining').get(pk=event.pk), (20, 17))
+
+    def test_capacity_below_sold_tickets_is_rejected(self):
+        services.reserve(self.event.pk, self.user, 8, 'a')
+        event = Event.objects.get(pk=self.event.pk)
+        event.capacity = 5
+        event.name = 'Renamed'
+        with self.assertRaises(services.TicketError):
+            event.save()
+        self.assertEqual(Event.objects.values_list('name', 'capacity').get(pk=event.pk), ('Event', 10))
+
+    def test_saving_other_fields_keeps_concurrent_sales(self):
+        event = Event.objects.get(pk=self.event.pk)
+        services.reserve(self.event.pk, self.user, 4, 'a')
+        event.name = 'Renamed'
+        event.save()
+        self.assertEqual(Event.objects.values_list('tickets_remaining', flat=True).get(pk=event.pk), 6)
+
+    def test_availability_ignores_lapsed_holds(self):
+        now = timezone.now()
+        services.reserve(self.event.pk, self.user, 2, 'live', now=now)
+        services.reserve(self.event.pk, self.user, 3, 'lapsed', now=now, hold=timedelta(seconds=-1))
+        self.event.refresh_from_db()
+        self.assertEqual(services.availability(self.event, now=now)['held'], 2)
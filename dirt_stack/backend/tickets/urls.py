@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('events/<slug:slug>/', views.event_availability, name='event_availability'),
+    path('events/<slug:slug>/reserve/', views.reserve_tickets, name='reserve_tickets'),
+    path('<int:pk>/confirm/', views.confirm_reservation, name='confirm_reservation'),
+    path('<int:pk>/cancel/', views.cancel_reservation, name='cancel_reservation'),
+]
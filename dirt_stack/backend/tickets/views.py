@@ -0,0 +1,95 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET, require_POST
+
+from events.models import Event
+
+from . import services
+from .models import Reservation
+
+
+MAX_KEY_LENGTH = Reservation._meta.get_field('idempotency_key').max_length
+
+# Sync views: each operation is a couple of short statements, and
+# transaction.atomic() has no async form in Django 4.2.
+
+
+def serialize_reservation(reservation, event_slug):
+    return {
+        'id': reservation.pk,
+        'event': event_slug,
+        'quantity': reservation.quantity,
+        'status': reservation.status,
+        'expires_at': reservation.expires_at.isoformat(),
+    }
+
+
+def request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+def error_response(exc):
+    return JsonResponse({'error': str(exc)}, status=exc.status)
+
+
+@require_GET
+def event_availability(request, slug):
+    event = get_object_or_404(Event, slug=slug)
+    return JsonResponse(services.availability(event))
+
+
+@login_required
+@require_POST
+def reserve_tickets(request, slug):
+    """
+    Hold tickets for the current user. The Idempotency-Key header (or a
+    ``key`` field) makes retries safe: a repeat answers 200 with the
+    original reservation instead of 201 with a new one.
+    """
+    data = request_data(request)
+    key = request.headers.get('Idempotency-Key') or data.get('key')
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return HttpResponseBadRequest(f'An Idempotency-Key of up to {MAX_KEY_LENGTH} characters is required.')
+    try:
+        quantity = int(data.get('quantity', 1))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest('quantity must be a whole number.')
+    event_id = get_object_or_404(Event.objects.values_list('id', flat=True), slug=slug)
+    try:
+        reservation, created = services.reserve(event_id, request.user, quantity, key)
+    except services.TicketError as exc:
+        return error_response(exc)
+    return JsonResponse(serialize_reservation(reservation, slug), status=201 if created else 200)
+
+
+@login_required
+@require_POST
+def confirm_reservation(request, pk):
+    try:
+        reservation = services.confirm(pk, request.user)
+    except Reservation.DoesNotExist:
+        raise Http404
+    except services.TicketError as exc:
+        return error_response(exc)
+    return JsonResponse(serialize_reservation(reservation, reservation.event.slug))
+
+
+@login_required
+@require_POST
+def cancel_reservation(request, pk):
+    try:
+        reservation = services.cancel(pk, request.user)
+    except Reservation.DoesNotExist:
+        raise Http404
+    except services.TicketError as exc:
+        return error_response(exc)
+    return JsonResponse(serialize_reservation(reservation, reservation.event.slug))
@@ -1,8 +1,15 @@
-import React from 'react';
-import { Head } from '@inertiajs/react';
+import React, { useEffect } from 'react';
+import { Head, Link, router } from '@inertiajs/react';
 import { Calendar, MapPin, DollarSign, User } from 'lucide-react';
 
-export default function EventDetail({ event }) {
+export default function EventDetail({ event, related_events }) {
+    // Deferred by the server: fetched once the event itself is on screen.
+    useEffect(() => {
+        if (related_events === undefined) {
+            router.reload({ only: ['related_events'] });
+        }
+    }, [event]);
+
     const formatDate = (dateString) => {
         return new Date(dateString).toLocaleDateString('en-US', {
             weekday: 'long',
@@ -23,11 +30,19 @@ export default function EventDetail({ event }) {
                     {/* Cover Photo */}
                     {event.cover_photo && (
                         <div className="mb-8 rounded-2xl overflow-hidden">
-                            <img 
-                                src={event.cover_photo} 
-                                alt={event.name}
-                                className="w-full h-96 object-cover"
-                            />
+                            <picture>
+                                {event.cover_srcset?.avif && (
+                                    <source type="image/avif" srcSet={event.cover_srcset.avif} sizes="(min-width: 896px) 896px, 100vw" />
+                                )}
+                                {event.cover_srcset?.webp && (
+                                    <source type="image/webp" srcSet={event.cover_srcset.webp} sizes="(min-width: 896px) 896px, 100vw" />
+                                )}
+                                <img 
+                                    src={event.cover_photo} 
+                                    alt={event.name}
+                                    className="w-full h-96 object-cover"
+                                />
+                            </picture>
                         </div>
                     )}
 
@@ -74,6 +89,27 @@ export default function EventDetail({ event }) {
                             Buy Ticket - ${event.price}
                         </button>
                     </div>
+
+                    {related_events?.length > 0 && (
+                        <div className="mt-8">
+                            <h2 className="text-2xl font-bold text-white mb-4">More at {event.venue}</h2>
+                            <div className="grid md:grid-cols-2 gap-4">
+                                {related_events.map((related) => (
+                                    <Link
+                                        key={related.id}
+                                        href={`/events/${related.slug}`}
+                                        className="bg-neutral-800 rounded-xl p-5 border border-neutral-700 hover:border-amber-500/50 transition-colors"
+                                    >
+                                        <p className="font-semibold text-white mb-2">{related.name}</p>
+                                        <div className="flex items-center gap-2 text-neutral-400 text-sm">
+                                            <Calendar className="w-4 h-4 text-amber-400" />
+                                            <span>{formatDate(related.start_date)}</span>
+                                        </div>
+                                    </Link>
+                                ))}
+                            </div>
+                        </div>
+                    )}
                 </div>
             </div>
         </>
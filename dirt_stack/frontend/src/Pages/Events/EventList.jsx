@@ -1,8 +1,57 @@
-import React from 'react';
-import { Head, Link } from '@inertiajs/react';
-import { Calendar, MapPin, DollarSign, ArrowRight } from 'lucide-react';
+import React, { useEffect, useState } from 'react';
+import { Head, Link, router } from '@inertiajs/react';
+import { Calendar, MapPin, DollarSign, ArrowRight, RefreshCw } from 'lucide-react';
 
-export default function EventList({ events }) {
+const FACETS = [
+    { name: 'venue', title: 'Venue' },
+    { name: 'price', title: 'Price' },
+    { name: 'month', title: 'Month' },
+];
+
+// Filters and pages only change the list: the facet counts cover every
+// event, so the partial reload leaves them as they are.
+const LIST_PROPS = ['events', 'next_cursor', 'filters'];
+
+function filterHref(filters, changes) {
+    const params = new URLSearchParams();
+    Object.entries({ ...filters, ...changes }).forEach(([key, value]) => {
+        if (value) params.set(key, value);
+    });
+    const search = params.toString();
+    return search ? `/events/?${search}` : '/events/';
+}
+
+// Applies updates and deletions from the live feed (/events/live/) to the
+// listed events in place, and counts new events until the list is reloaded.
+function useLiveEvents(initial) {
+    const [events, setEvents] = useState(initial);
+    const [newCount, setNewCount] = useState(0);
+
+    useEffect(() => setEvents(initial), [initial]);
+
+    useEffect(() => {
+        if (typeof EventSource === 'undefined') return undefined;
+        const source = new EventSource('/events/live/');
+        source.addEventListener('created', () => setNewCount((count) => count + 1));
+        source.addEventListener('updated', (message) => {
+            const changed = JSON.parse(message.data);
+            setEvents((list) => list.map((event) => (event.id === changed.id ? changed : event)));
+        });
+        source.addEventListener('deleted', (message) => {
+            const { id } = JSON.parse(message.data);
+            setEvents((list) => list.filter((event) => event.id !== id));
+        });
+        // Too much was missed to replay; offer a reload.
+        source.addEventListener('reset', () => setNewCount((count) => count || 1));
+        return () => source.close();
+    }, []);
+
+    const reload = () => router.reload({ onSuccess: () => setNewCount(0) });
+    return [events, newCount, reload];
+}
+
+export default function EventList({ events: initialEvents, next_cursor, query, facets, filters = {} }) {
+    const [events, newCount, reload] = useLiveEvents(initialEvents);
     const formatDate = (dateString) => {
         return new Date(dateString).toLocaleDateString('en-US', {
             month: 'short',
@@ -20,21 +69,71 @@ export default function EventList({ events }) {
             <div className="min-h-screen bg-neutral-900 py-8">
                 <div className="max-w-6xl mx-auto px-6">
                     <div className="mb-8">
-                        <h1 className="text-4xl font-bold text-white mb-4">Upcoming Events</h1>
+                        <h1 className="text-4xl font-bold text-white mb-4">
+                            {query ? `Results for "${query}"` : 'Upcoming Events'}
+                        </h1>
                         <p className="text-neutral-400">Discover amazing events happening near you</p>
                     </div>
 
+                    {newCount > 0 && (
+                        <button
+                            type="button"
+                            onClick={reload}
+                            className="flex items-center gap-2 mb-6 text-sm px-4 py-2 rounded-full bg-amber-500 hover:bg-amber-400 text-black font-semibold transition-colors"
+                        >
+                            <RefreshCw className="w-4 h-4" />
+                            <span>{newCount === 1 ? '1 new event' : `${newCount} new events`}</span>
+                        </button>
+                    )}
+
+                    {facets && (
+                        <div className="space-y-4 mb-8">
+                            {FACETS.map(({ name, title }) => facets[name]?.length > 0 && (
+                                <div key={name} className="flex flex-wrap items-center gap-2">
+                                    <span className="text-neutral-400 text-sm w-16">{title}</span>
+                                    {facets[name].map((option) => {
+                                        const active = filters[name] === option.value;
+                                        return (
+                                            <Link
+                                                key={option.value}
+                                                href={filterHref(filters, { [name]: active ? null : option.value })}
+                                                only={LIST_PROPS}
+                                                preserveScroll
+                                                className={`text-sm px-3 py-1 rounded-full border transition-colors ${
+                                                    active
+                                                        ? 'bg-amber-500 border-amber-500 text-black'
+                                                        : 'bg-neutral-800 border-neutral-700 text-neutral-300 hover:border-amber-500/50'
+                                                }`}
+                                            >
+                                                {option.label} <span className="opacity-60">{option.count}</span>
+                                            </Link>
+                                        );
+                                    })}
+                                </div>
+                            ))}
+                        </div>
+                    )}
+
                     <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
                         {events.map((event) => (
                             <div key={event.id} className="bg-neutral-800 rounded-2xl overflow-hidden border border-neutral-700 hover:border-amber-500/50 transition-all duration-300 group">
                                 {/* Cover Photo */}
                                 {event.cover_photo && (
                                     <div className="h-48 overflow-hidden">
-                                        <img 
-                                            src={event.cover_photo} 
-                                            alt={event.name}
-                                            className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
-                                        />
+                                        <picture>
+                                            {event.cover_srcset?.avif && (
+                                                <source type="image/avif" srcSet={event.cover_srcset.avif} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" />
+                                            )}
+                                            {event.cover_srcset?.webp && (
+                                                <source type="image/webp" srcSet={event.cover_srcset.webp} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" />
+                                            )}
+                                            <img 
+                                                src={event.cover_photo} 
+                                                alt={event.name}
+                                                loading="lazy"
+                                                className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
+                                            />
+                                        </picture>
                                     </div>
                                 )}
 
@@ -83,6 +182,19 @@ export default function EventList({ events }) {
                             <p className="text-neutral-400 text-lg">No events found.</p>
                         </div>
                     )}
+
+                    {next_cursor && (
+                        <div className="flex justify-center mt-10">
+                            <Link
+                                href={filterHref(filters, { after: next_cursor })}
+                                only={LIST_PROPS}
+                                className="flex items-center gap-2 bg-neutral-800 hover:bg-neutral-700 text-white font-semibold py-3 px-6 rounded-lg border border-neutral-700 transition-colors"
+                            >
+                                <span>Next page</span>
+                                <ArrowRight className="w-4 h-4" />
+                            </Link>
+                        </div>
+                    )}
                 </div>
             </div>
         </>
@@ -1,10 +1,17 @@
-import React from "react";
+import React, { useEffect } from "react";
 import { motion } from "framer-motion";
-import { Link } from "@inertiajs/react";
+import { Link, router } from "@inertiajs/react";
 import { createPageUrl } from "@/utils";
-import { Ticket, Clock, Shield, Star, ArrowRight, Users, Menu } from "lucide-react";
+import { Ticket, Clock, Shield, Star, ArrowRight, Users, Menu, Calendar, MapPin } from "lucide-react";
+
+export default function Home({ upcoming_events }) {
+  // Deferred by the server: fetched after the first paint.
+  useEffect(() => {
+    if (upcoming_events === undefined) {
+      router.reload({ only: ["upcoming_events"] });
+    }
+  }, []);
 
-export default function Home() {
   return (
     <div className="min-h-screen bg-neutral-900">
       {/* Navbar */}
@@ -127,6 +134,40 @@ export default function Home() {
         </div>
       </section>
 
+      {/* Upcoming Events */}
+      {upcoming_events?.length > 0 && (
+        <section className="px-6 pb-20 bg-neutral-900">
+          <div className="max-w-7xl mx-auto">
+            <div className="flex items-center justify-between mb-8">
+              <h2 className="text-3xl font-bold text-white">Upcoming Events</h2>
+              <Link href="/events/" className="flex items-center gap-2 text-amber-400 hover:text-amber-300 transition-colors">
+                See all
+                <ArrowRight className="w-4 h-4" />
+              </Link>
+            </div>
+            <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
+              {upcoming_events.map((event) => (
+                <Link
+                  key={event.id}
+                  href={`/events/${event.slug}`}
+                  className="bg-neutral-800 border border-neutral-700 p-6 rounded-2xl hover:border-amber-500/50 transition-all duration-300"
+                >
+                  <h3 className="font-bold text-xl text-white mb-3">{event.name}</h3>
+                  <div className="flex items-center gap-2 text-neutral-400 text-sm mb-1">
+                    <Calendar className="w-4 h-4 text-amber-400" />
+                    <span>{new Date(event.start_date).toLocaleDateString("en-US", { month: "short", day: "numeric", year: "numeric" })}</span>
+                  </div>
+                  <div className="flex items-center gap-2 text-neutral-400 text-sm">
+                    <MapPin className="w-4 h-4 text-amber-400" />
+                    <span>{event.venue}</span>
+                  </div>
+                </Link>
+              ))}
+            </div>
+          </div>
+        </section>
+      )}
+
       {/* Services Section */}
       <section className="px-6 py-20 relative overflow-hidden">
         <div 
@@ -1,5 +1,5 @@
 import React from 'react'
-import { createRoot } from 'react-dom/client'
+import { createRoot, hydrateRoot } from 'react-dom/client'
 import { createInertiaApp } from '@inertiajs/react'
 import './index.css'
 
@@ -7,11 +7,18 @@ const appName = 'DIRT Stack'
 
 createInertiaApp({
   title: (title) => `${title} - ${appName}`,
+  // Each page is its own lazily loaded chunk; Django preloads the chunk
+  // for the page being rendered, so first paint only fetches that page.
   resolve: name => {
-    const pages = import.meta.glob('./Pages/**/*.jsx', { eager: true })
-    return pages[`./Pages/${name}.jsx`]
+    const pages = import.meta.glob('./Pages/**/*.jsx')
+    return pages[`./Pages/${name}.jsx`]()
   },
   setup({ el, App, props }) {
+    // Pages rendered by the SSR server already contain markup to hydrate.
+    if (el.hasChildNodes()) {
+      hydrateRoot(el, <App {...props} />)
+      return
+    }
     const root = createRoot(el)
     root.render(<App {...props} />)
   },
@@ -0,0 +1,16 @@
+import React from 'react'
+import ReactDOMServer from 'react-dom/server'
+import { createInertiaApp } from '@inertiajs/react'
+import createServer from '@inertiajs/react/server'
+
+createServer(page =>
+  createInertiaApp({
+    page,
+    render: ReactDOMServer.renderToString,
+    resolve: name => {
+      const pages = import.meta.glob('./Pages/**/*.jsx', { eager: true })
+      return pages[`./Pages/${name}.jsx`]
+    },
+    setup: ({ App, props }) => <App {...props} />,
+  }),
+)